@@ -7,10 +7,13 @@ from alembic import context
 
 # Import your models here
 from app import models
+from app.database import SQLALCHEMY_DATABASE_URL
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
+# Migrate the database the app uses (DATABASE_URL), not the one in alembic.ini
+config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,45 @@
+"""add_llm_usage
+
+Revision ID: 5a81d3e6f027
+Revises: e7f3b9c25d84
+Create Date: 2026-10-17 16:20:48.330914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a81d3e6f027'
+down_revision: Union[str, None] = 'e7f3b9c25d84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('llm_usage',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('calls', sa.Integer(), nullable=True),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+    sa.Column('completion_tokens', sa.Integer(), nullable=True),
+    sa.Column('cost_usd', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'day', 'model', name='uq_llm_usage_user_day_model')
+    )
+    op.create_index(op.f('ix_llm_usage_day'), 'llm_usage', ['day'], unique=False)
+    op.create_index(op.f('ix_llm_usage_id'), 'llm_usage', ['id'], unique=False)
+    op.create_index(op.f('ix_llm_usage_user_id'), 'llm_usage', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_llm_usage_user_id'), table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_id'), table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_day'), table_name='llm_usage')
+    op.drop_table('llm_usage')
@@ -0,0 +1,46 @@
+"""add_extraction_cache
+
+Revision ID: 9b1c4e7a2d10
+Revises: 6384736f4fda
+Create Date: 2026-10-17 09:12:41.532118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1c4e7a2d10'
+down_revision: Union[str, None] = '6384736f4fda'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('extraction_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('prompt_version', sa.String(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('last_accessed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_extraction_cache_cache_key'), 'extraction_cache', ['cache_key'], unique=True)
+    op.create_index(op.f('ix_extraction_cache_expires_at'), 'extraction_cache', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_extraction_cache_id'), 'extraction_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_extraction_cache_last_accessed_at'), 'extraction_cache', ['last_accessed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_extraction_cache_last_accessed_at'), table_name='extraction_cache')
+    op.drop_index(op.f('ix_extraction_cache_id'), table_name='extraction_cache')
+    op.drop_index(op.f('ix_extraction_cache_expires_at'), table_name='extraction_cache')
+    op.drop_index(op.f('ix_extraction_cache_cache_key'), table_name='extraction_cache')
+    op.drop_table('extraction_cache')
@@ -0,0 +1,52 @@
+"""add_jobs
+
+Revision ID: b62e0f9a4c17
+Revises: 5a81d3e6f027
+Create Date: 2026-10-17 17:05:12.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b62e0f9a4c17'
+down_revision: Union[str, None] = '5a81d3e6f027'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('max_attempts', sa.Integer(), nullable=True),
+    sa.Column('idempotency_key', sa.String(), nullable=True),
+    sa.Column('run_after', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jobs_id'), 'jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_jobs_idempotency_key'), 'jobs', ['idempotency_key'], unique=True)
+    op.create_index('ix_jobs_status_run_after', 'jobs', ['status', 'run_after'], unique=False)
+    op.create_index(op.f('ix_jobs_user_id'), 'jobs', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_jobs_user_id'), table_name='jobs')
+    op.drop_index('ix_jobs_status_run_after', table_name='jobs')
+    op.drop_index(op.f('ix_jobs_idempotency_key'), table_name='jobs')
+    op.drop_index(op.f('ix_jobs_id'), table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,42 @@
+"""add_thread_states
+
+Revision ID: c4d2a8f61e35
+Revises: 9b1c4e7a2d10
+Create Date: 2026-10-17 11:04:27.881503
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2a8f61e35'
+down_revision: Union[str, None] = '9b1c4e7a2d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('thread_states',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('thread_id', sa.String(), nullable=False),
+    sa.Column('messages', sa.JSON(), nullable=True),
+    sa.Column('known_tasks', sa.JSON(), nullable=True),
+    sa.Column('seen_hashes', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'thread_id', name='uq_thread_states_user_thread')
+    )
+    op.create_index(op.f('ix_thread_states_id'), 'thread_states', ['id'], unique=False)
+    op.create_index(op.f('ix_thread_states_thread_id'), 'thread_states', ['thread_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_thread_states_thread_id'), table_name='thread_states')
+    op.drop_index(op.f('ix_thread_states_id'), table_name='thread_states')
+    op.drop_table('thread_states')
@@ -0,0 +1,51 @@
+"""add_task_query_indexes
+
+Revision ID: d8e2f4a6b913
+Revises: b62e0f9a4c17
+Create Date: 2026-10-17 19:42:08.513390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e2f4a6b913'
+down_revision: Union[str, None] = 'b62e0f9a4c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Databases created by init_db have the team task columns (created_by,
+# assigned_to, deadline); those migrated from the initial schema have user_id,
+# due_date and reminder_time instead. Each index is only created where its
+# columns exist. emails.gmail_id already has a unique index (ix_emails_gmail_id).
+INDEXES = [
+    ('ix_tasks_created_by_status_deadline', 'tasks', ['created_by', 'status', 'deadline'], None),
+    ('ix_tasks_assigned_to_status_deadline', 'tasks', ['assigned_to', 'status', 'deadline'], None),
+    ('ix_tasks_team_id_status_deadline', 'tasks', ['team_id', 'status', 'deadline'], None),
+    ('ix_team_members_user_id_team_id', 'team_members', ['user_id', 'team_id'], None),
+    # Reminders still to send; mark_reminder_sent clears reminder_time
+    ('ix_tasks_pending_reminders', 'tasks', ['reminder_time'], 'reminder_time IS NOT NULL'),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns, where in INDEXES:
+        existing_columns = {column['name'] for column in inspector.get_columns(table)}
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table)}
+        if name in existing_indexes or not set(columns) <= existing_columns:
+            continue
+        partial = {}
+        if where:
+            partial = {'sqlite_where': sa.text(where), 'postgresql_where': sa.text(where)}
+        op.create_index(name, table, columns, unique=False, **partial)
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns, where in reversed(INDEXES):
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
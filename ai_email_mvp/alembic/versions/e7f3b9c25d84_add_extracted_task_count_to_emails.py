@@ -0,0 +1,26 @@
+"""add_extracted_task_count_to_emails
+
+Revision ID: e7f3b9c25d84
+Revises: c4d2a8f61e35
+Create Date: 2026-10-17 13:42:09.512377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7f3b9c25d84'
+down_revision: Union[str, None] = 'c4d2a8f61e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('emails', sa.Column('extracted_task_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('emails', 'extracted_task_count')
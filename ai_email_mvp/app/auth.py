@@ -4,9 +4,9 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import crud, models
-from .database import get_db
+from .database import get_async_db
 import logging
 import os
 from dotenv import load_dotenv
@@ -85,7 +85,7 @@ def verify_token(token: str) -> Optional[str]:
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Optional[models.User]:
     """Get the current user from a JWT token."""
     logger.info("=== Validating user token ===")
@@ -114,14 +114,14 @@ async def get_current_user(
         logger.info(f"Token verified for email: {email}")
             
         # Get user from database
-        user = crud.get_user_by_email(db, email)
+        user = await crud.get_user_by_email(db, email)
         if user is None:
             # If user doesn't exist, create them
             logger.info(f"User not found for email: {email}, creating new user")
             user = models.User(email=email)
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             
         logger.info("=== Token validation successful ===")
         return user
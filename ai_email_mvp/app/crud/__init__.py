@@ -2,34 +2,61 @@ from app.crud.user import (
     get_user,
     get_user_by_email,
     get_users,
+    get_or_create_users_by_email,
     create_user,
     update_user
 )
 from app.crud.team import (
+    user_team_ids,
     create_team,
     get_team,
+    get_team_with_members,
     get_user_teams,
     add_team_member,
+    update_team,
     create_task,
     update_task,
     get_user_tasks,
     get_team_tasks,
     get_task_history
 )
+from app.crud.email import create_email, record_extraction_outcome
+from app.crud.task import (
+    create_tasks_bulk,
+    get_tasks_by_ids,
+    get_task,
+    filter_tasks,
+    analytics_filters,
+    get_task_metrics,
+    get_team_performance
+)
 
 __all__ = [
     'get_user',
     'get_user_by_email',
     'get_users',
+    'get_or_create_users_by_email',
     'create_user',
     'update_user',
+    'user_team_ids',
     'create_team',
     'get_team',
+    'get_team_with_members',
     'get_user_teams',
     'add_team_member',
+    'update_team',
     'create_task',
     'update_task',
     'get_user_tasks',
     'get_team_tasks',
-    'get_task_history'
+    'get_task_history',
+    'create_email',
+    'record_extraction_outcome',
+    'create_tasks_bulk',
+    'get_tasks_by_ids',
+    'get_task',
+    'filter_tasks',
+    'analytics_filters',
+    'get_task_metrics',
+    'get_team_performance'
 ]
\ No newline at end of file
@@ -0,0 +1,53 @@
+import logging
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.email import Email
+from app.schemas import EmailCreate
+
+logger = logging.getLogger(__name__)
+
+# The extraction pipeline runs on sync sessions, alongside the extraction
+# cache, thread state and job queue, so these functions are sync too. Async
+# callers run them through run_in_threadpool to keep the event loop free.
+
+def create_email(db: Session, email: EmailCreate, user_id: int) -> Email:
+    """Create a new email, or update the stored one with the same gmail_id"""
+    email_data = email.model_dump(exclude={'user_id'})
+    try:
+        db_email = db.scalar(select(Email).where(Email.gmail_id == email.gmail_id))
+        if db_email is None:
+            db_email = Email(**email_data, user_id=user_id)
+            db.add(db_email)
+            try:
+                db.commit()
+            except IntegrityError:
+                # A concurrent request inserted the same gmail_id first; update that row
+                db.rollback()
+                db_email = db.scalars(select(Email).where(Email.gmail_id == email.gmail_id)).one()
+                for key, value in email_data.items():
+                    setattr(db_email, key, value)
+                db.commit()
+        else:
+            for key, value in email_data.items():
+                setattr(db_email, key, value)
+            db.commit()
+        db.refresh(db_email)
+        return db_email
+    except Exception:
+        db.rollback()
+        raise
+
+def record_extraction_outcome(db: Session, email_id: int, task_count: int) -> None:
+    """Store how many tasks extraction found in an email, to train the pre-classifier"""
+    try:
+        db.execute(
+            update(Email).where(Email.id == email_id).values(extracted_task_count=task_count),
+            execution_options={"synchronize_session": False}
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recording extraction outcome for email {email_id}: {e}")
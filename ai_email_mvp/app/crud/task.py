@@ -1,23 +1,30 @@
+from sqlalchemy import Float, and_, case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from datetime import datetime
-from typing import List, Optional
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.functions import FunctionElement
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional, Union
 
+from app.crud.team import user_team_ids
 from app.models.task import Task, TaskHistory
 from app.models.user import User
+from app.schemas import TaskCreate as ExtractedTask
 from app.schemas import task as task_schema
 
-def create_task(db: Session, task: task_schema.TaskCreate) -> Task:
+async def create_task(db: AsyncSession, task: task_schema.TaskCreate) -> Task:
     """Create a new task"""
     # Get creator by email
-    creator = db.query(User).filter(User.email == task.created_by).first()
+    creator = await db.scalar(select(User).where(User.email == task.created_by))
     if not creator:
         return None
     
     # Get assignee by email if provided
     assignee_id = None
     if task.assigned_to:
-        assignee = db.query(User).filter(User.email == task.assigned_to).first()
+        assignee = await db.scalar(select(User).where(User.email == task.assigned_to))
         if assignee:
             assignee_id = assignee.id
     
@@ -33,32 +40,86 @@ def create_task(db: Session, task: task_schema.TaskCreate) -> Task:
     )
     
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
     return db_task
 
-def get_task(db: Session, task_id: int) -> Optional[Task]:
+# Sync, for the extraction pipeline (see app/crud/email.py)
+
+def create_tasks_bulk(db: Session, tasks: List[ExtractedTask], user_id: int) -> List[int]:
+    """Create the tasks extracted from emails in a single transaction and return their IDs.
+
+    A task whose title matches one already stored for the same email is not
+    inserted again; the stored task's ID is returned in its place.
+    """
+    email_ids = {task.email_id for task in tasks if task.email_id is not None}
+    existing = {}
+    if email_ids:
+        for db_task in db.scalars(select(Task).where(Task.email_id.in_(email_ids))):
+            existing.setdefault((db_task.email_id, db_task.title.strip().lower()), db_task)
+
+    db_tasks, new_tasks = [], []
+    for task in tasks:
+        key = (task.email_id, task.title.strip().lower())
+        if task.email_id is not None and key in existing:
+            db_tasks.append(existing[key])
+            continue
+        db_task = Task(
+            title=task.title,
+            description=task.description,
+            priority=getattr(task.priority, "value", task.priority),
+            deadline=task.due_date,
+            created_by=user_id,
+            email_id=task.email_id,
+            status="pending"
+        )
+        existing[key] = db_task
+        db_tasks.append(db_task)
+        new_tasks.append(db_task)
+
+    if not new_tasks:
+        return [db_task.id for db_task in db_tasks]
+    db.add_all(new_tasks)
+    try:
+        db.flush()
+        # Read the IDs before commit expires the tasks; afterwards each one
+        # would cost a SELECT
+        task_ids = [db_task.id for db_task in db_tasks]
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return task_ids
+
+def get_tasks_by_ids(db: Session, task_ids: List[int]) -> List[Task]:
+    """Get tasks by ID, in the order the IDs were given"""
+    if not task_ids:
+        return []
+    tasks = {task.id: task for task in db.scalars(select(Task).where(Task.id.in_(task_ids)))}
+    return [tasks[task_id] for task_id in task_ids if task_id in tasks]
+
+async def get_task(db: AsyncSession, task_id: int) -> Optional[Task]:
     """Get a task by ID"""
-    return db.query(Task).filter(Task.id == task_id).first()
+    return await db.get(Task, task_id)
 
-def get_user_tasks(db: Session, user_email: str) -> List[Task]:
+async def get_user_tasks(db: AsyncSession, user_email: str) -> List[Task]:
     """Get all tasks for a user"""
-    user = db.query(User).filter(User.email == user_email).first()
+    user = await db.scalar(select(User).where(User.email == user_email))
     if not user:
         return []
     
-    return db.query(Task).filter(
+    return (await db.scalars(select(Task).where(
         or_(Task.created_by == user.id, Task.assigned_to == user.id)
-    ).all()
+    ))).all()
 
-def update_task(db: Session, task_id: int, task: task_schema.TaskUpdate) -> Optional[Task]:
+async def update_task(db: AsyncSession, task_id: int, task: task_schema.TaskUpdate) -> Optional[Task]:
     """Update a task"""
-    db_task = get_task(db, task_id)
+    db_task = await get_task(db, task_id)
     if not db_task:
         return None
     
     # Get updater by email
-    updater = db.query(User).filter(User.email == task.updated_by).first()
+    updater = await db.scalar(select(User).where(User.email == task.updated_by))
     if not updater:
         return None
     
@@ -81,30 +142,30 @@ def update_task(db: Session, task_id: int, task: task_schema.TaskUpdate) -> Opti
     )
     db.add(history)
     
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
     return db_task
 
-def get_task_history(db: Session, task_id: int) -> List[TaskHistory]:
+async def get_task_history(db: AsyncSession, task_id: int) -> List[TaskHistory]:
     """Get history for a task"""
-    return db.query(TaskHistory).filter(TaskHistory.task_id == task_id).all()
+    return (await db.scalars(select(TaskHistory).where(TaskHistory.task_id == task_id))).all()
 
-def get_task_analytics(db: Session, user_email: str):
+async def get_task_analytics(db: AsyncSession, user_email: str):
     """Get task analytics for a user"""
-    user = db.query(User).filter(User.email == user_email).first()
+    user = await db.scalar(select(User).where(User.email == user_email))
     if not user:
         return None
     
-    total_tasks = db.query(Task).filter(
+    total_tasks = await db.scalar(select(func.count(Task.id)).where(
         or_(Task.created_by == user.id, Task.assigned_to == user.id)
-    ).count()
+    ))
     
-    completed_tasks = db.query(Task).filter(
+    completed_tasks = await db.scalar(select(func.count(Task.id)).where(
         and_(
             or_(Task.created_by == user.id, Task.assigned_to == user.id),
             Task.status == "completed"
         )
-    ).count()
+    ))
     
     return {
         "total_tasks": total_tasks,
@@ -112,32 +173,163 @@ def get_task_analytics(db: Session, user_email: str):
         "completion_rate": completed_tasks / total_tasks if total_tasks > 0 else 0
     }
 
-def get_upcoming_tasks(db: Session, user_email: str, days: int = 7) -> List[Task]:
+async def get_upcoming_tasks(db: AsyncSession, user_email: str, days: int = 7) -> List[Task]:
     """Get upcoming tasks for a user"""
-    user = db.query(User).filter(User.email == user_email).first()
+    user = await db.scalar(select(User).where(User.email == user_email))
     if not user:
         return []
     
     deadline = datetime.now() + timedelta(days=days)
-    return db.query(Task).filter(
+    return (await db.scalars(select(Task).where(
         and_(
             or_(Task.created_by == user.id, Task.assigned_to == user.id),
             Task.deadline <= deadline,
             Task.status != "completed"
         )
-    ).all()
+    ))).all()
 
-def get_overdue_tasks(db: Session, user_email: str) -> List[Task]:
+async def get_overdue_tasks(db: AsyncSession, user_email: str) -> List[Task]:
     """Get overdue tasks for a user"""
-    user = db.query(User).filter(User.email == user_email).first()
+    user = await db.scalar(select(User).where(User.email == user_email))
     if not user:
         return []
     
     now = datetime.now()
-    return db.query(Task).filter(
+    return (await db.scalars(select(Task).where(
         and_(
             or_(Task.created_by == user.id, Task.assigned_to == user.id),
             Task.deadline < now,
             Task.status != "completed"
         )
-    ).all()
+    ))).all()
+
+def filter_tasks_query(
+    user_id: int,
+    status: Optional[Union[str, List[str]]] = None,
+    priority: Optional[Union[int, List[str]]] = None,
+    team_id: Optional[int] = None,
+    assigned_to: Optional[int] = None,
+    due_before: Optional[datetime] = None,
+    due_after: Optional[datetime] = None,
+    search: Optional[str] = None
+) -> Select:
+    """Query for the tasks a user created, is assigned or can see through a team, narrowed by the given filters.
+
+    ``status`` and ``priority`` also accept a list of values to match any of.
+    """
+    query = select(Task).where(
+        or_(
+            Task.created_by == user_id,
+            Task.assigned_to == user_id,
+            Task.team_id.in_(user_team_ids(user_id))
+        )
+    )
+
+    if status:
+        query = query.where(Task.status.in_(status) if isinstance(status, list) else Task.status == status)
+    if priority:
+        query = query.where(Task.priority.in_(priority) if isinstance(priority, list) else Task.priority == priority)
+    if team_id:
+        query = query.where(Task.team_id == team_id)
+    if assigned_to:
+        query = query.where(Task.assigned_to == assigned_to)
+    if due_before:
+        query = query.where(Task.deadline <= due_before)
+    if due_after:
+        query = query.where(Task.deadline >= due_after)
+    if search:
+        search_term = f"%{search}%"
+        query = query.where(
+            or_(
+                Task.title.ilike(search_term),
+                Task.description.ilike(search_term)
+            )
+        )
+
+    # Order by deadline and priority
+    return query.order_by(Task.deadline.asc(), Task.priority.asc())
+
+async def filter_tasks(db: AsyncSession, user_id: int, **filters) -> List[Task]:
+    """Get the tasks a user can see, narrowed by the filters of ``filter_tasks_query``"""
+    return (await db.scalars(filter_tasks_query(user_id, **filters))).all()
+
+class seconds_between(FunctionElement):
+    """Seconds from one timestamp column to another, in the database's own date arithmetic"""
+    type = Float()
+    name = "seconds_between"
+    inherit_cache = True
+
+@compiles(seconds_between)
+def _seconds_between(element, compiler, **kw):
+    start, end = element.clauses
+    return f"EXTRACT(EPOCH FROM ({compiler.process(end, **kw)} - {compiler.process(start, **kw)}))"
+
+@compiles(seconds_between, "sqlite")
+def _seconds_between_sqlite(element, compiler, **kw):
+    start, end = element.clauses
+    return f"(julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)})) * 86400"
+
+def analytics_filters(
+    user_id: int,
+    team_id: Optional[int],
+    start_date: datetime,
+    end_date: datetime
+) -> list:
+    """Filters for the tasks in a team, or those a user can see, created in the given period"""
+    if team_id:
+        scope = Task.team_id == team_id
+    else:
+        scope = or_(
+            Task.created_by == user_id,
+            Task.assigned_to == user_id,
+            Task.team_id.in_(user_team_ids(user_id))
+        )
+    return [scope, Task.created_at >= start_date, Task.created_at <= end_date]
+
+async def get_task_metrics(db: AsyncSession, filters: list, now: datetime) -> dict:
+    """Counts, completion time and distributions of the tasks matching the filters.
+
+    One scan grouped by priority and status computes every metric per group;
+    the groups (a handful) are then summed up here.
+    """
+    completed = Task.status == "completed"
+    completion_seconds = case((completed, seconds_between(Task.created_at, Task.completion_date)))
+    rows = (await db.execute(select(
+        Task.priority,
+        Task.status,
+        func.count(Task.id),
+        func.count(case((and_(~completed, Task.deadline < now), 1))),
+        func.count(case((and_(completed, Task.completion_date <= Task.deadline), 1))),
+        func.sum(completion_seconds),
+        func.count(completion_seconds)
+    ).where(*filters).group_by(Task.priority, Task.status))).all()
+
+    metrics = {"total_tasks": 0, "completed_tasks": 0, "overdue_tasks": 0, "on_time_completions": 0}
+    priority_distribution = defaultdict(int)
+    status_distribution = defaultdict(int)
+    total_seconds, timed_tasks = 0.0, 0
+    for priority, task_status, count, overdue, on_time, seconds, timed in rows:
+        metrics["total_tasks"] += count
+        if task_status == "completed":
+            metrics["completed_tasks"] += count
+        metrics["overdue_tasks"] += overdue
+        metrics["on_time_completions"] += on_time
+        total_seconds += seconds or 0
+        timed_tasks += timed
+        priority_distribution[priority] += count
+        status_distribution[task_status] += count
+
+    metrics["avg_completion_seconds"] = total_seconds / timed_tasks if timed_tasks else None
+    metrics["priority_distribution"] = dict(priority_distribution)
+    metrics["status_distribution"] = dict(status_distribution)
+    return metrics
+
+async def get_team_performance(db: AsyncSession, filters: list) -> list:
+    """Task totals, completions and average completion seconds per assignee, in one grouped query"""
+    completed = Task.status == "completed"
+    return (await db.execute(select(
+        Task.assigned_to,
+        func.count(Task.id).label("total_tasks"),
+        func.count(case((completed, 1))).label("completed_tasks"),
+        func.avg(case((completed, seconds_between(Task.created_at, Task.completion_date)))).label("avg_completion_seconds")
+    ).where(*filters).group_by(Task.assigned_to))).all()
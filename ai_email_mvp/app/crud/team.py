@@ -1,14 +1,20 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.sql import Select
 from datetime import datetime
 from typing import List, Optional
 
 from app.models.team import Team, TeamMember
 from app.models.task import Task, TaskHistory
 from app.schemas import team as team_schema
-from app.schemas.task import TaskCreate, TaskUpdate, TaskHistoryCreate
+from app.schemas.task import TaskCreate, TaskUpdate
 
-def create_team(db: Session, team: team_schema.TeamCreate, creator_id: int) -> Team:
+def user_team_ids(user_id: int) -> Select:
+    """Subquery of the ids of the teams a user belongs to"""
+    return select(TeamMember.team_id).where(TeamMember.user_id == user_id)
+
+async def create_team(db: AsyncSession, team: team_schema.TeamCreate, creator_id: int) -> Team:
     """Create a new team"""
     db_team = Team(
         name=team.name,
@@ -16,33 +22,49 @@ def create_team(db: Session, team: team_schema.TeamCreate, creator_id: int) -> T
         created_by=creator_id
     )
     db.add(db_team)
-    db.commit()
-    db.refresh(db_team)
+    await db.commit()
+    await db.refresh(db_team)
     return db_team
 
-def get_team(db: Session, team_id: int) -> Optional[Team]:
+async def get_team(db: AsyncSession, team_id: int) -> Optional[Team]:
     """Get a team by ID"""
-    return db.query(Team).filter(Team.id == team_id).first()
+    return await db.get(Team, team_id)
+
+# Loads team.members and each member.user with the team: one extra query for
+# all members of all teams, instead of one per team plus one per member
+TEAM_MEMBERS = selectinload(Team.members).joinedload(TeamMember.user)
+
+async def get_team_with_members(db: AsyncSession, team_id: int) -> Optional[Team]:
+    """Get a team by ID with its members and their users loaded"""
+    return await db.scalar(
+        select(Team)
+        .options(TEAM_MEMBERS)
+        .where(Team.id == team_id)
+        .execution_options(populate_existing=True)
+    )
 
-def get_user_teams(db: Session, user_id: int) -> List[Team]:
-    """Get all teams for a user"""
-    return db.query(Team).join(TeamMember).filter(TeamMember.user_id == user_id).all()
+async def get_user_teams(db: AsyncSession, user_id: int, with_members: bool = False) -> List[Team]:
+    """Get all teams for a user, optionally with their members and users loaded"""
+    query = select(Team).join(TeamMember).where(TeamMember.user_id == user_id)
+    if with_members:
+        query = query.options(TEAM_MEMBERS)
+    return (await db.scalars(query)).all()
 
-def add_team_member(db: Session, team_id: int, user_id: int, role: str) -> bool:
+async def add_team_member(db: AsyncSession, team_id: int, user_id: int, role: str) -> bool:
     """Add a member to a team"""
     # Check if already a member
-    existing = db.query(TeamMember).filter(
+    existing = await db.scalar(select(TeamMember).where(
         and_(TeamMember.team_id == team_id, TeamMember.user_id == user_id)
-    ).first()
+    ))
     if existing:
         return False
     
     member = TeamMember(team_id=team_id, user_id=user_id, role=role)
     db.add(member)
-    db.commit()
+    await db.commit()
     return True
 
-def create_task(db: Session, task: TaskCreate, user_id: int) -> Task:
+async def create_task(db: AsyncSession, task: TaskCreate, user_id: int) -> Task:
     db_task = Task(
         title=task.title,
         description=task.description,
@@ -56,23 +78,28 @@ def create_task(db: Session, task: TaskCreate, user_id: int) -> Task:
         deadline=task.deadline
     )
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
     return db_task
 
-def update_task(db: Session, task_id: int, task_update: TaskUpdate, user_id: int) -> Optional[Task]:
-    db_task = db.query(Task).filter(Task.id == task_id).first()
+async def update_task(
+    db: AsyncSession,
+    task_id: int,
+    task_update: TaskUpdate,
+    user_id: Optional[int] = None
+) -> Optional[Task]:
+    db_task = await db.get(Task, task_id)
     if not db_task:
         return None
 
     # Track status change
-    if task_update.status and task_update.status != db_task.status:
+    new_status = getattr(task_update.status, "value", task_update.status)
+    if new_status and new_status != db_task.status:
         history = TaskHistory(
             task_id=task_id,
-            changed_by=user_id,
-            old_status=db_task.status,
-            new_status=task_update.status,
-            notes=task_update.notes
+            user_id=user_id,
+            action="status_changed",
+            details=f"{db_task.status} -> {new_status}"
         )
         db.add(history)
 
@@ -83,53 +110,53 @@ def update_task(db: Session, task_id: int, task_update: TaskUpdate, user_id: int
     if task_update.status == "completed":
         db_task.completion_date = datetime.utcnow()
     
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
     return db_task
 
-def get_user_tasks(
-    db: Session,
+async def get_user_tasks(
+    db: AsyncSession,
     user_id: int,
     status: Optional[str] = None,
     team_id: Optional[int] = None
 ) -> List[Task]:
-    query = db.query(Task).filter(
+    query = select(Task).where(
         Task.assigned_to == user_id
     )
     
     if status:
-        query = query.filter(Task.status == status)
+        query = query.where(Task.status == status)
     if team_id:
-        query = query.filter(Task.team_id == team_id)
+        query = query.where(Task.team_id == team_id)
         
-    return query.order_by(Task.deadline).all()
+    return (await db.scalars(query.order_by(Task.deadline))).all()
 
-def get_team_tasks(
-    db: Session,
+async def get_team_tasks(
+    db: AsyncSession,
     team_id: int,
     status: Optional[str] = None
 ) -> List[Task]:
-    query = db.query(Task).filter(Task.team_id == team_id)
+    query = select(Task).where(Task.team_id == team_id)
     
     if status:
-        query = query.filter(Task.status == status)
+        query = query.where(Task.status == status)
         
-    return query.order_by(Task.deadline).all()
+    return (await db.scalars(query.order_by(Task.deadline))).all()
 
-def get_task_history(db: Session, task_id: int) -> List[TaskHistory]:
-    return db.query(TaskHistory).filter(
+async def get_task_history(db: AsyncSession, task_id: int) -> List[TaskHistory]:
+    return (await db.scalars(select(TaskHistory).where(
         TaskHistory.task_id == task_id
-    ).order_by(TaskHistory.timestamp.desc()).all()
+    ).order_by(TaskHistory.timestamp.desc()))).all()
 
-def update_team(db: Session, team_id: int, team: team_schema.TeamUpdate) -> Optional[Team]:
+async def update_team(db: AsyncSession, team_id: int, team: team_schema.TeamUpdate) -> Optional[Team]:
     """Update a team"""
-    db_team = get_team(db, team_id)
+    db_team = await get_team(db, team_id)
     if not db_team:
         return None
     
     for field, value in team.dict(exclude_unset=True).items():
         setattr(db_team, field, value)
     
-    db.commit()
-    db.refresh(db_team)
+    await db.commit()
+    await db.refresh(db_team)
     return db_team
@@ -1,35 +1,53 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User  # Import directly from module
 from app.schemas.user import UserCreate, UserUpdate
-from typing import Optional, List
+from typing import Dict, Optional, List
 
-def get_user(db: Session, user_id: int) -> Optional[User]:
-    return db.query(User).filter(User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    return await db.scalar(select(User).where(User.email == email))
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    return db.query(User).offset(skip).limit(limit).all()
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
+    return (await db.scalars(select(User).offset(skip).limit(limit))).all()
 
-def create_user(db: Session, user: UserCreate) -> User:
+async def get_or_create_users_by_email(db: AsyncSession, emails: List[str]) -> Dict[str, User]:
+    """Map each email to its user, creating placeholder users for unknown emails, in one query"""
+    users = {
+        user.email: user
+        for user in await db.scalars(select(User).where(User.email.in_(set(emails))))
+    }
+    new_users = [
+        User(email=email, oauth_token="", refresh_token=None, token_expiry=None)
+        for email in dict.fromkeys(emails) if email not in users
+    ]
+    if new_users:
+        db.add_all(new_users)
+        await db.flush()
+        users.update((user.email, user) for user in new_users)
+    return users
+
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
     db_user = User(
         email=user.email,
-        name=user.name
+        oauth_token=user.oauth_token,
+        refresh_token=user.refresh_token
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def update_user(db: Session, user_id: int, user: UserUpdate) -> Optional[User]:
-    db_user = get_user(db, user_id)
+async def update_user(db: AsyncSession, user_id: int, user: UserUpdate) -> Optional[User]:
+    db_user = await get_user(db, user_id)
     if not db_user:
         return None
     
     for field, value in user.dict(exclude_unset=True).items():
         setattr(db_user, field, value)
     
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
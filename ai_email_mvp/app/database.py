@@ -1,18 +1,90 @@
-from sqlalchemy import create_engine
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import logging
 
+# Load environment variables
+load_dotenv()
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./app.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+
+# Connection pool for Postgres (and other server databases). Size it so that
+# workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays under max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", 30))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+
+# SQLite tuning. WAL lets readers run alongside the single writer, and writers
+# wait up to the busy timeout for the lock instead of failing with
+# "database is locked".
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 10000))
+SQLITE_MMAP_SIZE_BYTES = int(os.getenv("SQLITE_MMAP_SIZE_BYTES", 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+
+# Async drivers for the routers, so their queries don't block the event loop
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_database_url(url: str) -> str:
+    """The same database URL with its backend's async driver."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection (WAL only takes effect for file databases)."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # With WAL, NORMAL only syncs at checkpoints: still safe against corruption,
+    # and a power loss can only drop the last commits
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_BYTES}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")  # Negative means KiB, not pages
+    cursor.close()
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def engine_options(url: str) -> dict:
+    """Keyword arguments for create_engine/create_async_engine for this database."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    # The default QueuePool, sized, and checking connections before use so a
+    # restarted or failed-over database doesn't surface as request errors
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": True,
+    }
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL) -> Engine:
+    engine = create_engine(url, **engine_options(url))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+def create_async_db_engine(url: str = SQLALCHEMY_DATABASE_URL) -> AsyncEngine:
+    engine = create_async_engine(async_database_url(url), **engine_options(url))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+    return engine
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine()
+# Objects stay loaded after commit; an async session can't lazily reload them
+# while FastAPI serializes the response
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -27,6 +99,16 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Get an async database session."""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {str(e)}")
+            await db.rollback()
+            raise
+
 def init_db():
     from . import models  # Import models here to avoid circular imports
     Base.metadata.drop_all(bind=engine)  # Drop all tables
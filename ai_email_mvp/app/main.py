@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routers import team, task, users
+from app.utils.query_counter import QueryCountMiddleware
 
 app = FastAPI(title="Gmail Assistant API")
 
@@ -13,6 +14,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Report each request's SQL query count in the X-Query-Count header
+app.add_middleware(QueryCountMiddleware)
 
 # Include routers
 app.include_router(team.router)
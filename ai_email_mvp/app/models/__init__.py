@@ -1,5 +1,10 @@
 from app.models.user import User
+from app.models.email import Email
 from app.models.team import Team, TeamMember
 from app.models.task import Task, TaskHistory
+from app.models.llm_cache import ExtractionCache
+from app.models.llm_usage import LLMUsage
+from app.models.thread_state import ThreadState
+from app.models.job import Job
 
-__all__ = ['User', 'Team', 'TeamMember', 'Task', 'TaskHistory']
\ No newline at end of file
+__all__ = ['User', 'Email', 'Team', 'TeamMember', 'Task', 'TaskHistory', 'ExtractionCache', 'LLMUsage', 'ThreadState', 'Job']
\ No newline at end of file
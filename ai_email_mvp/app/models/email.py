@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy.sql import func
+from app.database import Base
+
+class Email(Base):
+    __tablename__ = "emails"
+
+    id = Column(Integer, primary_key=True, index=True)
+    gmail_id = Column(String, unique=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    subject = Column(String)
+    sender = Column(String)
+    content = Column(Text)
+    thread_id = Column(String, index=True)
+    received_at = Column(DateTime)
+    created_at = Column(DateTime, server_default=func.now())
+    suggested_reply = Column(Text, nullable=True)
+    extracted_task_count = Column(Integer, nullable=True)  # Tasks the LLM found; labels the pre-classifier
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class Job(Base):  # Background work item, stored so queued work survives restarts
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # Selects the handler, e.g. extract
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded or failed
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    idempotency_key = Column(String, unique=True, index=True, nullable=True)  # Same key, same job
+    run_after = Column(DateTime(timezone=True), nullable=False)  # Delays retries
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)  # A running job past this was abandoned
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
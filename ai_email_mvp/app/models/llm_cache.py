@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ExtractionCache(Base):
+    __tablename__ = "extraction_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)  # sha256 of kind, model, prompt version and content
+    kind = Column(String, nullable=False)  # extraction, summary, ...
+    model = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    result = Column(JSON, nullable=False)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_accessed_at = Column(DateTime(timezone=True), index=True)  # Used for LRU eviction
+    expires_at = Column(DateTime(timezone=True), index=True)  # Used for TTL eviction
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class LLMUsage(Base):  # Daily token usage and cost per user and model
+    __tablename__ = "llm_usage"
+    __table_args__ = (UniqueConstraint("user_id", "day", "model", name="uq_llm_usage_user_day_model"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    day = Column(Date, nullable=False, index=True)
+    model = Column(String, nullable=False)
+    calls = Column(Integer, default=0)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    cost_usd = Column(Float, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
 class Task(Base):
     __tablename__ = "tasks"
+    # One per branch of the "created, assigned or in my team" filter, so each
+    # branch is an index search narrowed by status and ordered by deadline
+    __table_args__ = (
+        Index("ix_tasks_created_by_status_deadline", "created_by", "status", "deadline"),
+        Index("ix_tasks_assigned_to_status_deadline", "assigned_to", "status", "deadline"),
+        Index("ix_tasks_team_id_status_deadline", "team_id", "status", "deadline"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -14,6 +21,7 @@ class Task(Base):
     created_by = Column(Integer, ForeignKey("users.id"))
     assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
     team_id = Column(Integer, ForeignKey("teams.id"), nullable=True)
+    email_id = Column(Integer, ForeignKey("emails.id"), nullable=True)  # Email the task was extracted from
     deadline = Column(DateTime(timezone=True), nullable=True)
     completion_date = Column(DateTime(timezone=True), nullable=True)
     calendar_event_id = Column(String, nullable=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ThreadState(Base):
+    __tablename__ = "thread_states"
+    __table_args__ = (UniqueConstraint("user_id", "thread_id", name="uq_thread_states_user_thread"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    thread_id = Column(String, index=True, nullable=False)
+    messages = Column(JSON, default=dict)  # gmail_id -> extraction result for that message
+    known_tasks = Column(JSON, default=list)  # Merged tasks extracted so far in the thread
+    seen_hashes = Column(JSON, default=list)  # Hashes of sentences already sent to the LLM
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -7,7 +7,7 @@ import json
 import logging
 import requests
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import crud, models, schemas, auth
 
 # Configure logging
@@ -61,7 +61,7 @@ def get_oauth_url(redirect_uri: str):
         logger.error(f"Error creating OAuth URL: {e}")
         raise
 
-async def handle_oauth_callback(oauth_token: str, db: Session):
+async def handle_oauth_callback(oauth_token: str, db: AsyncSession):
     """Handle the OAuth callback with access token."""
     try:
         logger.info("Starting OAuth callback handler")
@@ -108,9 +108,9 @@ async def handle_oauth_callback(oauth_token: str, db: Session):
             oauth_token=oauth_token
         )
         
-        db_user = crud.get_user_by_email(db, email=user_info['email'])
+        db_user = await crud.get_user_by_email(db, email=user_info['email'])
         if not db_user:
-            db_user = crud.create_user(db, user=user_create)
+            db_user = await crud.create_user(db, user=user_create)
         
         logger.info("Creating access token")
         # Create access token
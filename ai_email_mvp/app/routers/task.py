@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, timedelta
-from app.database import get_db
+from app.database import get_async_db
+from app.models.task import Task as TaskModel
 from app.schemas.task import Task, TaskCreate, TaskUpdate, TaskHistory
 from app import crud
-from sqlalchemy import func, or_, case
+from sqlalchemy import or_, select
 from sqlalchemy.exc import SQLAlchemyError
 from app.services.google_calendar import GoogleCalendarClient
 from app.services.gmail_notifier import GmailNotifier
@@ -22,11 +23,11 @@ def get_gmail_notifier():
 async def create_task(
     task: TaskCreate,
     email: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new task"""
     # Get creator by email
-    creator = crud.get_user_by_email(db, email)
+    creator = await crud.get_user_by_email(db, email)
     if not creator:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -36,7 +37,7 @@ async def create_task(
     # Get assignee by email if provided
     assignee_id = None
     if task.assigned_to:
-        assignee = crud.get_user_by_email(db, task.assigned_to)
+        assignee = await crud.get_user_by_email(db, task.assigned_to)
         if not assignee:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -48,48 +49,48 @@ async def create_task(
     task_dict["created_by"] = creator.id
     task_dict["assigned_to"] = assignee_id
     
-    return crud.create_task(db, task_dict)
+    return await crud.create_task(db, task_dict)
 
 @router.get("/user/{email}", response_model=List[Task])
 async def get_user_tasks(
     email: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all tasks for a user"""
-    user = crud.get_user_by_email(db, email)
+    user = await crud.get_user_by_email(db, email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    return crud.get_user_tasks(db, user.id)
+    return await crud.get_user_tasks(db, user.id)
 
 @router.get("/{task_id}/history", response_model=List[TaskHistory])
 async def get_task_history(
     task_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get history for a task"""
-    task = crud.get_task(db, task_id)
+    task = await crud.get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
     
-    return crud.get_task_history(db, task_id)
+    return await crud.get_task_history(db, task_id)
 
 @router.put("/{task_id}", response_model=Task)
 async def update_task(
     task_id: int,
     task: TaskUpdate,
     email: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a task"""
     # Check if task exists
-    db_task = crud.get_task(db, task_id)
+    db_task = await crud.get_task(db, task_id)
     if not db_task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -97,7 +98,7 @@ async def update_task(
         )
     
     # Get user by email
-    user = crud.get_user_by_email(db, email)
+    user = await crud.get_user_by_email(db, email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -111,17 +112,17 @@ async def update_task(
             detail="Not authorized to update task"
         )
     
-    return crud.update_task(db, task_id, task, user.id)
+    return await crud.update_task(db, task_id, task, user.id)
 
 @router.put("/{task_id}/complete", response_model=Task)
 async def complete_task(
     task_id: int,
     email: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Complete a task"""
     # Check if task exists
-    task = crud.get_task(db, task_id)
+    task = await crud.get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -129,7 +130,7 @@ async def complete_task(
         )
     
     # Get user by email
-    user = crud.get_user_by_email(db, email)
+    user = await crud.get_user_by_email(db, email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -146,63 +147,18 @@ async def complete_task(
     task.status = "completed"
     task.completion_date = datetime.now()
     
-    return crud.update_task(db, task_id, task, user.id)
-
-@router.get("/analytics", response_model=dict)
-async def get_task_analytics(
-    email: str,
-    db: Session = Depends(get_db)
-):
-    """Get task analytics for a user"""
-    user = crud.get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    return crud.get_task_analytics(db, user.id)
-
-@router.get("/upcoming", response_model=List[Task])
-async def get_upcoming_tasks(
-    email: str,
-    db: Session = Depends(get_db)
-):
-    """Get upcoming tasks for a user"""
-    user = crud.get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    return crud.get_upcoming_tasks(db, user.id)
-
-@router.get("/overdue", response_model=List[Task])
-async def get_overdue_tasks(
-    email: str,
-    db: Session = Depends(get_db)
-):
-    """Get overdue tasks for a user"""
-    user = crud.get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    return crud.get_overdue_tasks(db, user.id)
+    return await crud.update_task(db, task_id, task, user.id)
 
 @router.post("/{task_id}/reminder", response_model=dict)
 async def set_task_reminder(
     task_id: int,
     email: str,
     reminder_time: datetime,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Set a reminder for a task"""
     # Check if task exists
-    task = crud.get_task(db, task_id)
+    task = await crud.get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -210,7 +166,7 @@ async def set_task_reminder(
         )
     
     # Get user by email
-    user = crud.get_user_by_email(db, email)
+    user = await crud.get_user_by_email(db, email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -224,22 +180,7 @@ async def set_task_reminder(
             detail="Not authorized to set reminder"
         )
     
-    return crud.set_task_reminder(db, task_id, user.id, reminder_time)
-
-@router.get("/reminders", response_model=List[dict])
-async def get_task_reminders(
-    email: str,
-    db: Session = Depends(get_db)
-):
-    """Get all task reminders for a user"""
-    user = crud.get_user_by_email(db, email)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    return crud.get_task_reminders(db, user.id)
+    return await crud.set_task_reminder(db, task_id, user.id, reminder_time)
 
 @router.get("/filter", response_model=List[Task])
 async def filter_tasks(
@@ -251,63 +192,36 @@ async def filter_tasks(
     due_before: Optional[datetime] = None,
     due_after: Optional[datetime] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Filter tasks based on various criteria"""
     try:
-        user = crud.get_user_by_email(db, email)
+        user = await crud.get_user_by_email(db, email)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-        query = db.query(Task)
-
-        # Base filters
-        query = query.filter(
-            or_(
-                Task.created_by == user.id,
-                Task.assigned_to == user.id,
-                Task.team_id.in_(
-                    db.query(TeamMember.team_id)
-                    .filter(TeamMember.user_id == user.id)
-                    .subquery()
-                )
-            )
-        )
-
-        # Apply filters
-        if status:
-            query = query.filter(Task.status == status)
-        if priority:
-            query = query.filter(Task.priority == priority)
-        if team_id:
-            query = query.filter(Task.team_id == team_id)
+        assignee_id = None
         if assigned_to:
-            assignee = crud.get_user_by_email(db, assigned_to)
+            assignee = await crud.get_user_by_email(db, assigned_to)
             if not assignee:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Assignee not found"
                 )
-            query = query.filter(Task.assigned_to == assignee.id)
-        if due_before:
-            query = query.filter(Task.deadline <= due_before)
-        if due_after:
-            query = query.filter(Task.deadline >= due_after)
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Task.title.ilike(search_term),
-                    Task.description.ilike(search_term)
-                )
-            )
-
-        # Order by deadline and priority
-        query = query.order_by(Task.deadline.asc(), Task.priority.asc())
-
-        return query.all()
+            assignee_id = assignee.id
+
+        return await crud.filter_tasks(
+            db, user.id,
+            status=status,
+            priority=priority,
+            team_id=team_id,
+            assigned_to=assignee_id,
+            due_before=due_before,
+            due_after=due_after,
+            search=search
+        )
 
     except SQLAlchemyError as e:
         raise HTTPException(
@@ -321,11 +235,11 @@ async def get_task_analytics(
     team_id: Optional[int] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get task analytics and statistics"""
     try:
-        user = crud.get_user_by_email(db, email)
+        user = await crud.get_user_by_email(db, email)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -337,86 +251,19 @@ async def get_task_analytics(
         if not end_date:
             end_date = datetime.utcnow()
 
-        # Base query filters
-        base_filters = []
-        if team_id:
-            base_filters.append(Task.team_id == team_id)
-        else:
-            base_filters.append(
-                or_(
-                    Task.created_by == user.id,
-                    Task.assigned_to == user.id,
-                    Task.team_id.in_(
-                        db.query(TeamMember.team_id)
-                        .filter(TeamMember.user_id == user.id)
-                        .subquery()
-                    )
-                )
-            )
-        
-        base_filters.extend([
-            Task.created_at >= start_date,
-            Task.created_at <= end_date
-        ])
-
-        # Task completion rate
-        total_tasks = db.query(func.count(Task.id)).filter(*base_filters).scalar()
-        completed_tasks = db.query(func.count(Task.id)).filter(
-            Task.status == "completed",
-            *base_filters
-        ).scalar()
+        # Every metric comes from one grouped scan, and team performance from
+        # one more query, so the team subquery is only evaluated once or twice
+        filters = crud.analytics_filters(user.id, team_id, start_date, end_date)
+        metrics = await crud.get_task_metrics(db, filters, datetime.utcnow())
+        total_tasks = metrics["total_tasks"]
+        completed_tasks = metrics["completed_tasks"]
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-
-        # Average completion time
-        avg_completion_time = db.query(
-            func.avg(Task.completion_date - Task.created_at)
-        ).filter(
-            Task.status == "completed",
-            *base_filters
-        ).scalar()
-
-        # Tasks by priority
-        priority_distribution = db.query(
-            Task.priority,
-            func.count(Task.id)
-        ).filter(
-            *base_filters
-        ).group_by(Task.priority).all()
-
-        # Tasks by status
-        status_distribution = db.query(
-            Task.status,
-            func.count(Task.id)
-        ).filter(
-            *base_filters
-        ).group_by(Task.status).all()
-
-        # Overdue tasks
-        overdue_tasks = db.query(func.count(Task.id)).filter(
-            Task.deadline < datetime.utcnow(),
-            Task.status != "completed",
-            *base_filters
-        ).scalar()
-
-        # Tasks completed on time
-        on_time_tasks = db.query(func.count(Task.id)).filter(
-            Task.status == "completed",
-            Task.completion_date <= Task.deadline,
-            *base_filters
-        ).scalar()
+        avg_completion_seconds = metrics["avg_completion_seconds"]
 
         # Team member performance (if team_id provided)
         team_performance = None
         if team_id:
-            team_performance = db.query(
-                Task.assigned_to,
-                func.count(Task.id).label('total_tasks'),
-                func.sum(case([(Task.status == 'completed', 1)], else_=0)).label('completed_tasks'),
-                func.avg(case([(Task.status == 'completed', Task.completion_date - Task.created_at)], else_=None)).label('avg_completion_time')
-            ).filter(
-                Task.team_id == team_id,
-                *base_filters
-            ).group_by(Task.assigned_to).all()
+            team_performance = await crud.get_team_performance(db, filters)
 
         return {
             "period": {
@@ -427,13 +274,15 @@ async def get_task_analytics(
                 "total_tasks": total_tasks,
                 "completed_tasks": completed_tasks,
                 "completion_rate": round(completion_rate, 2),
-                "avg_completion_time": str(avg_completion_time) if avg_completion_time else None,
-                "overdue_tasks": overdue_tasks,
-                "on_time_completions": on_time_tasks
+                "avg_completion_time": (
+                    str(timedelta(seconds=avg_completion_seconds)) if avg_completion_seconds else None
+                ),
+                "overdue_tasks": metrics["overdue_tasks"],
+                "on_time_completions": metrics["on_time_completions"]
             },
             "distributions": {
-                "priority": {p: c for p, c in priority_distribution},
-                "status": {s: c for s, c in status_distribution}
+                "priority": metrics["priority_distribution"],
+                "status": metrics["status_distribution"]
             },
             "team_performance": [
                 {
@@ -441,9 +290,9 @@ async def get_task_analytics(
                     "total_tasks": total,
                     "completed_tasks": completed,
                     "completion_rate": round((completed / total * 100), 2) if total > 0 else 0,
-                    "avg_completion_time": str(avg_time) if avg_time else None
+                    "avg_completion_time": str(timedelta(seconds=avg_seconds)) if avg_seconds else None
                 }
-                for user_id, total, completed, avg_time in (team_performance or [])
+                for user_id, total, completed, avg_seconds in team_performance
             ] if team_performance else None
         }
 
@@ -457,11 +306,11 @@ async def get_task_analytics(
 async def get_upcoming_tasks(
     email: str,
     days: int = 7,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get upcoming tasks due within specified days"""
     try:
-        user = crud.get_user_by_email(db, email)
+        user = await crud.get_user_by_email(db, email)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -469,20 +318,16 @@ async def get_upcoming_tasks(
             )
         end_date = datetime.utcnow() + timedelta(days=days)
         
-        query = db.query(Task).filter(
-            Task.deadline <= end_date,
-            Task.status != "completed",
+        query = select(TaskModel).where(
+            TaskModel.deadline <= end_date,
+            TaskModel.status != "completed",
             or_(
-                Task.assigned_to == user.id,
-                Task.team_id.in_(
-                    db.query(TeamMember.team_id)
-                    .filter(TeamMember.user_id == user.id)
-                    .subquery()
-                )
+                TaskModel.assigned_to == user.id,
+                TaskModel.team_id.in_(crud.user_team_ids(user.id))
             )
-        ).order_by(Task.deadline.asc(), Task.priority.asc())
+        ).order_by(TaskModel.deadline.asc(), TaskModel.priority.asc())
 
-        return query.all()
+        return (await db.scalars(query)).all()
 
     except SQLAlchemyError as e:
         raise HTTPException(
@@ -493,30 +338,26 @@ async def get_upcoming_tasks(
 @router.get("/overdue", response_model=List[Task])
 async def get_overdue_tasks(
     email: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get overdue tasks"""
     try:
-        user = crud.get_user_by_email(db, email)
+        user = await crud.get_user_by_email(db, email)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-        query = db.query(Task).filter(
-            Task.deadline < datetime.utcnow(),
-            Task.status != "completed",
+        query = select(TaskModel).where(
+            TaskModel.deadline < datetime.utcnow(),
+            TaskModel.status != "completed",
             or_(
-                Task.assigned_to == user.id,
-                Task.team_id.in_(
-                    db.query(TeamMember.team_id)
-                    .filter(TeamMember.user_id == user.id)
-                    .subquery()
-                )
+                TaskModel.assigned_to == user.id,
+                TaskModel.team_id.in_(crud.user_team_ids(user.id))
             )
-        ).order_by(Task.deadline.asc(), Task.priority.asc())
+        ).order_by(TaskModel.deadline.asc(), TaskModel.priority.asc())
 
-        return query.all()
+        return (await db.scalars(query)).all()
 
     except SQLAlchemyError as e:
         raise HTTPException(
@@ -527,14 +368,14 @@ async def get_overdue_tasks(
 @router.get("/reminders", response_model=List[dict])
 async def get_task_reminders(
     email: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all task reminders for a user"""
-    user = crud.get_user_by_email(db, email)
+    user = await crud.get_user_by_email(db, email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    return crud.get_task_reminders(db, user.id)
+    return await crud.get_task_reminders(db, user.id)
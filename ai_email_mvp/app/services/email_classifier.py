@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models.email import Email
+from app.utils.email_cleaner import clean_email
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PRECLASSIFIER_ENABLED = os.getenv("PRECLASSIFIER_ENABLED", "true").lower() == "true"
+# Skip the LLM when the estimated chance of the email holding a task is below this
+PRECLASSIFIER_SKIP_THRESHOLD = float(os.getenv("PRECLASSIFIER_SKIP_THRESHOLD", 0.05))
+PRECLASSIFIER_RETRAIN_HOURS = int(os.getenv("PRECLASSIFIER_RETRAIN_HOURS", 24))
+PRECLASSIFIER_MAX_TRAINING_ROWS = int(os.getenv("PRECLASSIFIER_MAX_TRAINING_ROWS", 5000))
+PRECLASSIFIER_MIN_SAMPLES = 20  # Per class, before the model is trusted
+HEURISTIC_LOG_ODDS = -2.5  # Weight of each bulk-mail signal; two of them skip on their own
+MAX_MODEL_LOG_ODDS = 10.0  # Naive Bayes is overconfident on long texts
+MAX_CONTENT_CHARS = 20000
+MAX_TOKENS = 2000
+
+_WORD = re.compile(r"[a-z][a-z0-9']{2,19}")
+_NO_REPLY_SENDER = re.compile(
+    r"\b(?:no-?reply|do-?not-?reply|donotreply|notifications?|newsletters?|mailer-daemon|bounces?)"
+    r"(?:[+.-][\w.-]*)?@",
+    re.I
+)
+_UNSUBSCRIBE = re.compile(r"unsubscribe", re.I)
+_SENDER_DOMAIN = re.compile(r"@([\w.-]+)")
+
+
+def tokenize(text: str, sender: Optional[str] = None) -> List[str]:
+    """Split text into lowercase words, plus a token for the sender's domain."""
+    tokens = _WORD.findall(text.lower())[:MAX_TOKENS]
+    if sender:
+        match = _SENDER_DOMAIN.search(sender.lower())
+        if match:
+            tokens.append(f"from:{match.group(1)}")
+    return tokens
+
+
+class NaiveBayesClassifier:
+    """Multinomial Naive Bayes over word presence, labelling emails as actionable or not."""
+
+    def __init__(self):
+        self.word_counts = {True: Counter(), False: Counter()}
+        self.doc_counts = {True: 0, False: 0}
+        self.total_words = {True: 0, False: 0}
+        self.vocabulary = set()
+
+    def train(self, samples: Iterable[Tuple[List[str], bool]]) -> None:
+        for tokens, actionable in samples:
+            words = set(tokens)
+            self.word_counts[actionable].update(words)
+            self.total_words[actionable] += len(words)
+            self.doc_counts[actionable] += 1
+            self.vocabulary.update(words)
+
+    @property
+    def is_trained(self) -> bool:
+        return min(self.doc_counts.values()) >= PRECLASSIFIER_MIN_SAMPLES
+
+    def log_odds(self, tokens: List[str]) -> float:
+        """Log odds that an email with these tokens is actionable."""
+        vocabulary_size = len(self.vocabulary) or 1
+        score = math.log(self.doc_counts[True] + 1) - math.log(self.doc_counts[False] + 1)
+        for word in set(tokens):
+            if word not in self.vocabulary:
+                continue
+            score += (
+                math.log((self.word_counts[True][word] + 1) / (self.total_words[True] + vocabulary_size))
+                - math.log((self.word_counts[False][word] + 1) / (self.total_words[False] + vocabulary_size))
+            )
+        return max(-MAX_MODEL_LOG_ODDS, min(MAX_MODEL_LOG_ODDS, score))
+
+
+# Trained in the background by retrain_task, so requests never wait on it
+_model: Optional[NaiveBayesClassifier] = None
+
+
+def train_from_db(db: Session) -> NaiveBayesClassifier:
+    """Train a classifier on stored emails whose extraction outcome is known."""
+    rows = db.query(Email.subject, Email.sender, Email.content, Email.extracted_task_count).filter(
+        Email.extracted_task_count.isnot(None)
+    ).order_by(Email.id.desc()).limit(PRECLASSIFIER_MAX_TRAINING_ROWS).all()
+
+    model = NaiveBayesClassifier()
+    model.train(
+        (tokenize(f"{subject or ''}\n{clean_email((content or '')[:MAX_CONTENT_CHARS])}", sender), task_count > 0)
+        for subject, sender, content, task_count in rows
+    )
+    logger.info(
+        f"Trained email pre-classifier on {len(rows)} emails "
+        f"({model.doc_counts[True]} actionable, {model.doc_counts[False]} not)"
+    )
+    return model
+
+
+def retrain(session_factory) -> None:
+    """Retrain the shared classifier on a session of its own."""
+    global _model
+    db = session_factory()
+    try:
+        _model = train_from_db(db)
+    except Exception as e:
+        logger.error(f"Error training email pre-classifier: {e}")
+    finally:
+        db.close()
+
+
+async def retrain_task(session_factory):
+    """Background task that retrains the shared classifier every PRECLASSIFIER_RETRAIN_HOURS."""
+    while True:
+        await asyncio.to_thread(retrain, session_factory)
+        await asyncio.sleep(PRECLASSIFIER_RETRAIN_HOURS * 3600)
+
+
+def bulk_mail_signals(
+    content: str,
+    sender: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> List[str]:
+    """List the signs that an email was sent in bulk or by a machine."""
+    headers = {name.lower(): value for name, value in (headers or {}).items()}
+    signals = []
+    if "list-unsubscribe" in headers or _UNSUBSCRIBE.search(content):
+        signals.append("unsubscribe")
+    if "list-id" in headers or headers.get("precedence", "").lower() in ("bulk", "list", "junk"):
+        signals.append("mailing_list")
+    if headers.get("auto-submitted", "no").lower() != "no":
+        signals.append("auto_submitted")
+    if sender and _NO_REPLY_SENDER.search(sender):
+        signals.append("no_reply_sender")
+    return signals
+
+
+def actionable_probability(
+    content: str,
+    subject: Optional[str] = None,
+    sender: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> float:
+    """Estimate the chance that an email contains a task.
+
+    Header and sender heuristics each lower the odds. Once enough labelled
+    emails are stored, a bag-of-words model trained on them adds its own
+    estimate; until then the heuristics decide alone.
+    """
+    score = HEURISTIC_LOG_ODDS * len(bulk_mail_signals(content, sender, headers))
+    model = _model
+    if model is not None and model.is_trained:
+        text = f"{subject or ''}\n{clean_email(content[:MAX_CONTENT_CHARS])}"
+        score += model.log_odds(tokenize(text, sender))
+    return 1 / (1 + math.exp(-score))
+
+
+def is_non_actionable(
+    content: str,
+    subject: Optional[str] = None,
+    sender: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> bool:
+    """Check whether an email can confidently skip LLM extraction."""
+    if not PRECLASSIFIER_ENABLED:
+        return False
+    try:
+        probability = actionable_probability(content, subject, sender, headers)
+    except Exception as e:
+        logger.error(f"Error in email pre-classifier: {e}")
+        return False
+    if probability < PRECLASSIFIER_SKIP_THRESHOLD:
+        logger.info(f"Pre-classifier skipped extraction (actionable probability {probability:.3f})")
+        return True
+    return False
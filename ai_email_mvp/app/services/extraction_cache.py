@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models.llm_cache import ExtractionCache
+from app.services import llm_telemetry
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+EXTRACTION_CACHE_TTL_HOURS = int(os.getenv("EXTRACTION_CACHE_TTL_HOURS", 24 * 7))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", 10000))
+EXTRACTION_CACHE_EVICT_MINUTES = int(os.getenv("EXTRACTION_CACHE_EVICT_MINUTES", 10))
+# Hits only refresh last_accessed_at once it is this old, so most hits don't
+# write. Eviction order only needs to be this precise.
+EXTRACTION_CACHE_TOUCH_MINUTES = int(os.getenv("EXTRACTION_CACHE_TOUCH_MINUTES", 60))
+
+
+def make_cache_key(content: str, model: str, prompt_version: str, kind: str = "extraction") -> str:
+    """Build a content-addressed cache key for an LLM result."""
+    digest = hashlib.sha256()
+    for part in (kind, model, prompt_version, content):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def get_cached_result(db: Session, cache_key: str, kind: str = "extraction") -> Optional[dict]:
+    """Get a cached result, or None on a miss or an expired entry."""
+    try:
+        now = datetime.now(timezone.utc)
+        entry = db.query(ExtractionCache).filter(ExtractionCache.cache_key == cache_key).first()
+        if not entry:
+            llm_telemetry.record_cache_lookup(kind, hit=False)
+            return None
+
+        expires_at = entry.expires_at
+        if expires_at is not None and expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at is not None and expires_at <= now:
+            db.delete(entry)
+            db.commit()
+            llm_telemetry.record_cache_lookup(kind, hit=False)
+            return None
+
+        last_accessed_at = entry.last_accessed_at
+        if last_accessed_at is not None and last_accessed_at.tzinfo is None:
+            last_accessed_at = last_accessed_at.replace(tzinfo=timezone.utc)
+        if last_accessed_at is None or now - last_accessed_at >= timedelta(minutes=EXTRACTION_CACHE_TOUCH_MINUTES):
+            # Hits are counted by the cache lookup metric; hit_count only
+            # counts the hits that refreshed the entry
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_accessed_at = now
+            db.commit()
+        llm_telemetry.record_cache_lookup(kind, hit=True)
+        return entry.result
+    except Exception as e:
+        logger.error(f"Error reading extraction cache: {e}")
+        db.rollback()
+        return None
+
+
+def store_result(
+    db: Session,
+    cache_key: str,
+    result: dict,
+    model: str,
+    prompt_version: str,
+    kind: str = "extraction"
+) -> None:
+    """Store an LLM result. Old entries are evicted by ``eviction_task``."""
+    try:
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(hours=EXTRACTION_CACHE_TTL_HOURS)
+        entry = db.query(ExtractionCache).filter(ExtractionCache.cache_key == cache_key).first()
+        if entry:
+            entry.result = result
+            entry.last_accessed_at = now
+            entry.expires_at = expires_at
+        else:
+            db.add(ExtractionCache(
+                cache_key=cache_key,
+                kind=kind,
+                model=model,
+                prompt_version=prompt_version,
+                result=result,
+                hit_count=0,
+                last_accessed_at=now,
+                expires_at=expires_at
+            ))
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error writing extraction cache: {e}")
+        db.rollback()
+
+
+def evict_entries(db: Session, max_entries: int = None) -> int:
+    """Delete expired entries, then the least recently used ones above the size limit."""
+    if max_entries is None:
+        max_entries = EXTRACTION_CACHE_MAX_ENTRIES
+
+    now = datetime.now(timezone.utc)
+    removed = db.query(ExtractionCache).filter(
+        ExtractionCache.expires_at <= now
+    ).delete(synchronize_session=False)
+
+    overflow = db.query(ExtractionCache).count() - max_entries
+    if overflow > 0:
+        stale_ids = [row.id for row in db.query(ExtractionCache.id)
+                     .order_by(ExtractionCache.last_accessed_at.asc())
+                     .limit(overflow)]
+        removed += db.query(ExtractionCache).filter(
+            ExtractionCache.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+
+    db.commit()
+    if removed:
+        logger.info(f"Evicted {removed} extraction cache entries")
+    return removed
+
+
+def evict(session_factory) -> None:
+    """Evict cache entries on a session of its own."""
+    db = session_factory()
+    try:
+        evict_entries(db)
+    except Exception as e:
+        logger.error(f"Error evicting extraction cache entries: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+async def eviction_task(session_factory):
+    """Background task that evicts cache entries every EXTRACTION_CACHE_EVICT_MINUTES."""
+    while True:
+        await asyncio.to_thread(evict, session_factory)
+        await asyncio.sleep(EXTRACTION_CACHE_EVICT_MINUTES * 60)
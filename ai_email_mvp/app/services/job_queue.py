@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.job import Job
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_DELAY_SECONDS = float(os.getenv("JOB_RETRY_DELAY_SECONDS", 5))  # Doubles per attempt
+# A job that runs past its timeout is retried; one whose lease expires (its
+# process died) is picked up again by another worker
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", 240))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 300))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", 7))
+JOB_PURGE_INTERVAL_SECONDS = 3600
+CLAIM_CANDIDATES = 5  # Jobs to try per claim when other workers race for the same ones
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+# Handlers get a session, the job payload and the user ID, and return a JSON-able result
+Handler = Callable[[Session, dict, int], Awaitable[dict]]
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    user_id: int,
+    payload: dict,
+    idempotency_key: Optional[str] = None,
+    max_attempts: int = JOB_MAX_ATTEMPTS
+) -> Tuple[Job, bool]:
+    """Queue a job, or return the existing job with the same idempotency key.
+
+    Returns the job and whether it was newly created.
+    """
+    if idempotency_key:
+        existing = db.query(Job).filter(Job.idempotency_key == idempotency_key).first()
+        if existing:
+            return existing, False
+
+    job = Job(
+        kind=kind,
+        user_id=user_id,
+        status="queued",
+        payload=payload,
+        idempotency_key=idempotency_key,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=datetime.now(timezone.utc)
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request queued the same key first
+        db.rollback()
+        return db.query(Job).filter(Job.idempotency_key == idempotency_key).one(), False
+    db.refresh(job)
+    return job, True
+
+
+def retry(db: Session, job: Job) -> Job:
+    """Queue a failed job again with a fresh attempt budget; other jobs are left as they are."""
+    if job.status == "failed":
+        job.status = "queued"
+        job.attempts = 0
+        job.error = None
+        job.result = None
+        job.finished_at = None
+        job.run_after = datetime.now(timezone.utc)
+        db.commit()
+        db.refresh(job)
+    return job
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(Job.status == "running", Job.lease_expires_at < now, Job.attempts < Job.max_attempts)
+    )
+
+
+def _abandoned(now: datetime):
+    """Running jobs whose lease expired on their last attempt."""
+    return and_(Job.status == "running", Job.lease_expires_at < now, Job.attempts >= Job.max_attempts)
+
+
+def claim_next(db: Session) -> Optional[Job]:
+    """Lease the oldest runnable job to the caller.
+
+    The claim is a conditional UPDATE, so of several workers (or processes)
+    racing for a job exactly one gets it. A job whose lease expired on its
+    last attempt is marked failed instead of being run again.
+    """
+    now = datetime.now(timezone.utc)
+    candidates = db.query(Job.id, _abandoned(now)).filter(
+        or_(_claimable(now), _abandoned(now))
+    ).order_by(Job.run_after, Job.id).limit(CLAIM_CANDIDATES).all()
+    for job_id, abandoned in candidates:
+        if abandoned:
+            failed = db.query(Job).filter(Job.id == job_id, _abandoned(now)).update({
+                Job.status: "failed",
+                Job.error: "Job lease expired on its last attempt",
+                Job.finished_at: now,
+                Job.lease_expires_at: None
+            }, synchronize_session=False)
+            db.commit()
+            if failed:
+                logger.warning(f"Job {job_id} failed: lease expired on its last attempt")
+            continue
+        claimed = db.query(Job).filter(Job.id == job_id, _claimable(now)).update({
+            Job.status: "running",
+            Job.attempts: Job.attempts + 1,
+            Job.started_at: now,
+            Job.lease_expires_at: now + timedelta(seconds=JOB_LEASE_SECONDS)
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return db.get(Job, job_id)
+    return None
+
+
+def _finish(db: Session, job: Job, values: dict) -> bool:
+    """Update a running job unless its lease was lost to another worker."""
+    updated = db.query(Job).filter(
+        Job.id == job.id, Job.status == "running", Job.attempts == job.attempts
+    ).update(values, synchronize_session=False)
+    db.commit()
+    return bool(updated)
+
+
+def complete(db: Session, job: Job, result: dict) -> bool:
+    return _finish(db, job, {
+        Job.status: "succeeded",
+        Job.result: result,
+        Job.error: None,
+        Job.finished_at: datetime.now(timezone.utc),
+        Job.lease_expires_at: None
+    })
+
+
+def fail(db: Session, job: Job, error: str) -> bool:
+    """Record a failed attempt, queueing the job again with backoff if it has attempts left."""
+    now = datetime.now(timezone.utc)
+    if job.attempts < job.max_attempts:
+        delay = JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1)
+        return _finish(db, job, {
+            Job.status: "queued",
+            Job.error: error,
+            Job.run_after: now + timedelta(seconds=delay),
+            Job.lease_expires_at: None
+        })
+    return _finish(db, job, {
+        Job.status: "failed",
+        Job.error: error,
+        Job.finished_at: now,
+        Job.lease_expires_at: None
+    })
+
+
+def release(db: Session, job: Job) -> bool:
+    """Hand an interrupted job back to the queue without counting the attempt."""
+    return _finish(db, job, {
+        Job.status: "queued",
+        Job.attempts: job.attempts - 1,
+        Job.run_after: datetime.now(timezone.utc),
+        Job.lease_expires_at: None
+    })
+
+
+def purge_finished(db: Session, days: int = JOB_RETENTION_DAYS) -> int:
+    """Delete finished jobs older than ``days``."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    removed = db.query(Job).filter(
+        Job.status.in_(FINISHED_STATUSES), Job.finished_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return removed
+
+
+class JobWorkerPool:
+    """Workers that claim jobs from the jobs table and run the handler for their kind.
+
+    Workers poll every ``poll_interval`` seconds, and ``notify`` wakes them at
+    once when a job is queued in this process.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        workers: int = JOB_WORKERS,
+        poll_interval: float = JOB_POLL_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.handlers: Dict[str, Handler] = {}
+        self.counters = {"succeeded": 0, "retried": 0, "failed": 0}
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self.handlers[kind] = handler
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._work(index)) for index in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._purge()))
+        logger.info(f"Started {self.workers} job workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_next(self) -> bool:
+        """Claim and run one job; return False if none was runnable."""
+        db = self.session_factory()
+        try:
+            job = claim_next(db)
+            if job is None:
+                return False
+            await self._run(db, job)
+            return True
+        finally:
+            db.close()
+
+    async def _run(self, db: Session, job: Job) -> None:
+        handler = self.handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind {job.kind!r}")
+            async with asyncio.timeout(JOB_TIMEOUT_SECONDS):
+                result = await handler(db, job.payload, job.user_id)
+        except asyncio.CancelledError:
+            db.rollback()
+            release(db, job)
+            raise
+        except Exception as e:
+            db.rollback()
+            error = f"Timed out after {JOB_TIMEOUT_SECONDS}s" if isinstance(e, TimeoutError) else str(e)
+            logger.error(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed: {error}")
+            fail(db, job, error)
+            self.counters["retried" if job.attempts < job.max_attempts else "failed"] += 1
+        else:
+            if complete(db, job, result):
+                self.counters["succeeded"] += 1
+            else:
+                logger.warning(f"Job {job.id} finished after its lease was taken over")
+
+    async def _work(self, index: int) -> None:
+        while True:
+            try:
+                if await self.run_next():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} error: {e}")
+            try:
+                async with asyncio.timeout(self.poll_interval):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _purge(self) -> None:
+        while True:
+            await asyncio.sleep(JOB_PURGE_INTERVAL_SECONDS)
+            db = self.session_factory()
+            try:
+                purge_finished(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error purging finished jobs: {e}")
+            finally:
+                db.close()
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import time
+from typing import AsyncIterator, List, Optional
+
+import openai
+from dotenv import load_dotenv
+
+from app.services import llm_gateway, llm_provider, llm_telemetry
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Per-call timeout and retry budget for OpenAI requests
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_INITIAL_RETRY_DELAY = 1  # Backoff base in seconds
+
+# Shared async client, created on first use so every request reuses the same
+# connection pool instead of building a new client per call
+_client: Optional[openai.AsyncOpenAI] = None
+
+
+def get_client() -> openai.AsyncOpenAI:
+    """Get the shared AsyncOpenAI client."""
+    global _client
+    if _client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OpenAI API key is not configured")
+        # Retries are handled by the gateway
+        _client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+    return _client
+
+
+async def _create_with_retries(params: dict, timeout: float, max_retries: int, call_stats: dict):
+    """Call the chat completions API through the model's gateway.
+
+    The gateway bounds concurrency, fails fast while the provider is unhealthy
+    and retries failed attempts with jittered backoff, filling ``call_stats``
+    with queue wait, latency and retry count for telemetry. The request goes
+    to the configured provider, which may record or replay responses.
+    """
+    provider = llm_provider.get_provider()
+    send = None if provider.offline else get_client().chat.completions.create
+    return await llm_gateway.get_gateway(params["model"]).call(
+        lambda: provider.create(params, send),
+        timeout=timeout,
+        max_retries=max_retries,
+        initial_delay=LLM_INITIAL_RETRY_DELAY,
+        call_stats=call_stats
+    )
+
+
+async def _open_stream_with_retries(params: dict, timeout: float, max_retries: int, call_stats: dict):
+    """Open a streamed chat completion through the model's gateway.
+
+    Like ``_create_with_retries``, but the gateway slot stays held while the
+    reply streams. Returns the stream and the function that frees the slot.
+    """
+    provider = llm_provider.get_provider()
+    send = None if provider.offline else get_client().chat.completions.create
+    return await llm_gateway.get_gateway(params["model"]).open_stream(
+        lambda: provider.create(params, send),
+        timeout=timeout,
+        max_retries=max_retries,
+        initial_delay=LLM_INITIAL_RETRY_DELAY,
+        call_stats=call_stats
+    )
+
+
+async def chat_completion(
+    messages: List[dict],
+    model: str,
+    temperature: Optional[float] = None,
+    timeout: float = LLM_TIMEOUT_SECONDS,
+    max_retries: int = LLM_MAX_RETRIES,
+    operation: str = "chat",
+    **kwargs
+) -> str:
+    """Run a chat completion without blocking the event loop.
+
+    Each attempt is bounded by ``timeout`` seconds and failed attempts are
+    retried with jittered exponential backoff. Raises the last error once all
+    retries are exhausted, or LLMUnavailableError if the call was shed.
+    Telemetry for the call is recorded under ``operation``.
+    """
+    params = dict(kwargs, model=model, messages=messages)
+    if temperature is not None:
+        params["temperature"] = temperature
+
+    call_stats = {}
+    try:
+        response = await _create_with_retries(params, timeout, max_retries, call_stats)
+    except asyncio.CancelledError:
+        llm_telemetry.record_call(model, operation, "cancelled", call_stats)
+        raise
+    except Exception:
+        llm_telemetry.record_call(model, operation, "error", call_stats)
+        raise
+    llm_telemetry.record_call(model, operation, "ok", call_stats, getattr(response, "usage", None))
+    return response.choices[0].message.content.strip()
+
+
+async def stream_chat_completion(
+    messages: List[dict],
+    model: str,
+    temperature: Optional[float] = None,
+    timeout: float = LLM_TIMEOUT_SECONDS,
+    max_retries: int = LLM_MAX_RETRIES,
+    operation: str = "chat_stream",
+    **kwargs
+) -> AsyncIterator[str]:
+    """Stream a chat completion, yielding content deltas as they arrive.
+
+    Opening the stream is retried like ``chat_completion``. Once the stream is
+    open, ``timeout`` bounds the wait for each delta and errors are raised to
+    the caller, since partial output has already been consumed. The stream
+    holds its gateway slot until it ends or the caller closes it. Telemetry is
+    recorded when the stream ends, with the token usage from its last chunk.
+    """
+    params = dict(kwargs, model=model, messages=messages, stream=True)
+    params.setdefault("stream_options", {"include_usage": True})
+    if temperature is not None:
+        params["temperature"] = temperature
+
+    call_stats = {}
+    usage = None
+    outcome = "error"
+    release_slot = None
+    try:
+        stream, release_slot = await _open_stream_with_retries(params, timeout, max_retries, call_stats)
+        started = time.perf_counter()
+        chunks = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"OpenAI stream stalled for {timeout}s")
+            usage = getattr(chunk, "usage", None) or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        call_stats["latency_seconds"] += time.perf_counter() - started
+        outcome = "ok"
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    finally:
+        if release_slot is not None:
+            release_slot()
+        llm_telemetry.record_call(model, operation, outcome, call_stats, usage)
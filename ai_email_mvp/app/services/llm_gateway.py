@@ -0,0 +1,457 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import openai
+from dotenv import load_dotenv
+
+from app.services import llm_telemetry
+from app.services.llm_provider import ReplayMissError
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# AIMD concurrency limit per model: +1/limit per success, halved on overload
+LLM_CONCURRENCY_INITIAL = int(os.getenv("LLM_CONCURRENCY_INITIAL", 10))
+LLM_CONCURRENCY_MIN = int(os.getenv("LLM_CONCURRENCY_MIN", 1))
+LLM_CONCURRENCY_MAX = int(os.getenv("LLM_CONCURRENCY_MAX", 50))
+LLM_CONCURRENCY_DECREASE_INTERVAL = 1.0  # Seconds between decreases, so one burst of 429s halves once
+# Callers waiting for a slot; beyond this, or after waiting too long, calls are shed
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 100))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", 30))
+# Circuit breaker: open after this many consecutive provider failures
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", 5))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+LLM_MAX_BACKOFF_SECONDS = float(os.getenv("LLM_MAX_BACKOFF_SECONDS", 20))
+LLM_MAX_RETRY_AFTER_SECONDS = 60  # Ignore longer Retry-After hints and give up instead
+# Priority lanes, highest first. Interactive calls (a user waiting on the
+# sidebar) keep this share of each model's concurrency free of backfill work
+LANES = ("interactive", "backfill")
+DEFAULT_LANE = "interactive"
+LLM_INTERACTIVE_RESERVED_SHARE = float(os.getenv("LLM_INTERACTIVE_RESERVED_SHARE", 0.3))
+
+# Client errors that retrying won't fix
+NON_RETRYABLE_STATUS_CODES = {400, 401, 403, 404, 422}
+
+
+# The lane of LLM calls made from the current context. Tasks copy the context
+# they are created in, so setting it once per request or job is enough.
+current_lane: ContextVar[str] = ContextVar("llm_lane", default=DEFAULT_LANE)
+
+
+def set_lane(lane: str) -> None:
+    """Run LLM calls made from the current context in a priority lane."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown LLM lane {lane!r}")
+    current_lane.set(lane)
+
+
+class LLMUnavailableError(Exception):
+    """Raised without calling the provider when it can't take the call right now."""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    pass
+
+
+class OverloadedError(LLMUnavailableError):
+    pass
+
+
+class AIMDLimiter:
+    """Concurrency limit that grows additively on success and shrinks multiplicatively on overload.
+
+    Callers queue per priority lane. Freed slots go to the interactive lane
+    first, and backfill calls may hold at most ``1 - reserved_share`` of the
+    limit, so interactive calls find a slot even while a backfill saturates
+    the rest. When the queue is full, an interactive call evicts the newest
+    queued backfill call instead of being shed.
+    """
+
+    def __init__(
+        self,
+        initial: int = LLM_CONCURRENCY_INITIAL,
+        min_limit: int = LLM_CONCURRENCY_MIN,
+        max_limit: int = LLM_CONCURRENCY_MAX,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+        backoff_ratio: float = 0.5,
+        reserved_share: float = LLM_INTERACTIVE_RESERVED_SHARE,
+        name: str = "default"
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.backoff_ratio = backoff_ratio
+        self.reserved_share = reserved_share
+        self.name = name
+        self.in_flight = 0
+        self.shed = 0
+        self.lane_in_flight = {lane: 0 for lane in LANES}
+        self.lane_waits = {lane: {"count": 0, "seconds_total": 0.0} for lane in LANES}
+        self._waiters = {lane: deque() for lane in LANES}
+        self._last_decrease = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def backfill_limit(self) -> int:
+        """Slots backfill calls may hold at once; the rest are kept for interactive calls.
+
+        Any reserved share keeps at least one slot, so while the limit is down
+        to one, backfill calls wait rather than take the only slot.
+        """
+        slots = int(self.limit)
+        reserved = max(1, int(slots * self.reserved_share)) if self.reserved_share > 0 else 0
+        return max(0, slots - reserved)
+
+    def _has_slot(self, lane: str) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        return lane == "interactive" or self.lane_in_flight[lane] < self.backfill_limit()
+
+    def _queued_ahead(self, lane: str) -> bool:
+        """Whether callers in this lane or a higher one are already waiting."""
+        return any(self._waiters[other] for other in LANES[:LANES.index(lane) + 1])
+
+    async def acquire(self, lane: str = DEFAULT_LANE) -> None:
+        """Wait for a slot, raising OverloadedError if the queue is full or the wait times out."""
+        if lane not in self._waiters:
+            lane = DEFAULT_LANE
+        queued_at = time.perf_counter()
+        try:
+            await self._acquire(lane)
+        finally:
+            waited = time.perf_counter() - queued_at
+            self.lane_waits[lane]["count"] += 1
+            self.lane_waits[lane]["seconds_total"] += waited
+            llm_telemetry.LLM_LANE_WAIT.labels(self.name, lane).observe(waited)
+
+    async def _acquire(self, lane: str) -> None:
+        if self._has_slot(lane) and not self._queued_ahead(lane):
+            self._grant(lane)
+            return
+        if self.queued >= self.max_queue and not self._evict_lower_than(lane):
+            self.shed += 1
+            raise OverloadedError("LLM request queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        self._report_depth(lane)
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await waiter
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self.release(lane)  # The slot was handed over just as we gave up
+            elif waiter in self._waiters[lane]:
+                self._waiters[lane].remove(waiter)
+                self._report_depth(lane)
+            if isinstance(e, TimeoutError):
+                self.shed += 1
+                raise OverloadedError(f"Waited {self.queue_timeout}s for an LLM slot")
+            raise
+
+    def _evict_lower_than(self, lane: str) -> bool:
+        """Shed the newest waiter of a lower lane to make room; False if there is none."""
+        for other in reversed(LANES[LANES.index(lane) + 1:]):
+            while self._waiters[other]:
+                waiter = self._waiters[other].pop()
+                if waiter.done():
+                    continue
+                self.shed += 1
+                waiter.set_exception(OverloadedError(f"Shed from the {other} lane for higher priority work"))
+                self._report_depth(other)
+                return True
+        return False
+
+    def _grant(self, lane: str) -> None:
+        self.in_flight += 1
+        self.lane_in_flight[lane] += 1
+
+    def release(self, lane: str = DEFAULT_LANE) -> None:
+        self.in_flight -= 1
+        self.lane_in_flight[lane] -= 1
+        self._wake()
+
+    def on_success(self) -> None:
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def on_overload(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease >= LLM_CONCURRENCY_DECREASE_INTERVAL:
+            self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+            self._last_decrease = now
+            logger.warning(f"LLM concurrency limit lowered to {self.limit:.1f}")
+
+    def _wake(self) -> None:
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            while waiters and self._has_slot(lane):
+                waiter = waiters.popleft()
+                if waiter.done():
+                    continue
+                self._grant(lane)
+                waiter.set_result(None)
+            self._report_depth(lane)
+
+    def _report_depth(self, lane: str) -> None:
+        llm_telemetry.LLM_LANE_QUEUE_DEPTH.labels(self.name, lane).set(len(self._waiters[lane]))
+
+    def lane_stats(self) -> Dict[str, dict]:
+        return {
+            lane: {
+                "in_flight": self.lane_in_flight[lane],
+                "queued": len(self._waiters[lane]),
+                "avg_wait_seconds": round(
+                    self.lane_waits[lane]["seconds_total"] / self.lane_waits[lane]["count"], 4
+                ) if self.lane_waits[lane]["count"] else 0.0,
+            }
+            for lane in LANES
+        }
+
+
+class CircuitBreaker:
+    """Fail fast while the provider is unhealthy, then let a single probe call through."""
+
+    def __init__(
+        self,
+        failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = LLM_BREAKER_RESET_SECONDS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"  # closed, open or half_open
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def before_call(self) -> None:
+        if self.state == "open":
+            retry_in = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if retry_in > 0:
+                raise CircuitOpenError(f"LLM circuit is open, retry in {retry_in:.0f}s")
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                raise CircuitOpenError("LLM circuit is half-open and a probe call is in flight")
+            self._probing = True
+
+    def release_probe(self) -> None:
+        """Let another call probe when this one ended without reaching the provider."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("LLM circuit closed")
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.error(f"LLM circuit opened after {self.failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an error may go away on retry (rate limits, timeouts, 5xx, network)."""
+    if isinstance(error, ReplayMissError):
+        return False
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code not in NON_RETRYABLE_STATUS_CODES
+    return True
+
+
+def is_overload(error: Exception) -> bool:
+    """Whether an error means the provider is overloaded (rate limit, 5xx or timeout)."""
+    if isinstance(error, (TimeoutError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the provider's Retry-After hint from an error response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, initial_delay: float, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, or the provider's Retry-After plus jitter."""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, initial_delay)
+    return random.uniform(0, min(LLM_MAX_BACKOFF_SECONDS, initial_delay * 2 ** (attempt - 1)))
+
+
+class LLMGateway:
+    """Outbound gate for one model's calls: concurrency limit, circuit breaker and retries."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.limiter = AIMDLimiter(name=name)
+        self.breaker = CircuitBreaker()
+
+    async def call(
+        self,
+        request: Callable[[], Awaitable[T]],
+        timeout: float,
+        max_retries: int,
+        initial_delay: float,
+        call_stats: Optional[dict] = None,
+        hold_slot: bool = False
+    ) -> T:
+        """Run ``request`` with retries, raising the last error once all attempts fail.
+
+        Rate limits, timeouts and server errors lower the concurrency limit,
+        and every retryable error counts towards opening the circuit.
+        CircuitOpenError and OverloadedError are raised immediately, without
+        retrying. If ``call_stats`` is given it is filled with the time spent
+        queued, the time spent waiting on the provider, the number of retries
+        and the priority lane. With ``hold_slot`` a successful call keeps its
+        concurrency slot, and the caller must release it (see ``open_stream``).
+        """
+        lane = current_lane.get()
+        if call_stats is None:
+            call_stats = {}
+        call_stats.update(queue_wait_seconds=0.0, latency_seconds=0.0, retries=0, lane=lane)
+        for attempt in range(1, max_retries + 1):
+            call_stats["retries"] = attempt - 1
+            self.breaker.before_call()
+            queued_at = time.perf_counter()
+            try:
+                await self.limiter.acquire(lane)
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            finally:
+                call_stats["queue_wait_seconds"] += time.perf_counter() - queued_at
+            started = time.perf_counter()
+            succeeded = False
+            try:
+                async with asyncio.timeout(timeout):
+                    response = await request()
+            except asyncio.CancelledError:
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                error = e
+                if isinstance(e, TimeoutError):
+                    error = TimeoutError(f"OpenAI call timed out after {timeout}s")
+            else:
+                succeeded = True
+                self.limiter.on_success()
+                self.breaker.record_success()
+                return response
+            finally:
+                if not (succeeded and hold_slot):
+                    self.limiter.release(lane)
+                call_stats["latency_seconds"] += time.perf_counter() - started
+
+            if not is_retryable(error):
+                self.breaker.record_success()  # The provider answered; the request was wrong
+                logger.error(f"OpenAI API error, not retrying: {error}")
+                raise error
+            if is_overload(error):
+                self.limiter.on_overload()
+            self.breaker.record_failure()
+            if attempt == max_retries:
+                logger.error(f"OpenAI API error after all retries: {error}")
+                raise error
+
+            retry_after = retry_after_seconds(error)
+            if retry_after is not None and retry_after > LLM_MAX_RETRY_AFTER_SECONDS:
+                logger.error(f"OpenAI asked to retry after {retry_after:.0f}s, giving up: {error}")
+                raise error
+            delay = backoff_delay(attempt, initial_delay, retry_after)
+            logger.warning(f"OpenAI API error, retrying in {delay:.2f}s ({attempt}/{max_retries}): {error}")
+            await asyncio.sleep(delay)
+
+    async def open_stream(
+        self,
+        request: Callable[[], Awaitable[T]],
+        timeout: float,
+        max_retries: int,
+        initial_delay: float,
+        call_stats: Optional[dict] = None
+    ) -> Tuple[T, Callable[[], None]]:
+        """Open a streamed reply like ``call``, holding its slot while it streams.
+
+        Returns the stream and a function that frees the slot, to call once
+        the stream has been consumed or closed. Calling it again does nothing.
+        """
+        lane = current_lane.get()
+        stream = await self.call(request, timeout, max_retries, initial_delay, call_stats, hold_slot=True)
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.limiter.release(lane)
+
+        return stream, release
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "queued": self.limiter.queued,
+            "shed": self.limiter.shed,
+            "circuit_state": self.breaker.state,
+            "lanes": self.limiter.lane_stats(),
+        }
+
+
+_gateways: Dict[str, LLMGateway] = {}
+
+
+def get_gateway(model: str) -> LLMGateway:
+    """Get the gateway for a model; rate limits and health are tracked per model."""
+    gateway = _gateways.get(model)
+    if gateway is None:
+        gateway = _gateways[model] = LLMGateway(model)
+    return gateway
+
+
+def get_all_stats() -> Dict[str, dict]:
+    return {model: gateway.stats() for model, gateway in _gateways.items()}
+
+
+def reset() -> None:
+    """Forget all gateway state (used by tests)."""
+    _gateways.clear()
@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# "live" calls OpenAI, "record" calls OpenAI and saves every response to
+# LLM_CASSETTE_DIR, "replay" serves saved responses without a network or API key
+LLM_PROVIDER_MODE = os.getenv("LLM_PROVIDER_MODE", "live").lower()
+LLM_CASSETTE_DIR = os.getenv("LLM_CASSETTE_DIR", "llm_cassettes")
+# Replayed calls take their recorded latency times LLM_REPLAY_LATENCY_SCALE,
+# or LLM_REPLAY_LATENCY_MS (plus up to LLM_REPLAY_JITTER_MS) when that is set
+LLM_REPLAY_LATENCY_MS = os.getenv("LLM_REPLAY_LATENCY_MS")
+LLM_REPLAY_LATENCY_SCALE = float(os.getenv("LLM_REPLAY_LATENCY_SCALE", 1.0))
+LLM_REPLAY_JITTER_MS = float(os.getenv("LLM_REPLAY_JITTER_MS", 0))
+REPLAY_STREAM_CHUNK_CHARS = 16
+DEFAULT_FIRST_CHUNK_SHARE = 0.3  # Of a stream's latency, spent before its first chunk
+
+# Request parameters that don't change the response text; a response recorded
+# without streaming can be replayed as a stream and the other way round
+_UNKEYED_PARAMS = ("stream", "stream_options")
+
+Send = Callable[..., Awaitable[Any]]
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def request_key(params: dict) -> str:
+    """Hash the request parameters that determine the response."""
+    keyed = {name: value for name, value in params.items() if name not in _UNKEYED_PARAMS}
+    return hashlib.sha256(json.dumps(keyed, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Recorded responses, one JSON file per request key."""
+
+    def __init__(self, directory: str = LLM_CASSETTE_DIR):
+        self.directory = directory
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self.path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, params: dict, content: str, usage: Any, latency: float,
+             first_chunk_latency: Optional[float] = None) -> None:
+        """Write a recording atomically, so concurrent readers never see a partial file."""
+        os.makedirs(self.directory, exist_ok=True)
+        recording = {
+            "request": {name: value for name, value in params.items() if name not in _UNKEYED_PARAMS},
+            "content": content,
+            "usage": {
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            },
+            "latency_seconds": round(latency, 4),
+            "first_chunk_latency_seconds": round(first_chunk_latency, 4) if first_chunk_latency else None,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(recording, f, indent=2, default=str)
+        os.replace(tmp_path, self.path(key))
+
+
+class LiveProvider:
+    """Send every request to OpenAI."""
+
+    offline = False
+
+    async def create(self, params: dict, send: Send):
+        return await send(**params)
+
+
+class RecordingProvider:
+    """Send requests to OpenAI and save each complete response to a cassette."""
+
+    offline = False
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+
+    async def create(self, params: dict, send: Send):
+        started = time.perf_counter()
+        response = await send(**params)
+        if params.get("stream"):
+            return self._record_stream(params, response, started)
+        self.cassette.save(
+            request_key(params), params, response.choices[0].message.content or "",
+            getattr(response, "usage", None), time.perf_counter() - started
+        )
+        return response
+
+    async def _record_stream(self, params: dict, stream, started: float) -> AsyncIterator[Any]:
+        content = []
+        usage = None
+        first_chunk_latency = None
+        async for chunk in stream:
+            if first_chunk_latency is None:
+                first_chunk_latency = time.perf_counter() - started
+            usage = getattr(chunk, "usage", None) or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                content.append(chunk.choices[0].delta.content)
+            yield chunk
+        # Only a stream that ran to the end is saved
+        self.cassette.save(
+            request_key(params), params, "".join(content), usage,
+            time.perf_counter() - started, first_chunk_latency
+        )
+
+
+class ReplayProvider:
+    """Serve recorded responses after a simulated latency, without calling OpenAI.
+
+    ``fallback``, if given, builds the response text for requests that were
+    never recorded; otherwise they raise ReplayMissError.
+    """
+
+    offline = True
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency_ms: Optional[float] = None,
+        latency_scale: float = LLM_REPLAY_LATENCY_SCALE,
+        jitter_ms: float = LLM_REPLAY_JITTER_MS,
+        fallback: Optional[Callable[[dict], str]] = None
+    ):
+        self.cassette = cassette
+        self.latency_ms = latency_ms
+        self.latency_scale = latency_scale
+        self.jitter_ms = jitter_ms
+        self.fallback = fallback
+        self.hits = 0
+        self.misses = 0
+
+    def _latency(self, recording: dict) -> float:
+        if self.latency_ms is not None:
+            base = self.latency_ms / 1000
+        else:
+            base = (recording.get("latency_seconds") or 0.0) * self.latency_scale
+        return base + random.uniform(0, self.jitter_ms / 1000)
+
+    def _load(self, params: dict) -> dict:
+        key = request_key(params)
+        recording = self.cassette.load(key)
+        if recording is not None:
+            self.hits += 1
+            return recording
+        self.misses += 1
+        if self.fallback is None:
+            raise ReplayMissError(f"No recorded response for request {key[:12]} in {self.cassette.directory}")
+        content = self.fallback(params)
+        return {"content": content, "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4}}
+
+    async def create(self, params: dict, send: Send = None):
+        recording = self._load(params)
+        latency = self._latency(recording)
+        usage = SimpleNamespace(**recording["usage"])
+        if params.get("stream"):
+            first_chunk_share = DEFAULT_FIRST_CHUNK_SHARE
+            if recording.get("first_chunk_latency_seconds") and recording.get("latency_seconds"):
+                first_chunk_share = recording["first_chunk_latency_seconds"] / recording["latency_seconds"]
+            await asyncio.sleep(latency * first_chunk_share)
+            return self._replay_stream(recording["content"], usage, latency * (1 - first_chunk_share))
+
+        await asyncio.sleep(latency)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=recording["content"]))],
+            usage=usage
+        )
+
+    async def _replay_stream(self, content: str, usage, duration: float) -> AsyncIterator[Any]:
+        pieces = [content[i:i + REPLAY_STREAM_CHUNK_CHARS]
+                  for i in range(0, len(content), REPLAY_STREAM_CHUNK_CHARS)]
+        for piece in pieces:
+            await asyncio.sleep(duration / len(pieces))
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+
+_provider = None
+
+
+def get_provider():
+    """Get the provider for LLM_PROVIDER_MODE, created on first use."""
+    global _provider
+    if _provider is None:
+        if LLM_PROVIDER_MODE == "replay":
+            latency_ms = float(LLM_REPLAY_LATENCY_MS) if LLM_REPLAY_LATENCY_MS else None
+            _provider = ReplayProvider(Cassette(LLM_CASSETTE_DIR), latency_ms=latency_ms)
+        elif LLM_PROVIDER_MODE == "record":
+            _provider = RecordingProvider(Cassette(LLM_CASSETTE_DIR))
+        elif LLM_PROVIDER_MODE == "live":
+            _provider = LiveProvider()
+        else:
+            raise ValueError(f"Unknown LLM_PROVIDER_MODE {LLM_PROVIDER_MODE!r}")
+        logger.info(f"LLM provider mode: {LLM_PROVIDER_MODE}")
+    return _provider
+
+
+def set_provider(provider) -> None:
+    """Replace the provider (used by tests and benchmarks)."""
+    global _provider
+    _provider = provider
+
+
+def requires_api_key() -> bool:
+    return LLM_PROVIDER_MODE != "replay"
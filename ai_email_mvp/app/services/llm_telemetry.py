@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+import os
+from contextvars import ContextVar
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.orm import Session
+
+from app.models.llm_usage import LLMUsage
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LLM_USAGE_FLUSH_SECONDS = float(os.getenv("LLM_USAGE_FLUSH_SECONDS", 30))
+LLM_USAGE_RETENTION_DAYS = int(os.getenv("LLM_USAGE_RETENTION_DAYS", 90))
+
+# USD per 1K (prompt, completion) tokens; dated model names match by prefix
+MODEL_PRICES_PER_1K = {
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4": (0.03, 0.06),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+LLM_CALL_LATENCY = Histogram(
+    "llm_call_latency_seconds", "Time spent waiting on the provider per LLM call, across retries",
+    ["model", "operation", "outcome"], buckets=LATENCY_BUCKETS
+)
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds", "Time an LLM call waited for a gateway slot",
+    ["model", "operation"], buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 15, 30)
+)
+LLM_LANE_WAIT = Histogram(
+    "llm_lane_wait_seconds", "Time an LLM call attempt waited for a gateway slot, per priority lane",
+    ["model", "lane"], buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 15, 30)
+)
+LLM_LANE_QUEUE_DEPTH = Gauge(
+    "llm_lane_queue_depth", "LLM calls waiting for a gateway slot, per priority lane", ["model", "lane"]
+)
+LLM_TOKENS = Histogram(
+    "llm_tokens", "Tokens per LLM call",
+    ["model", "operation", "type"], buckets=TOKEN_BUCKETS
+)
+LLM_RETRIES = Counter("llm_retries_total", "Retried LLM call attempts", ["model", "operation"])
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM spend in USD", ["model", "operation"])
+LLM_PARSE_FAILURES = Counter(
+    "llm_parse_failures_total", "LLM responses that failed parsing or validation", ["operation"]
+)
+LLM_CACHE_REQUESTS = Counter("llm_cache_requests_total", "LLM result cache lookups", ["kind", "result"])
+REQUEST_CANCELLATIONS = Counter(
+    "request_cancellations_total", "Requests whose LLM work was cancelled because the client disconnected",
+    ["endpoint"]
+)
+
+# The user whose request is making LLM calls, for the cost ledger. Tasks copy
+# the context they are created in, so setting it once per request is enough.
+current_user_id: ContextVar[Optional[int]] = ContextVar("llm_current_user_id", default=None)
+
+# Usage not yet written to the ledger, keyed by (user_id, day, model)
+_pending_usage: Dict[Tuple[int, date, str], dict] = {}
+
+
+def set_current_user(user_id: Optional[int]) -> None:
+    """Attribute LLM calls made from the current context to a user."""
+    current_user_id.set(user_id)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate the USD cost of a call from MODEL_PRICES_PER_1K."""
+    prices = MODEL_PRICES_PER_1K.get(model)
+    if prices is None:
+        prefix = max((name for name in MODEL_PRICES_PER_1K if model.startswith(name)), key=len, default=None)
+        prices = MODEL_PRICES_PER_1K.get(prefix, (0.0, 0.0))
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1000
+
+
+def record_call(
+    model: str,
+    operation: str,
+    outcome: str,
+    call_stats: dict,
+    usage=None
+) -> None:
+    """Record one LLM call: metrics, a structured log line and the cost ledger.
+
+    ``call_stats`` is filled in by the gateway; ``usage`` is the response's
+    token usage, if the call succeeded.
+    """
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+    user_id = current_user_id.get()
+
+    LLM_CALL_LATENCY.labels(model, operation, outcome).observe(call_stats.get("latency_seconds", 0.0))
+    LLM_QUEUE_WAIT.labels(model, operation).observe(call_stats.get("queue_wait_seconds", 0.0))
+    if call_stats.get("retries"):
+        LLM_RETRIES.labels(model, operation).inc(call_stats["retries"])
+    if usage is not None:
+        LLM_TOKENS.labels(model, operation, "prompt").observe(prompt_tokens)
+        LLM_TOKENS.labels(model, operation, "completion").observe(completion_tokens)
+        LLM_COST.labels(model, operation).inc(cost)
+
+    logger.info("llm_call " + json.dumps({
+        "model": model,
+        "operation": operation,
+        "outcome": outcome,
+        "user_id": user_id,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": round(cost, 6),
+        "queue_wait_ms": round(call_stats.get("queue_wait_seconds", 0.0) * 1000, 1),
+        "latency_ms": round(call_stats.get("latency_seconds", 0.0) * 1000, 1),
+        "retries": call_stats.get("retries", 0),
+        "lane": call_stats.get("lane"),
+    }))
+
+    if user_id is not None and usage is not None:
+        _add_pending_usage((user_id, date.today(), model), {
+            "calls": 1,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost_usd": cost
+        })
+
+
+def _add_pending_usage(key: Tuple[int, date, str], usage: dict) -> None:
+    entry = _pending_usage.setdefault(
+        key, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+    )
+    for field, value in usage.items():
+        entry[field] += value
+
+
+def record_parse_failure(operation: str) -> None:
+    LLM_PARSE_FAILURES.labels(operation).inc()
+
+
+def record_cache_lookup(kind: str, hit: bool) -> None:
+    LLM_CACHE_REQUESTS.labels(kind, "hit" if hit else "miss").inc()
+
+
+def record_cancellation(endpoint: str) -> None:
+    REQUEST_CANCELLATIONS.labels(endpoint).inc()
+
+
+def flush_usage(db: Session) -> int:
+    """Add pending usage to the ledger and drop rows past the retention window."""
+    global _pending_usage
+    pending, _pending_usage = _pending_usage, {}
+    try:
+        for (user_id, day, model), usage in pending.items():
+            row = db.query(LLMUsage).filter(
+                LLMUsage.user_id == user_id,
+                LLMUsage.day == day,
+                LLMUsage.model == model
+            ).first()
+            if row is None:
+                row = LLMUsage(user_id=user_id, day=day, model=model,
+                               calls=0, prompt_tokens=0, completion_tokens=0, cost_usd=0.0)
+                db.add(row)
+            row.calls += usage["calls"]
+            row.prompt_tokens += usage["prompt_tokens"]
+            row.completion_tokens += usage["completion_tokens"]
+            row.cost_usd += usage["cost_usd"]
+
+        cutoff = date.today() - timedelta(days=LLM_USAGE_RETENTION_DAYS)
+        db.query(LLMUsage).filter(LLMUsage.day < cutoff).delete(synchronize_session=False)
+        db.commit()
+        return len(pending)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error writing LLM usage ledger: {e}")
+        # Keep the usage so the next flush can retry it
+        for key, usage in pending.items():
+            _add_pending_usage(key, usage)
+        return 0
+
+
+def get_user_usage(db: Session, user_id: int, days: int = 30):
+    """Get a user's ledger rows for the last ``days`` days, newest first."""
+    since = date.today() - timedelta(days=days)
+    return db.query(LLMUsage).filter(
+        LLMUsage.user_id == user_id,
+        LLMUsage.day >= since
+    ).order_by(LLMUsage.day.desc(), LLMUsage.model).all()
+
+
+async def usage_flush_task(session_factory):
+    """Background task that periodically writes pending usage to the ledger."""
+    while True:
+        await asyncio.sleep(LLM_USAGE_FLUSH_SECONDS)
+        db = session_factory()
+        try:
+            flush_usage(db)
+        finally:
+            db.close()
@@ -0,0 +1,107 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.services import llm_client, llm_telemetry
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Every router created, by name, so their counters can be reported together
+_routers: Dict[str, "ModelRouter"] = {}
+
+
+class LowConfidenceError(ValueError):
+    """Raised by a validator when a response is well-formed but looks unreliable.
+
+    ``result`` is the parsed response, used as-is if no larger model is left.
+    """
+
+    def __init__(self, message: str, result: Any):
+        super().__init__(message)
+        self.result = result
+
+
+class ModelRouter:
+    """Route a completion through model tiers, cheapest first.
+
+    Each response goes through ``validate``, which returns the parsed result or
+    raises ValueError. A rejected response escalates to the next tier; a failed
+    call is raised as is. Calls, failures, escalations and latency are counted
+    per tier.
+    """
+
+    def __init__(self, name: str, tiers: List[str]):
+        if not tiers:
+            raise ValueError("A model router needs at least one tier")
+        self.name = name
+        self.tiers = list(tiers)
+        self.counters = {
+            model: {"calls": 0, "failures": 0, "escalations": 0, "latency_seconds_total": 0.0}
+            for model in self.tiers
+        }
+        _routers[name] = self
+
+    async def complete(
+        self,
+        messages: List[dict],
+        validate: Callable[[str], Any],
+        temperature: float = None,
+        **kwargs
+    ) -> Tuple[Any, str]:
+        """Return the first validated result and the model that produced it.
+
+        Raises the last validation error if every tier's response is rejected,
+        and any other error from the call right away.
+        """
+        for index, model in enumerate(self.tiers):
+            is_last_tier = index == len(self.tiers) - 1
+            counters = self.counters[model]
+            counters["calls"] += 1
+            started = time.perf_counter()
+            try:
+                response = await llm_client.chat_completion(
+                    messages, model=model, temperature=temperature, operation=self.name, **kwargs
+                )
+                return validate(response), model
+            except LowConfidenceError as e:
+                if is_last_tier:
+                    return e.result, model
+                error = e
+            except ValueError as e:
+                llm_telemetry.record_parse_failure(self.name)
+                if is_last_tier:
+                    counters["failures"] += 1
+                    raise
+                error = e
+            except Exception:
+                # Timeouts, rate limits and open circuits aren't fixed by a
+                # larger model; escalating would only spend more on an outage
+                counters["failures"] += 1
+                raise
+            finally:
+                counters["latency_seconds_total"] += time.perf_counter() - started
+
+            counters["failures"] += 1
+            counters["escalations"] += 1
+            logger.info(f"{self.name}: escalating from {model} to {self.tiers[index + 1]}: {error}")
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-tier call counts, average latency and escalation rate."""
+        return {
+            model: {
+                "calls": counters["calls"],
+                "failures": counters["failures"],
+                "escalations": counters["escalations"],
+                "escalation_rate": counters["escalations"] / counters["calls"] if counters["calls"] else 0.0,
+                "avg_latency_seconds": (
+                    counters["latency_seconds_total"] / counters["calls"] if counters["calls"] else 0.0
+                ),
+            }
+            for model, counters in self.counters.items()
+        }
+
+
+def get_all_stats() -> Dict[str, Dict[str, dict]]:
+    """Stats of every router, keyed by router name."""
+    return {name: router.stats() for name, router in _routers.items()}
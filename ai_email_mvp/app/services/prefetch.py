@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Tuple
+
+from dotenv import load_dotenv
+from prometheus_client import Counter
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_MAX_EMAILS_PER_REQUEST = int(os.getenv("PREFETCH_MAX_EMAILS_PER_REQUEST", 5))
+# Per-user budget of prefetched emails in a sliding window
+PREFETCH_BUDGET_PER_USER = int(os.getenv("PREFETCH_BUDGET_PER_USER", 50))
+PREFETCH_BUDGET_WINDOW_SECONDS = int(os.getenv("PREFETCH_BUDGET_WINDOW_SECONDS", 3600))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", 4))
+# A prefetch not followed by an open within this long counts as unused
+PREFETCH_TTL_SECONDS = int(os.getenv("PREFETCH_TTL_SECONDS", 1800))
+
+PREFETCH_REQUESTS = Counter(
+    "prefetch_requests_total", "Emails submitted for prefetch, by what happened to them", ["result"]
+)
+PREFETCH_OUTCOMES = Counter(
+    "prefetch_outcomes_total",
+    "Prefetched emails by outcome: hit (opened with the same content), content_changed "
+    "(opened with different content) or unused (never opened); hit rate is hit / total",
+    ["outcome"]
+)
+
+# Runs the speculative work for one email: (user_id, email) -> None
+PrefetchRunner = Callable[[int, object], Awaitable[None]]
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class PrefetchScheduler:
+    """Run speculative extractions in the background, deduplicated and within a per-user budget.
+
+    Each prefetched (user, gmail_id) is remembered with the hash of the content
+    it ran on, so that opening the email can be scored as a hit or a miss.
+    """
+
+    def __init__(
+        self,
+        budget: int = PREFETCH_BUDGET_PER_USER,
+        window_seconds: int = PREFETCH_BUDGET_WINDOW_SECONDS,
+        concurrency: int = PREFETCH_CONCURRENCY,
+        ttl_seconds: int = PREFETCH_TTL_SECONDS
+    ):
+        self.budget = budget
+        self.window_seconds = window_seconds
+        self.ttl_seconds = ttl_seconds
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._spent: Dict[int, Deque[float]] = {}
+        # (user_id, gmail_id) -> (content hash, when it was prefetched)
+        self._prefetched: Dict[Tuple[int, str], Tuple[str, float]] = {}
+        self._tasks = set()
+
+    def _remaining_budget(self, user_id: int, now: float) -> int:
+        spent = self._spent.setdefault(user_id, deque())
+        while spent and now - spent[0] > self.window_seconds:
+            spent.popleft()
+        return self.budget - len(spent)
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, (_, at) in self._prefetched.items() if now - at > self.ttl_seconds]
+        for key in expired:
+            del self._prefetched[key]
+            PREFETCH_OUTCOMES.labels("unused").inc()
+
+    def submit(self, user_id: int, emails: List, run: PrefetchRunner) -> Dict[str, str]:
+        """Schedule prefetches for ``emails`` (objects with ``gmail_id`` and ``content``).
+
+        Returns what happened to each gmail_id: queued, duplicate, over_budget
+        or over_limit (past PREFETCH_MAX_EMAILS_PER_REQUEST).
+        """
+        now = time.monotonic()
+        self._expire(now)
+        results = {}
+        for index, email in enumerate(emails):
+            key = (user_id, email.gmail_id)
+            if email.gmail_id in results:
+                PREFETCH_REQUESTS.labels("duplicate").inc()
+                continue
+            if key in self._prefetched:
+                result = "duplicate"
+            elif index >= PREFETCH_MAX_EMAILS_PER_REQUEST:
+                result = "over_limit"
+            elif self._remaining_budget(user_id, now) <= 0:
+                result = "over_budget"
+            else:
+                result = "queued"
+                self._spent[user_id].append(now)
+                self._prefetched[key] = (content_hash(email.content), now)
+                task = asyncio.create_task(self._run(key, email, run))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            results[email.gmail_id] = result
+            PREFETCH_REQUESTS.labels(result).inc()
+        return results
+
+    async def _run(self, key: Tuple[int, str], email, run: PrefetchRunner) -> None:
+        try:
+            async with self._semaphore:
+                await run(key[0], email)
+        except Exception as e:
+            logger.error(f"Prefetch for {email.gmail_id} failed: {e}")
+            # Forget it, so a later prefetch or open isn't scored against a failed run
+            self._prefetched.pop(key, None)
+
+    def record_open(self, user_id: int, gmail_id: str, content: str) -> None:
+        """Score the prefetch of an email the user has now opened, if there was one."""
+        prefetched = self._prefetched.pop((user_id, gmail_id), None)
+        if prefetched is None:
+            return
+        outcome = "hit" if prefetched[0] == content_hash(content) else "content_changed"
+        PREFETCH_OUTCOMES.labels(outcome).inc()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._tasks),
+            "awaiting_open": len(self._prefetched),
+        }
@@ -0,0 +1,112 @@
+import hashlib
+import logging
+import os
+import re
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.models.thread_state import ThreadState
+from app.utils.tokens import merge_tasks
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+THREAD_STATE_MAX_HASHES = int(os.getenv("THREAD_STATE_MAX_HASHES", 5000))
+THREAD_CONTEXT_MAX_TASKS = int(os.getenv("THREAD_CONTEXT_MAX_TASKS", 30))
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_QUOTE_PREFIX = re.compile(r"^[>\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def split_sentences(content: str) -> List[str]:
+    """Split email text into sentences and lines, dropping quote markers."""
+    sentences = []
+    for part in _SENTENCE_SPLIT.split(content):
+        sentence = _QUOTE_PREFIX.sub("", part).strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def _sentence_hash(sentence: str) -> str:
+    normalized = _WHITESPACE.sub(" ", sentence).lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def get_thread_state(db: Session, user_id: int, thread_id: str) -> Optional[ThreadState]:
+    """Get the stored state of a thread for a user."""
+    return db.query(ThreadState).filter(
+        ThreadState.user_id == user_id,
+        ThreadState.thread_id == thread_id
+    ).first()
+
+
+def get_new_content(state: ThreadState, content: str) -> str:
+    """Return only the sentences of ``content`` not already seen in the thread.
+
+    Quoted history from earlier messages is dropped this way regardless of how
+    the mail client formatted the quote.
+    """
+    seen = set(state.seen_hashes or [])
+    return "\n".join(
+        sentence for sentence in split_sentences(content)
+        if _sentence_hash(sentence) not in seen
+    )
+
+
+def format_known_tasks(state: ThreadState) -> str:
+    """Format the tasks already extracted from a thread as compact prompt context."""
+    lines = []
+    for task in (state.known_tasks or [])[-THREAD_CONTEXT_MAX_TASKS:]:
+        due_date = task.get("due_date") or "no date"
+        lines.append(f"- {task.get('title')} ({due_date}, {task.get('priority', 'medium')})")
+    return "\n".join(lines)
+
+
+def record_message(
+    db: Session,
+    user_id: int,
+    thread_id: str,
+    gmail_id: str,
+    content: str,
+    result: dict
+) -> ThreadState:
+    """Record a processed message and its extraction result in the thread state."""
+    try:
+        state = get_thread_state(db, user_id, thread_id)
+        if not state:
+            state = ThreadState(
+                user_id=user_id,
+                thread_id=thread_id,
+                messages={},
+                known_tasks=[],
+                seen_hashes=[]
+            )
+            db.add(state)
+
+        # JSON columns are replaced rather than mutated so changes are detected
+        seen_hashes = list(state.seen_hashes or [])
+        seen = set(seen_hashes)
+        for sentence in split_sentences(content):
+            sentence_hash = _sentence_hash(sentence)
+            if sentence_hash not in seen:
+                seen.add(sentence_hash)
+                seen_hashes.append(sentence_hash)
+        state.seen_hashes = seen_hashes[-THREAD_STATE_MAX_HASHES:]
+
+        state.messages = {**(state.messages or {}), gmail_id: result}
+        state.known_tasks = merge_tasks([state.known_tasks or [], result.get("tasks", [])])
+
+        db.commit()
+        db.refresh(state)
+        return state
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recording thread state for thread {thread_id}: {e}")
+        raise
@@ -0,0 +1,212 @@
+import calendar
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional
+
+# Due dates are resolved to midnight UTC of the day they name, except ISO
+# timestamps that carry their own time. Relative phrases ("tomorrow", "next
+# Friday") are resolved against a reference time: the ``now`` passed in, else
+# the one set by ``reference_time()`` for the current request, else the clock.
+reference_now: ContextVar[Optional[datetime]] = ContextVar("due_date_reference_now", default=None)
+
+DATE_CACHE_SIZE = 4096
+
+_WEEKDAYS = {
+    "mon": 0, "monday": 0,
+    "tue": 1, "tues": 1, "tuesday": 1,
+    "wed": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3,
+    "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5,
+    "sun": 6, "sunday": 6,
+}
+_MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3,
+    "apr": 4, "april": 4, "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7,
+    "aug": 8, "august": 8, "sep": 9, "sept": 9, "september": 9,
+    "oct": 10, "october": 10, "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+# Longest alternatives first, so "friday" isn't matched as "fri" + "day"
+_WEEKDAY = "|".join(sorted(_WEEKDAYS, key=len, reverse=True))
+_MONTH = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_NUMBER = r"\d+|" + "|".join(_NUMBERS)
+_END_OF_DAY = r"eod|cob|end of (?:the )?day|close of business"
+
+_FILLER = re.compile(r"^(?:(?:due|by|on|before|until|no later than)\s+)+|[.!]+$")
+_SPACES = re.compile(r"\s+")
+_ISO = re.compile(
+    r"^\d{4}-\d{2}-\d{2}(?:[t ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?(?:z|[+-]\d{2}(?::?\d{2})?)?)?$"
+)
+_WEEKDAY_PHRASE = re.compile(
+    rf"^(?:(?:{_END_OF_DAY}),?\s+)?(?:(this|coming|next)\s+)?({_WEEKDAY})\.?(?:,?\s+(?:{_END_OF_DAY}))?$"
+)
+_MONTH_DAY = re.compile(
+    rf"^(?:(?:{_WEEKDAY}),?\s+)?"
+    rf"(?:({_MONTH})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?|(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({_MONTH})\.?)"
+    r"(?:,?\s+(\d{4}))?$"
+)
+_SLASH_DATE = re.compile(r"^(\d{1,2})/(\d{1,2})(?:/(\d{4}|\d{2}))?$")
+_IN_PERIOD = re.compile(rf"^in\s+({_NUMBER})\s+(day|week|month)s?$")
+_PERIOD_FROM_NOW = re.compile(rf"^({_NUMBER})\s+(day|week|month)s?\s+from\s+(?:now|today)$")
+_END_OF_PERIOD = re.compile(r"^end of (?:the )?(this |next )?(week|month)$")
+
+# Phrases that need no pattern: days from the reference date
+_FIXED_OFFSETS = {
+    "today": 0, "asap": 0, "tonight": 0, "now": 0, "immediately": 0,
+    "eod": 0, "cob": 0, "end of day": 0, "end of the day": 0, "close of business": 0,
+    "eod today": 0, "today eod": 0,
+    "tomorrow": 1, "tmrw": 1, "tmr": 1, "tomorrow eod": 1, "eod tomorrow": 1,
+    "day after tomorrow": 2, "the day after tomorrow": 2,
+}
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _end_of_month(day: date) -> date:
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def _number(text: str) -> int:
+    return int(text) if text.isdigit() else _NUMBERS[text]
+
+
+def _calendar_date(month: int, day: int, year: Optional[str], today: date) -> Optional[date]:
+    """A month and day, in the given year or else on their next occurrence from ``today``."""
+    try:
+        if year:
+            return date(int(year) + (2000 if len(year) == 2 else 0), month, day)
+        resolved = date(today.year, month, day)
+        if resolved < today:
+            resolved = date(today.year + 1, month, day)
+        return resolved
+    except ValueError:
+        return None  # Feb 30, or Feb 29 outside a leap year
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _resolve(text: str, today: date) -> Optional[datetime]:
+    """Parse ``text`` relative to ``today``; cached, as task due dates repeat a few phrases."""
+    text = _FILLER.sub("", _SPACES.sub(" ", text.strip().lower())).strip()
+    if not text:
+        return None
+
+    if text in _FIXED_OFFSETS:
+        return _midnight(today + timedelta(days=_FIXED_OFFSETS[text]))
+
+    if _ISO.match(text):
+        try:
+            parsed = datetime.fromisoformat(text.upper())
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
+
+    match = _WEEKDAY_PHRASE.match(text)
+    if match:
+        modifier, weekday = match.groups()
+        days_until = (_WEEKDAYS[weekday] - today.weekday()) % 7
+        if modifier == "next" and days_until == 0:
+            days_until = 7  # "next Friday" on a Friday is a week away
+        return _midnight(today + timedelta(days=days_until))
+
+    match = _MONTH_DAY.match(text)
+    if match:
+        month_first, day_first, day_second, month_second, year = match.groups()
+        month = _MONTHS[month_first or month_second]
+        resolved = _calendar_date(month, int(day_first or day_second), year, today)
+        return _midnight(resolved) if resolved else None
+
+    match = _SLASH_DATE.match(text)
+    if match:
+        month, day, year = match.groups()
+        if not 1 <= int(month) <= 12:
+            return None
+        resolved = _calendar_date(int(month), int(day), year, today)
+        return _midnight(resolved) if resolved else None
+
+    match = _IN_PERIOD.match(text) or _PERIOD_FROM_NOW.match(text)
+    if match:
+        count, unit = _number(match.group(1)), match.group(2)
+        if unit == "month":
+            return _midnight(_add_months(today, count))
+        return _midnight(today + timedelta(days=count * (7 if unit == "week" else 1)))
+
+    if text in ("eow", "this week"):
+        text = "end of week"
+    elif text in ("eom", "this month"):
+        text = "end of month"
+    match = _END_OF_PERIOD.match(text)
+    if match:
+        upcoming, unit = match.groups()
+        if unit == "week":
+            # The working week ends on Friday; at the weekend that is next Friday
+            friday = today + timedelta(days=(4 - today.weekday()) % 7)
+            return _midnight(friday + timedelta(weeks=1 if upcoming == "next " else 0))
+        month = _add_months(today.replace(day=1), 1 if upcoming == "next " else 0)
+        return _midnight(_end_of_month(month))
+
+    if text == "next week":
+        return _midnight(today + timedelta(days=7 - today.weekday()))  # Next Monday
+    if text == "next month":
+        return _midnight(_add_months(today.replace(day=1), 1))
+
+    return None
+
+
+def _reference_date(now: Optional[datetime]) -> date:
+    now = now or reference_now.get() or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    return now.astimezone(timezone.utc).date()
+
+
+def parse_due_date(value: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """Parse a due date into a UTC datetime, or return None if it can't be parsed.
+
+    Handles:
+    - ISO dates and timestamps (2024-12-29, 2024-12-29T17:00:00+02:00)
+    - Calendar dates (Dec 29, 29th December 2024, Friday, Dec 29, 12/29)
+    - Relative days (today, tomorrow, asap, EOD, Friday, next Friday, EOD Friday)
+    - Relative periods (in 2 days, in a week, end of week, next week, end of month)
+    """
+    if not value:
+        return None
+    return _resolve(value, _reference_date(now))
+
+
+def parse_due_dates(values: Iterable[Optional[str]], now: Optional[datetime] = None) -> List[Optional[datetime]]:
+    """Parse a batch of due dates against one reference time, so they agree with each other."""
+    today = _reference_date(now)
+    return [_resolve(value, today) if value else None for value in values]
+
+
+@contextmanager
+def reference_time(now: Optional[datetime] = None) -> Iterator[datetime]:
+    """Resolve every due date parsed in this block against the same ``now``.
+
+    Used around a batch of ``TaskCreate`` schemas, whose validator parses each
+    due date separately.
+    """
+    now = now or datetime.now(timezone.utc)
+    token = reference_now.set(now)
+    try:
+        yield now
+    finally:
+        reference_now.reset(token)
@@ -0,0 +1,164 @@
+import html
+import re
+from typing import List
+
+# Single-pass tokenizer over the raw markup. The regex engine does the scanning,
+# so no DOM tree is built, which is what makes BeautifulSoup slow on large
+# marketing emails.
+_TOKEN = re.compile(
+    r"<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9:-]*)((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>|<![^>]*>|<\?[^>]*>",
+    re.S
+)
+_HTML_HINT = re.compile(r"<(?:html|body|div|p|br|table|span)\b", re.I)
+_CLASS_OR_ID = re.compile(r"\b(?:class|id)\s*=\s*[\"']?([^\"'>]*)", re.I)
+_CITE = re.compile(r"\btype\s*=\s*[\"']?cite", re.I)
+
+# Elements whose content is never visible text
+_HIDDEN_TAGS = {"script", "style", "head", "title", "noscript", "template", "svg"}
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr"
+}
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+    "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "ol",
+    "p", "pre", "section", "table", "tr", "ul"
+}
+# Quoted replies, signatures and reply headers added by Gmail, Outlook,
+# Yahoo and Thunderbird
+_QUOTE_MARKERS = (
+    "gmail_quote", "gmail_signature", "gmail_extra", "yahoo_quoted",
+    "moz-cite-prefix", "moz-signature", "divrplyfwdmsg", "appendonsend",
+    "outlookmessageheader"
+)
+
+_REPLY_HEADER = re.compile(
+    r"^(?:On .{0,200}wrote:|-{2,}\s*Original Message\s*-{2,})$", re.I
+)
+_OUTLOOK_SEPARATOR = re.compile(r"^_{10,}$")
+_FORWARD_MARKER = re.compile(r"^-{2,}\s*Forwarded message\s*-{2,}$", re.I)
+_HEADER_LINE = re.compile(r"^(?:From|Sent|Date|To|Cc|Subject|Reply-To):", re.I)
+_SIGNATURE_DELIMITER = re.compile(r"^--\s*$")
+_MOBILE_SIGNATURE = re.compile(r"^(?:Sent from my \w+|Sent from (?:Mail|Outlook)\b|Get Outlook for \w+)", re.I)
+_BOILERPLATE = re.compile(
+    r"unsubscribe|intended recipient|privileged and confidential|"
+    r"(?:this|the) e-?mail (?:and any attachments )?(?:is|are|may be) confidential|"
+    r"view (?:this email )?in (?:your |a )?browser|manage (?:your )?(?:email )?preferences|"
+    r"privacy policy",
+    re.I
+)
+BOILERPLATE_MAX_CHARS = 600  # Longer paragraphs are kept even if they match
+
+_INLINE_SPACE = re.compile(r"[ \t\r\f\v\xa0\u200b]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def is_html(content: str) -> bool:
+    """Check whether content looks like HTML markup rather than plain text."""
+    return _HTML_HINT.search(content) is not None
+
+
+def _is_quote_container(tag: str, attrs: str) -> bool:
+    if tag == "blockquote" and _CITE.search(attrs):
+        return True
+    for match in _CLASS_OR_ID.finditer(attrs):
+        value = match.group(1).lower()
+        if any(marker in value for marker in _QUOTE_MARKERS):
+            return True
+    return False
+
+
+def html_to_text(content: str) -> str:
+    """Convert HTML to plain text, dropping hidden elements and quoted replies."""
+    parts: List[str] = []
+    position = 0
+    skip_tag = None  # Element currently being skipped, with its nesting depth
+    skip_depth = 0
+
+    for match in _TOKEN.finditer(content):
+        if skip_tag is None and match.start() > position:
+            parts.append(content[position:match.start()])
+        position = match.end()
+
+        tag = match.group(2)
+        if tag is None:  # Comment, doctype or processing instruction
+            continue
+        tag = tag.lower()
+        closing = bool(match.group(1))
+
+        if skip_tag is not None:
+            if tag == skip_tag:
+                skip_depth += -1 if closing else 1
+                if skip_depth == 0:
+                    skip_tag = None
+            continue
+
+        if closing:
+            if tag in _BLOCK_TAGS:
+                parts.append("\n")
+            elif tag == "td" or tag == "th":
+                parts.append(" ")
+            continue
+
+        if tag in _VOID_TAGS:
+            if tag in _BLOCK_TAGS:
+                parts.append("\n")
+            continue
+
+        if tag in _HIDDEN_TAGS or _is_quote_container(tag, match.group(3)):
+            if not match.group(3).rstrip().endswith("/"):
+                skip_tag, skip_depth = tag, 1
+            continue
+
+        if tag in _BLOCK_TAGS:
+            parts.append("\n")
+
+    if skip_tag is None:
+        parts.append(content[position:])
+
+    text = html.unescape("".join(parts))
+    lines = (_INLINE_SPACE.sub(" ", line).strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def strip_quotes_and_signatures(text: str) -> str:
+    """Remove quoted replies, forwarded headers, signatures and legal footers from plain text."""
+    lines = []
+    in_forward_header = False
+    text_lines = text.split("\n")
+    for index, line in enumerate(text_lines):
+        stripped = line.strip()
+        if in_forward_header:
+            if not stripped or _HEADER_LINE.match(stripped):
+                continue
+            in_forward_header = False
+
+        if _OUTLOOK_SEPARATOR.match(stripped):
+            next_line = text_lines[index + 1].strip() if index + 1 < len(text_lines) else ""
+            if _HEADER_LINE.match(next_line):
+                break  # Outlook puts the quoted message's headers below a rule
+        if _REPLY_HEADER.match(stripped) or _SIGNATURE_DELIMITER.match(line):
+            break  # Everything below is quoted history or a signature
+        if _FORWARD_MARKER.match(stripped):
+            in_forward_header = True  # Keep the forwarded body, drop its headers
+            continue
+        if stripped.startswith(">") or _MOBILE_SIGNATURE.match(stripped):
+            continue
+        lines.append(line)
+
+    paragraphs = [
+        paragraph.strip() for paragraph in _BLANK_LINES.split("\n".join(lines))
+        if not (len(paragraph) <= BOILERPLATE_MAX_CHARS and _BOILERPLATE.search(paragraph))
+    ]
+    return "\n\n".join(paragraph for paragraph in paragraphs if paragraph)
+
+
+def clean_email(content: str) -> str:
+    """Turn raw email content into the text worth sending to the model.
+
+    HTML is converted to text, then quoted replies, forwarded headers,
+    signatures and legal or marketing footers are removed. If stripping would
+    leave nothing (e.g. a bare forward), the unstripped text is returned.
+    """
+    text = html_to_text(content) if is_html(content) else content.strip()
+    return strip_quotes_and_signatures(text) or text
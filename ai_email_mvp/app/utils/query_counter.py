@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCount:
+    """SQL statements executed so far inside a ``count_queries()`` block."""
+
+    def __init__(self):
+        self.count = 0
+
+
+current_count: ContextVar[Optional[QueryCount]] = ContextVar("query_count", default=None)
+
+
+# Registered on the Engine class, so every engine (and the sync engine behind
+# each async one) is counted, including those tests create
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = current_count.get()
+    if counter is not None:
+        counter.count += 1
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCount]:
+    """Count the SQL statements executed in this block, e.g. by one request.
+
+    The count follows the context, so concurrent requests or tasks each see
+    only their own queries.
+    """
+    counter = QueryCount()
+    token = current_count.set(counter)
+    try:
+        yield counter
+    finally:
+        current_count.reset(token)
+
+
+class QueryCountMiddleware:
+    """ASGI middleware that counts each request's queries and returns the count in X-Query-Count."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as queries:
+            async def send_with_count(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-query-count", str(queries.count).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_count)
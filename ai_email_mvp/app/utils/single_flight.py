@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into a single execution.
+
+    The first caller for a key starts ``func``; callers arriving while it is
+    still running await the same result (or exception) instead of starting
+    their own. The call is shielded, so one caller disconnecting does not
+    cancel the work the others are waiting on; once every caller has been
+    cancelled, nobody wants the result and the call is cancelled too.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.coalesced = 0  # Calls that joined an execution already in flight
+        self.abandoned = 0  # Calls cancelled because all their callers were
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._waiting: Dict[asyncio.Future, int] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            logger.info(f"{self.name}: joining in-flight call for {key}")
+
+        self._waiting[call] = self._waiting.get(call, 0) + 1
+        try:
+            return await asyncio.shield(call)
+        except asyncio.CancelledError:
+            if self._waiting[call] == 1 and not call.done():
+                self.abandoned += 1
+                logger.info(f"{self.name}: every caller left, cancelling call for {key}")
+                call.cancel()
+            raise
+        finally:
+            self._waiting[call] -= 1
+            if not self._waiting[call]:
+                del self._waiting[call]
+
+    def _forget(self, key: Hashable, call: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            call.exception()  # Mark the exception retrieved if nobody was left waiting
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
@@ -0,0 +1,147 @@
+import re
+import zlib
+from functools import lru_cache
+from typing import List, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a character estimate without tiktoken
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4  # Rough average for English text
+BOUNDARY_MODULUS = 4  # About one in four units may end a chunk early
+
+PRIORITY_RANK = {"high": 3, "medium": 2, "low": 1}
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # Encoding files can't be downloaded, e.g. offline
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """Count the tokens ``model`` would see for ``text``."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+
+def _hard_split(text: str, max_tokens: int, model: str) -> List[str]:
+    """Split text that has no usable boundaries into pieces of at most max_tokens."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        size = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    tokens = encoding.encode(text)
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+def _split_units(text: str, max_tokens: int, model: str) -> List[Tuple[str, int]]:
+    """Split text into paragraphs, or sentences for long paragraphs, with token counts."""
+    units = []
+    for paragraph in _PARAGRAPH_SPLIT.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph, model)
+        if tokens <= max_tokens:
+            units.append((paragraph, tokens))
+            continue
+        for sentence in _SENTENCE_SPLIT.split(paragraph):
+            tokens = count_tokens(sentence, model)
+            if tokens <= max_tokens:
+                units.append((sentence, tokens))
+            else:
+                units.extend(
+                    (piece, count_tokens(piece, model))
+                    for piece in _hard_split(sentence, max_tokens, model)
+                )
+    return units
+
+
+def _is_boundary(unit: str) -> bool:
+    return zlib.crc32(unit.encode("utf-8")) % BOUNDARY_MODULUS == 0
+
+
+def split_into_chunks(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int = 0,
+    model: str = "gpt-4"
+) -> List[str]:
+    """Split text into chunks of at most ``max_tokens``, overlapping by up to ``overlap_tokens``.
+
+    Chunks break on paragraph or sentence boundaries. Besides the size limit, a
+    chunk also ends after a unit whose hash marks it as a boundary, so an edit
+    in one part of a thread leaves the other chunks (and their cache keys) intact.
+    """
+    body_tokens = max(max_tokens - overlap_tokens, 1)
+    min_tokens = body_tokens // 2
+
+    groups = []
+    current, current_tokens = [], 0
+    for unit, tokens in _split_units(text, body_tokens, model):
+        if current and current_tokens + tokens > body_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append((unit, tokens))
+        current_tokens += tokens
+        if current_tokens >= min_tokens and _is_boundary(unit):
+            groups.append(current)
+            current, current_tokens = [], 0
+    if current:
+        groups.append(current)
+
+    chunks = []
+    previous = []
+    for group in groups:
+        # Carry the tail of the previous chunk so tasks spanning a boundary survive
+        overlap, overlap_used = [], 0
+        for unit, tokens in reversed(previous):
+            if overlap_used + tokens > overlap_tokens:
+                break
+            overlap.insert(0, unit)
+            overlap_used += tokens
+        chunks.append("\n\n".join(overlap + [unit for unit, _ in group]))
+        previous = group
+    return chunks
+
+
+def _task_key(task: dict) -> str:
+    return _NON_WORD.sub(" ", str(task.get("title", "")).lower()).strip()
+
+
+def merge_tasks(task_lists: List[List[dict]]) -> List[dict]:
+    """Merge per-chunk task lists, dropping duplicates by normalized title.
+
+    When the same task appears in several chunks, the copy with a due date and
+    the highest priority wins. Tasks keep the order they were first seen in.
+    """
+    merged = {}
+    for tasks in task_lists:
+        for task in tasks:
+            key = _task_key(task)
+            if not key:
+                continue
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = dict(task)
+                continue
+            if not existing.get("due_date") and task.get("due_date"):
+                existing["due_date"] = task["due_date"]
+            if PRIORITY_RANK.get(task.get("priority"), 0) > PRIORITY_RANK.get(existing.get("priority"), 0):
+                existing["priority"] = task["priority"]
+    return list(merged.values())
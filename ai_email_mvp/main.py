@@ -2,16 +2,21 @@ import os
 from dotenv import load_dotenv
 import openai
 from fastapi import FastAPI, Request, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import hashlib
 import json
+import re
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, List
 import logging
 from datetime import datetime, timedelta
-import time
 from pytz import UTC
 from google.oauth2.credentials import Credentials
 
@@ -26,16 +31,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-from app.database import SessionLocal, engine, get_db
+from app.database import Base, SessionLocal, engine, get_async_db, get_db
 from app import models, schemas, crud, auth, oauth
 from app.background_tasks import reminder_background_task
+from app.services import (
+    llm_client, llm_gateway, llm_provider, llm_telemetry,
+    extraction_cache, thread_state, email_classifier, model_router, job_queue, prefetch
+)
+from app.services.model_router import LowConfidenceError
+from app.utils.dates import parse_due_dates, reference_time
+from app.utils.email_cleaner import clean_email
+from app.utils.query_counter import QueryCountMiddleware
+from app.utils.single_flight import SingleFlight
+from app.utils.tokens import count_tokens, split_into_chunks, merge_tasks
 import asyncio
 
 # Initialize FastAPI app
 app = FastAPI()
 
 # Create database tables
-models.Base.metadata.create_all(bind=engine)
+Base.metadata.create_all(bind=engine)
 
 # Add CORS middleware
 app.add_middleware(
@@ -52,17 +67,62 @@ app.add_middleware(
     max_age=3600  # Cache preflight requests for 1 hour
 )
 
+# Report each request's SQL query count in the X-Query-Count header
+app.add_middleware(QueryCountMiddleware)
+
 # Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
+# Replay mode serves recorded responses, so it runs without a key
+if not OPENAI_API_KEY and llm_provider.requires_api_key():
+    logger.error("OPENAI_API_KEY not found in environment variables")
     raise ValueError("No OpenAI API key found. Please set OPENAI_API_KEY in .env file")
 
 # Initialize OpenAI client
 openai.api_key = OPENAI_API_KEY
-if not openai.api_key:
-    logger.error("OPENAI_API_KEY not found in environment variables")
-    raise ValueError("OPENAI_API_KEY not found in environment variables")
+
+# LLM settings; bump a prompt version whenever its prompt changes so cached
+# results for the old prompt are no longer served
+EXTRACTION_MODEL = "gpt-4"
+EXTRACTION_PROMPT_VERSION = "1"
+SUMMARY_MODEL = "gpt-3.5-turbo"
+SUMMARY_PROMPT_VERSION = "1"
+REPLY_MODEL = "gpt-3.5-turbo"
+# Extraction tries the tiers in order and only escalates when the response
+# fails validation or looks low-confidence
+EXTRACTION_MODEL_TIERS = os.getenv("EXTRACTION_MODEL_TIERS", f"gpt-4o-mini,{EXTRACTION_MODEL}").split(",")
+extraction_router = model_router.ModelRouter("extraction", EXTRACTION_MODEL_TIERS)
+# Phrases that suggest an email holds a task even if a model returned none
+ACTION_CUES = re.compile(
+    r"\b(?:deadline|due (?:by|on|date)|no later than|by (?:mon|tues|wednes|thurs|fri|satur|sun)day"
+    r"|by tomorrow|by (?:the )?end of|asap|rsvp|action required|please (?:submit|complete|confirm|send|review))\b",
+    re.I
+)
+# Separates the streamed reply text from its JSON metadata
+REPLY_METADATA_DELIMITER = "<<<METADATA>>>"
+# Long emails are split into overlapping chunks that fit the extraction model
+EXTRACTION_CHUNK_TOKENS = int(os.getenv("EXTRACTION_CHUNK_TOKENS", 3000))
+EXTRACTION_CHUNK_OVERLAP_TOKENS = int(os.getenv("EXTRACTION_CHUNK_OVERLAP_TOKENS", 200))
+EXTRACTION_MAX_CHUNKS = int(os.getenv("EXTRACTION_MAX_CHUNKS", 8))
+# Combined analysis returns tasks, summary and reply from one structured call
+ANALYSIS_MODEL = "gpt-4o"  # Structured outputs need a json_schema capable model
+ANALYSIS_PROMPT_VERSION = "1"
+EMAIL_ANALYSIS_MODE = os.getenv("EMAIL_ANALYSIS_MODE", "separate")  # separate or combined
+# Batch extraction limits
+BATCH_EXTRACTION_CONCURRENCY = int(os.getenv("BATCH_EXTRACTION_CONCURRENCY", 5))
+BATCH_EXTRACTION_MAX_CONCURRENCY = int(os.getenv("BATCH_EXTRACTION_MAX_CONCURRENCY", 20))
+BATCH_EXTRACTION_MAX_EMAILS = int(os.getenv("BATCH_EXTRACTION_MAX_EMAILS", 100))
+# Concurrent duplicate requests for the same (user, gmail_id) share one run
+process_flights = SingleFlight("process")
+# Speculative extraction of the emails a user is likely to open next
+prefetcher = prefetch.PrefetchScheduler()
+# /api/extract queues its work as jobs, run by this pool of workers
+job_workers = job_queue.JobWorkerPool(SessionLocal)
+JOB_EVENTS_POLL_SECONDS = 0.5  # How often the job events stream checks for progress
+# How often long-running endpoints check whether their client has gone away
+CLIENT_DISCONNECT_POLL_SECONDS = 0.25
+# Upper bound for a single stage (extraction, summary, reply) including retries
+LLM_STAGE_TIMEOUT_SECONDS = float(os.getenv("LLM_STAGE_TIMEOUT_SECONDS", 90))
 
 # OAuth endpoints
 @app.get("/api/oauth/url")
@@ -83,7 +143,7 @@ async def get_oauth_url():
 @app.get("/api/oauth/callback")
 async def oauth_callback(
     code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle the OAuth callback."""
     try:
@@ -99,7 +159,7 @@ async def oauth_callback(
 @app.post("/api/oauth/callback")
 async def oauth_callback(
     token_data: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle the OAuth token from Chrome extension."""
     try:
@@ -140,18 +200,18 @@ async def oauth_callback(
         logger.info(f"Got user info for: {user_info['email']}")
         
         # Create or update user
-        user = crud.get_user_by_email(db, user_info['email'])
+        user = await crud.get_user_by_email(db, user_info['email'])
         if not user:
             logger.info("Creating new user")
             user_create = schemas.UserCreate(
                 email=user_info['email'],
                 oauth_token=token
             )
-            user = crud.create_user(db, user_create)
+            user = await crud.create_user(db, user_create)
         else:
             logger.info("Updating existing user")
             user.oauth_token = token
-            db.commit()
+            await db.commit()
         
         # Create access token for our API
         logger.info("Creating access token")
@@ -181,12 +241,12 @@ async def oauth_callback(
 @app.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get an access token using OAuth credentials."""
     try:
         # Verify user exists
-        user = crud.get_user_by_email(db, form_data.username)
+        user = await crud.get_user_by_email(db, form_data.username)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -235,13 +295,18 @@ async def read_root():
 async def options_extract():
     return {"message": "OK"}
 
-@app.post("/api/extract")
+@app.post("/api/extract", status_code=status.HTTP_202_ACCEPTED)
 async def api_extract_tasks(
     request: Request,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)  # Add authentication
 ):
-    """Extract tasks from email content."""
+    """Queue task extraction for an email and return the job right away.
+
+    A worker stores the email, extracts its tasks and creates them. Poll
+    GET /api/jobs/{job_id} or follow GET /api/jobs/{job_id}/events for the
+    result. Submitting the same email again returns the same job.
+    """
     try:
         data = await request.json()
         
@@ -257,55 +322,300 @@ async def api_extract_tasks(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to create tasks for this user"
             )
-        
-        # Create or update email
-        email_data = schemas.EmailCreate(
-            gmail_id=data["gmail_id"],
-            content=data["content"],
-            received_at=data.get("received_at"),
-            subject=data.get("subject"),
-            sender=data.get("sender")
+
+        payload = {
+            field: data.get(field)
+            for field in ("gmail_id", "content", "received_at", "subject", "sender", "headers")
+        }
+        content_hash = hashlib.sha256(data["content"].encode("utf-8")).hexdigest()
+        job, created = await run_in_threadpool(
+            job_queue.enqueue, db, "extract", current_user.id, payload,
+            idempotency_key=f"extract:{current_user.id}:{data['gmail_id']}:{content_hash}"
         )
-        
-        email = crud.create_email(db, email_data, current_user.id)
-        
-        # Extract tasks
-        result = extract_tasks_from_email(email.content)
-        tasks = result.get("tasks", [])
-        suggested_reply = result.get("suggested_reply")
-        
-        # Create tasks
-        created_tasks = []
-        for task in tasks:
-            task_data = schemas.TaskCreate(
+        if created:
+            job_workers.notify()
+        return await run_in_threadpool(job_response, db, job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing task extraction: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+async def run_extract_job(db: Session, payload: dict, user_id: int) -> dict:
+    """Job handler for /api/extract: store the email, extract its tasks and create them.
+
+    Safe to retry: the email is upserted by gmail_id and tasks already stored
+    for it are not inserted again. A failed LLM call fails the attempt so the
+    job is retried.
+    """
+    llm_telemetry.set_current_user(user_id)
+    email = await run_in_threadpool(crud.create_email, db, schemas.EmailCreate(
+        gmail_id=payload["gmail_id"],
+        content=payload["content"],
+        received_at=payload.get("received_at"),
+        subject=payload.get("subject"),
+        sender=payload.get("sender")
+    ), user_id)
+
+    result = await extract_tasks_from_email(
+        email.content, db,
+        subject=payload.get("subject"), sender=payload.get("sender"), headers=payload.get("headers")
+    )
+    if result.get("error"):
+        raise RuntimeError(f"Task extraction failed: {result['error']}")
+    tasks = result.get("tasks", [])
+    if not result.get("pre_classified"):
+        await run_in_threadpool(crud.record_extraction_outcome, db, email.id, len(tasks))
+
+    with reference_time():
+        task_data = [
+            schemas.TaskCreate(
                 title=task["title"],
                 description=task.get("description", task["title"]),  # Use description if available, else title
                 priority=task.get("priority", "medium"),
                 due_date=task.get("due_date"),
-                email_id=email.id,  # Pass email.id
-                user_id=current_user.id
+                email_id=email.id,
+                user_id=user_id
             )
-            created_task = crud.create_task(db, task_data, current_user.id)  # Pass user_id
-            created_tasks.append(created_task)
-        
-        return {
-            "message": f"Successfully extracted {len(created_tasks)} tasks",
-            "tasks": created_tasks,
-            "suggested_reply": suggested_reply
-        }
-        
+            for task in tasks
+        ]
+    task_ids = await run_in_threadpool(crud.create_tasks_bulk, db, task_data, user_id)
+    return {
+        "task_ids": task_ids,
+        "suggested_reply": result.get("suggested_reply")
+    }
+
+def job_response(db: Session, job: models.Job) -> dict:
+    """Describe a job; finished extract jobs include their tasks."""
+    response = {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "status_url": f"/api/jobs/{job.id}",
+        "events_url": f"/api/jobs/{job.id}/events"
+    }
+    if job.status == "succeeded" and job.kind == "extract":
+        tasks = crud.get_tasks_by_ids(db, job.result["task_ids"])
+        response.update(
+            message=f"Successfully extracted {len(tasks)} tasks",
+            tasks=[schemas.Task.model_validate(task).model_dump(mode="json") for task in tasks],
+            suggested_reply=job.result.get("suggested_reply")
+        )
+    return response
+
+def get_user_job(db: Session, job_id: int, user_id: int) -> models.Job:
+    job = db.query(models.Job).filter(models.Job.id == job_id, models.Job.user_id == user_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Get a job's status, and its result once it has succeeded."""
+    job = await run_in_threadpool(get_user_job, db, job_id, current_user.id)
+    return await run_in_threadpool(job_response, db, job)
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Stream a job's progress as Server-Sent Events.
+
+    Sends a ``status`` event whenever the status changes and ends with a
+    ``done`` event (the same body as GET /api/jobs/{job_id}) or a ``failed``
+    event.
+    """
+    await run_in_threadpool(get_user_job, db, job_id, current_user.id)
+
+    async def events():
+        # The request session is closed once streaming starts, so use a dedicated one
+        events_db = SessionLocal()
+        try:
+            last_status = None
+            while True:
+                job = await run_in_threadpool(events_db.get, models.Job, job_id, populate_existing=True)
+                if job.status in job_queue.FINISHED_STATUSES:
+                    event = "done" if job.status == "succeeded" else "failed"
+                    yield format_sse(event, await run_in_threadpool(job_response, events_db, job))
+                    return
+                if job.status != last_status:
+                    last_status = job.status
+                    yield format_sse("status", {"job_id": job.id, "status": job.status, "attempts": job.attempts})
+                await run_in_threadpool(events_db.rollback)  # End the read transaction so the next poll sees new commits
+                await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+        finally:
+            events_db.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/jobs/{job_id}/retry", status_code=status.HTTP_202_ACCEPTED)
+async def retry_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Queue a failed job again. Jobs that haven't failed are returned unchanged."""
+    job = await run_in_threadpool(get_user_job, db, job_id, current_user.id)
+    job = await run_in_threadpool(job_queue.retry, db, job)
+    job_workers.notify()
+    return await run_in_threadpool(job_response, db, job)
+
+@app.options("/api/extract/batch")
+async def options_extract_batch():
+    return {"message": "OK"}
+
+@app.post("/api/extract/batch")
+async def api_extract_tasks_batch(
+    batch: schemas.BatchExtractRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Extract tasks from several emails, streaming one NDJSON line per email as it completes."""
+    try:
+        # Verify user has access
+        if current_user.email != batch.user_email:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to create tasks for this user"
+            )
+
+        if len(batch.emails) > BATCH_EXTRACTION_MAX_EMAILS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many emails in batch (max {BATCH_EXTRACTION_MAX_EMAILS})"
+            )
+
+        # Deduplicate by gmail_id, keeping the last copy of each email
+        unique_emails = {email_data.gmail_id: email_data for email_data in batch.emails}
+
+        # Create or update the emails before streaming starts
+        stored_emails = []
+        for email_data in unique_emails.values():
+            email_create = schemas.EmailCreate(
+                gmail_id=email_data.gmail_id,
+                content=email_data.content,
+                subject=email_data.subject,
+                sender=email_data.sender,
+                received_at=email_data.received_at or datetime.now(timezone.utc)
+            )
+            email = await run_in_threadpool(crud.create_email, db, email_create, current_user.id)
+            stored_emails.append((email.id, email_data))
+
+        concurrency = min(
+            batch.max_concurrency or BATCH_EXTRACTION_CONCURRENCY,
+            BATCH_EXTRACTION_MAX_CONCURRENCY
+        )
+        return StreamingResponse(
+            stream_batch_extraction(stored_emails, current_user.id, concurrency),
+            media_type="application/x-ndjson"
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error extracting tasks: {e}")
+        logger.error(f"Error starting batch extraction: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+async def stream_batch_extraction(stored_emails: list, user_id: int, concurrency: int):
+    """Run extractions with bounded concurrency and yield an NDJSON line per finished email."""
+    semaphore = asyncio.Semaphore(concurrency)
+    llm_telemetry.set_current_user(user_id)
+    # Bulk work must not slow down users waiting on the sidebar
+    llm_gateway.set_lane("backfill")
+    # The request session is closed once streaming starts, so use a dedicated
+    # one. Only the loop below writes through it; each extraction runs
+    # concurrently on its own session.
+    db = SessionLocal(expire_on_commit=False)
+
+    async def extract_one(email_id: int, email_data: schemas.BatchExtractEmail):
+        try:
+            async with semaphore:
+                with SessionLocal() as extract_db:
+                    result = await extract_tasks_from_email(
+                        email_data.content, extract_db,
+                        subject=email_data.subject, sender=email_data.sender, headers=email_data.headers
+                    )
+            return email_id, email_data.gmail_id, result, None
+        except Exception as e:
+            return email_id, email_data.gmail_id, None, e
+
+    pending = [
+        asyncio.create_task(extract_one(email_id, email_data))
+        for email_id, email_data in stored_emails
+    ]
+    try:
+        for next_done in asyncio.as_completed(pending):
+            email_id, gmail_id, result, error = await next_done
+            line = {"gmail_id": gmail_id}
+            try:
+                if error:
+                    raise error
+                with reference_time():
+                    task_data = [
+                        schemas.TaskCreate(
+                            title=task["title"],
+                            description=task.get("description", task["title"]),
+                            priority=task.get("priority", "medium"),
+                            due_date=task.get("due_date"),
+                            email_id=email_id,
+                            user_id=user_id
+                        )
+                        for task in result.get("tasks", [])
+                    ]
+                task_ids = await run_in_threadpool(crud.create_tasks_bulk, db, task_data, user_id)
+                created_tasks = await run_in_threadpool(crud.get_tasks_by_ids, db, task_ids)
+                if not result.get("pre_classified") and not result.get("error"):
+                    await run_in_threadpool(crud.record_extraction_outcome, db, email_id, len(task_data))
+                line.update({
+                    "status": "ok",
+                    "tasks": [
+                        {
+                            "id": task.id,
+                            "title": task.title,
+                            "description": task.description,
+                            "priority": task.priority,
+                            "due_date": task.deadline,
+                            "status": task.status
+                        } for task in created_tasks
+                    ],
+                    "suggested_reply": result.get("suggested_reply")
+                })
+            except Exception as e:
+                logger.error(f"Error extracting tasks for email {gmail_id}: {e}")
+                line.update({"status": "error", "error": str(e)})
+            yield json.dumps(line, default=str) + "\n"
+    finally:
+        # Stop outstanding extractions if the client goes away mid-stream
+        if any(not task.done() for task in pending):
+            llm_telemetry.record_cancellation("extract_batch")
+        for task in pending:
+            task.cancel()
+        db.close()
+
 @app.get("/api/tasks/{user_email}")
 async def get_user_tasks(
     user_email: str,
     filter_params: schemas.TaskFilter = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Get tasks for a user with optional filtering."""
@@ -317,7 +627,15 @@ async def get_user_tasks(
                 detail="Not authorized to access these tasks"
             )
         
-        tasks = crud.get_user_tasks(db, user_email, filter_params)
+        filter_params = filter_params or schemas.TaskFilter()
+        tasks = await crud.filter_tasks(
+            db, current_user.id,
+            status=filter_params.status,
+            priority=filter_params.priority,
+            due_after=filter_params.due_date_start,
+            due_before=filter_params.due_date_end,
+            search=filter_params.search_query
+        )
         return {"tasks": tasks}
     except Exception as e:
         logger.error(f"Error getting tasks: {e}")
@@ -330,10 +648,10 @@ async def get_user_tasks(
 async def update_task_status(
     task_id: int,
     task_update: schemas.TaskUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        updated_task = crud.update_task(db, task_id, task_update)
+        updated_task = await crud.update_task(db, task_id, task_update)
         if not updated_task:
             raise HTTPException(status_code=404, detail="Task not found")
             
@@ -343,9 +661,8 @@ async def update_task_status(
             "description": updated_task.description,
             "priority": updated_task.priority,
             "status": updated_task.status,
-            "due_date": updated_task.due_date,
-            "reminder_time": updated_task.reminder_time,
-            "completed_at": updated_task.completed_at,
+            "due_date": updated_task.deadline,
+            "completed_at": updated_task.completion_date,
             "updated_at": updated_task.updated_at
         }
     except Exception as e:
@@ -353,10 +670,10 @@ async def update_task_status(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/tasks/{task_id}/confirm")
-async def confirm_task(task_id: int, db: Session = Depends(get_db)):
+async def confirm_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
         task_update = schemas.TaskUpdate(status=schemas.TaskStatus.completed)
-        updated_task = crud.update_task(db, task_id, task_update)
+        updated_task = await crud.update_task(db, task_id, task_update)
         if not updated_task:
             raise HTTPException(status_code=404, detail="Task not found")
         
@@ -366,10 +683,10 @@ async def confirm_task(task_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/tasks/{task_id}/reject")
-async def reject_task(task_id: int, db: Session = Depends(get_db)):
+async def reject_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
         task_update = schemas.TaskUpdate(status=schemas.TaskStatus.deleted)
-        updated_task = crud.update_task(db, task_id, task_update)
+        updated_task = await crud.update_task(db, task_id, task_update)
         if not updated_task:
             raise HTTPException(status_code=404, detail="Task not found")
         
@@ -380,7 +697,7 @@ async def reject_task(task_id: int, db: Session = Depends(get_db)):
 
 # Team Management Endpoints
 @app.post("/api/teams")
-async def create_team(request: Request, db: Session = Depends(get_db)):
+async def create_team(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         data = await request.json()
         logger.info(f"Creating team with data: {data}")
@@ -392,7 +709,7 @@ async def create_team(request: Request, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="User email is required")
         
         # Get user from email
-        user = crud.get_user_by_email(db, data['user_email'])
+        user = await crud.get_user_by_email(db, data['user_email'])
         logger.info(f"Found user: {user}")
         if not user:
             logger.error(f"User not found for email: {data['user_email']}")
@@ -406,7 +723,7 @@ async def create_team(request: Request, db: Session = Depends(get_db)):
         )
         logger.info(f"Creating team: {team.__dict__}")
         db.add(team)
-        db.flush()  # Get team ID
+        await db.flush()  # Get team ID
         
         # Add creator as admin
         admin_member = models.TeamMember(
@@ -421,7 +738,7 @@ async def create_team(request: Request, db: Session = Depends(get_db)):
         for member_email in data.get('members', []):
             logger.info(f"Processing member: {member_email}")
             # Get or create member user
-            member_user = crud.get_user_by_email(db, member_email)
+            member_user = await crud.get_user_by_email(db, member_email)
             if not member_user:
                 logger.info(f"Creating new user for member: {member_email}")
                 member_user = models.User(
@@ -431,7 +748,7 @@ async def create_team(request: Request, db: Session = Depends(get_db)):
                     token_expiry=None
                 )
                 db.add(member_user)
-                db.flush()
+                await db.flush()
             
             team_member = models.TeamMember(
                 team_id=team.id,
@@ -441,7 +758,7 @@ async def create_team(request: Request, db: Session = Depends(get_db)):
             logger.info(f"Adding team member: {team_member.__dict__}")
             db.add(team_member)
         
-        db.commit()
+        await db.commit()
         logger.info("Team created successfully")
         
         return {"message": "Team created successfully", "team_id": team.id}
@@ -453,7 +770,7 @@ async def create_team(request: Request, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/teams")
-async def get_teams(request: Request, db: Session = Depends(get_db)):
+async def get_teams(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         # Get user email from query params or headers
         user_email = request.query_params.get('user_email')
@@ -461,17 +778,12 @@ async def get_teams(request: Request, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="User email is required")
         
         # Get user's teams
-        user = crud.get_user_by_email(db, user_email)
+        user = await crud.get_user_by_email(db, user_email)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Get teams where user is a member
-        teams = db.query(models.Team).join(
-            models.TeamMember,
-            models.Team.id == models.TeamMember.team_id
-        ).filter(
-            models.TeamMember.user_id == user.id
-        ).all()
+        # Get teams where user is a member, with their members loaded
+        teams = await crud.get_user_teams(db, user.id, with_members=True)
         
         return [{
             "id": team.id,
@@ -486,9 +798,9 @@ async def get_teams(request: Request, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/teams/{team_id}/members")
-async def get_team_members(team_id: int, db: Session = Depends(get_db)):
+async def get_team_members(team_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        team = db.query(models.Team).filter(models.Team.id == team_id).first()
+        team = await crud.get_team_with_members(db, team_id)
         if not team:
             raise HTTPException(status_code=404, detail="Team not found")
         
@@ -509,13 +821,13 @@ async def get_team_members(team_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/teams/{team_id}")
-async def update_team(team_id: int, request: Request, db: Session = Depends(get_db)):
+async def update_team(team_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         data = await request.json()
         logger.info(f"Updating team {team_id} with data: {data}")
         
         # Get team
-        team = db.query(models.Team).filter(models.Team.id == team_id).first()
+        team = await db.get(models.Team, team_id)
         if not team:
             raise HTTPException(status_code=404, detail="Team not found")
         
@@ -526,45 +838,35 @@ async def update_team(team_id: int, request: Request, db: Session = Depends(get_
         # Update members if provided
         if 'members' in data:
             # Remove existing members except admin
-            db.query(models.TeamMember).filter(
+            await db.execute(delete(models.TeamMember).where(
                 models.TeamMember.team_id == team_id,
                 models.TeamMember.role != 'admin'
-            ).delete()
+            ))
             
-            # Get admin member
-            admin_member = db.query(models.TeamMember).filter(
+            # Get admin's email
+            admin_email = await db.scalar(select(models.User.email).join(
+                models.TeamMember,
+                models.TeamMember.user_id == models.User.id
+            ).where(
                 models.TeamMember.team_id == team_id,
                 models.TeamMember.role == 'admin'
-            ).first()
+            ).limit(1))
             
-            # Add new members
-            for member_email in data['members']:
-                # Skip if this is the admin's email
-                if admin_member and member_email == admin_member.user.email:
-                    continue
-                    
-                # Get or create member user
-                member_user = crud.get_user_by_email(db, member_email)
-                if not member_user:
-                    member_user = models.User(
-                        email=member_email,
-                        oauth_token="",
-                        refresh_token=None,
-                        token_expiry=None
-                    )
-                    db.add(member_user)
-                    db.flush()
-                
-                # Add as team member
-                team_member = models.TeamMember(
+            # Add new members, skipping the admin, with all users fetched or created at once
+            member_emails = [email for email in dict.fromkeys(data['members']) if email != admin_email]
+            member_users = await crud.get_or_create_users_by_email(db, member_emails)
+            db.add_all([
+                models.TeamMember(
                     team_id=team_id,
-                    user_id=member_user.id,
+                    user_id=member_users[member_email].id,
                     role='member'
                 )
-                db.add(team_member)
+                for member_email in member_emails
+            ])
         
         # Commit changes
-        db.commit()
+        await db.commit()
+        team = await crud.get_team_with_members(db, team_id)
         
         # Return updated team data
         return {
@@ -578,35 +880,35 @@ async def update_team(team_id: int, request: Request, db: Session = Depends(get_
         
     except Exception as e:
         logger.error(f"Error updating team: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/teams/{team_id}")
-async def delete_team(team_id: int, db: Session = Depends(get_db)):
+async def delete_team(team_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
         # Get team
-        team = db.query(models.Team).filter(models.Team.id == team_id).first()
+        team = await db.get(models.Team, team_id)
         if not team:
             raise HTTPException(status_code=404, detail="Team not found")
 
         # Delete team members first
-        db.query(models.TeamMember).filter(models.TeamMember.team_id == team_id).delete()
+        await db.execute(delete(models.TeamMember).where(models.TeamMember.team_id == team_id))
         
         # Delete team
-        db.query(models.Team).filter(models.Team.id == team_id).delete()
+        await db.execute(delete(models.Team).where(models.Team.id == team_id))
         
         # Commit changes
-        db.commit()
+        await db.commit()
         
         return {"message": "Team deleted successfully"}
         
     except Exception as e:
         logger.error(f"Error deleting team: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/users")
-async def create_user(request: Request, db: Session = Depends(get_db)):
+async def create_user(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Create a new user."""
     try:
         data = await request.json()
@@ -630,7 +932,7 @@ async def create_user(request: Request, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail=str(e))
             
         # Check for existing user
-        existing_user = crud.get_user_by_email(db, data['email'])
+        existing_user = await crud.get_user_by_email(db, data['email'])
         if existing_user:
             raise HTTPException(
                 status_code=409,
@@ -638,7 +940,7 @@ async def create_user(request: Request, db: Session = Depends(get_db)):
             )
             
         # Create new user
-        user = crud.create_user(db, user_data)
+        user = await crud.create_user(db, user_data)
         return {
             "status": "success",
             "user": {
@@ -670,23 +972,23 @@ async def create_test_tasks(
 async def set_task_reminder(
     task_id: int,
     reminder: schemas.ReminderCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Set or update a reminder for a task."""
     try:
         # Get the task
-        task = crud.get_task(db, task_id)
+        task = await crud.get_task(db, task_id)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
             
         # Verify task ownership
-        if task.user_id != current_user.id:
+        if task.created_by != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized to modify this task")
             
         # Update task with reminder (reminder_time is already validated and converted to UTC in the schema)
         task_update = schemas.TaskUpdate(reminder_time=reminder.reminder_time)
-        updated_task = crud.update_task(db, task_id, task_update)
+        updated_task = await crud.update_task(db, task_id, task_update, current_user.id)
         
         return {"message": "Reminder set successfully", "task": updated_task}
         
@@ -700,23 +1002,23 @@ async def set_task_reminder(
 @app.delete("/api/tasks/{task_id}/reminder")
 async def remove_task_reminder(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Remove a reminder from a task."""
     try:
         # Get the task
-        task = crud.get_task(db, task_id)
+        task = await crud.get_task(db, task_id)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
             
         # Verify task ownership
-        if task.user_id != current_user.id:
+        if task.created_by != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized to modify this task")
             
         # Remove reminder
         task_update = schemas.TaskUpdate(reminder_time=None)
-        updated_task = crud.update_task(db, task_id, task_update)
+        updated_task = await crud.update_task(db, task_id, task_update, current_user.id)
         
         return {"message": "Reminder removed successfully", "task": updated_task}
         
@@ -746,7 +1048,7 @@ async def get_pending_reminders(
             
         # Get tasks with pending reminders
         try:
-            tasks = crud.get_tasks_with_reminders(db, current_user.id)
+            tasks = await run_in_threadpool(crud.get_tasks_with_reminders, db, current_user.id)
             logger.info(f"Found {len(tasks)} reminders for user {current_user.id}")
         except Exception as e:
             logger.error(f"Database error getting reminders: {str(e)}")
@@ -789,245 +1091,507 @@ async def options_process_email():
 @app.post("/api/emails/current/process", response_model=schemas.EmailProcessResponse)
 async def process_current_email(
     email_data: schemas.CurrentEmailProcess,
+    request: Request,
     current_user: schemas.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Process the current email and return tasks and suggestions."""
+    """Process the current email and return tasks and suggestions.
+
+    Concurrent requests for the same user and gmail_id share one processing
+    run instead of each calling the LLM and inserting their own tasks. The run
+    is cancelled if every client waiting on it disconnects.
+    """
     try:
-        # Create email in database
-        email_create = schemas.EmailCreate(
-            gmail_id=email_data.gmail_id,
-            thread_id=email_data.thread_id,
-            subject=email_data.subject,
-            sender=email_data.sender,
-            content=email_data.content,
-            received_at=datetime.now(timezone.utc)
-        )
-        email = crud.create_email(db=db, email=email_create, user_id=current_user.id)
-        
-        # Extract tasks using existing functionality
-        ai_result = extract_tasks_from_email(email_data.content)
-        tasks = ai_result.get("tasks", [])
-        suggested_reply = ai_result.get("suggested_reply")
+        async def process() -> dict:
+            # Runs once per in-flight (user, gmail_id), on its own session so the
+            # result can be shared with duplicate requests
+            flight_db = SessionLocal()
+            llm_telemetry.set_current_user(current_user.id)
+            try:
+                return await process_email(email_data, current_user.id, flight_db)
+            finally:
+                flight_db.close()
 
-        # Create tasks
-        created_tasks = []
-        for task in tasks:
-            task_data = schemas.TaskCreate(
-                title=task["title"],
-                description=task.get("description"),
-                priority=task.get("priority", "medium"),
-                due_date=task.get("due_date"),
-                email_id=email.id,
-                user_id=current_user.id
-            )
-            created_task = crud.create_task(db=db, task=task_data, user_id=current_user.id)
-            created_tasks.append(created_task)
-
-        # Generate a summary using OpenAI
-        summary_prompt = f"Summarize this email in 2-3 sentences:\n\n{email_data.content}"
-        client = openai.OpenAI()
-        summary_response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes emails concisely."},
-                {"role": "user", "content": summary_prompt}
-            ]
+        prefetcher.record_open(current_user.id, email_data.gmail_id, email_data.content)
+        outcome = await run_while_connected(
+            request,
+            process_flights.do((current_user.id, email_data.gmail_id), process),
+            "process_current_email"
         )
-        summary = summary_response.choices[0].message.content.strip()
-
         return {
-            "tasks": created_tasks,
-            "suggested_reply": suggested_reply,
-            "summary": summary
+            "tasks": await run_in_threadpool(crud.get_tasks_by_ids, db, outcome["task_ids"]),
+            "suggested_reply": outcome["suggested_reply"],
+            "summary": outcome["summary"]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing email: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing email: {str(e)}")
 
+@app.post("/api/emails/prefetch", status_code=status.HTTP_202_ACCEPTED)
+async def prefetch_emails(
+    prefetch_request: schemas.PrefetchRequest,
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Warm the extraction and summary caches for emails the user is likely to open next.
+
+    The work runs in the background on the backfill lane, so it never delays
+    interactive requests. Emails already prefetched or past the user's budget
+    are skipped. A prefetch only pays off if each email has the gmail_id and
+    full body that opening it will send to /api/emails/current/process.
+    """
+    if not prefetch.PREFETCH_ENABLED:
+        return {"emails": {email.gmail_id: "disabled" for email in prefetch_request.emails}}
+    return {"emails": prefetcher.submit(current_user.id, prefetch_request.emails, prefetch_email)}
+
+async def prefetch_email(user_id: int, email: schemas.PrefetchEmail) -> None:
+    """Run the extraction and summary that opening ``email`` would, without storing anything else."""
+    if process_flights.in_flight((user_id, email.gmail_id)):
+        return  # The user opened it already
+    llm_telemetry.set_current_user(user_id)
+    llm_gateway.set_lane("backfill")
+    stages = [run_on_own_session(lambda db: summarize_email(email.content, db))]
+    if email.thread_id:
+        stages.append(run_on_own_session(lambda db: extract_thread_tasks(
+            email.content, email.gmail_id, email.thread_id, user_id, db,
+            subject=email.subject, sender=email.sender, headers=email.headers, record=False
+        )))
+    else:
+        stages.append(run_on_own_session(lambda db: extract_tasks_from_email(
+            email.content, db, subject=email.subject, sender=email.sender, headers=email.headers
+        )))
+    await asyncio.gather(*stages)
+
 @app.post("/api/emails/current/reply", response_model=schemas.EmailReplyResponse)
 async def generate_email_reply(
     reply_data: schemas.CurrentEmailReply,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Generate AI reply for current email."""
+    llm_telemetry.set_current_user(current_user.id)
     try:
-        # Construct the prompt for reply generation
-        context = reply_data.context if reply_data.context else ""
-        prompt = f"""
-        Generate a professional email reply. Here's the context:
-        
-        Original Email:
-        {reply_data.content}
-        
-        Additional Context (if any):
-        {context}
-        
-        Generate a reply that is:
-        1. Professional and courteous
-        2. Addresses key points from the original email
-        3. Clear and concise
-        4. Maintains appropriate tone
-        
-        Also identify:
-        1. The tone of your reply
-        2. Key points being addressed
-        """
-
-        # Get response from OpenAI
-        client = openai.OpenAI()
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a professional email assistant."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-
-        # Parse the response to extract reply, tone, and key points
-        full_response = response.choices[0].message.content.strip()
-        
-        # Split the response into sections (assuming AI formats it properly)
-        sections = full_response.split("\n\n")
-        suggested_reply = sections[0].strip()
-        
-        # Extract tone and key points from the remaining sections
-        tone = "professional"  # default
-        key_points = []
-        
-        for section in sections[1:]:
-            if "tone:" in section.lower():
-                tone = section.split(":", 1)[1].strip()
-            elif "key points:" in section.lower():
-                points = section.split(":", 1)[1].strip()
-                key_points = [point.strip("- ") for point in points.split("\n") if point.strip()]
+        analysis_mode = reply_data.analysis_mode or EMAIL_ANALYSIS_MODE
+        if analysis_mode == schemas.AnalysisMode.combined:
+            analysis = await run_while_connected(
+                request, analyze_email(reply_data.content, reply_data.context, db), "generate_email_reply"
+            )
+            return {
+                "suggested_reply": analysis["suggested_reply"] or "",
+                "tone": analysis["tone"],
+                "key_points_addressed": analysis["key_points"]
+            }
 
-        return {
-            "suggested_reply": suggested_reply,
-            "tone": tone,
-            "key_points_addressed": key_points
-        }
+        return await run_while_connected(
+            request, generate_reply(reply_data.content, reply_data.context), "generate_email_reply"
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating email reply: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating email reply: {str(e)}")
 
+@app.post("/api/emails/current/reply/stream")
+async def stream_email_reply(
+    reply_data: schemas.CurrentEmailReply,
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Stream an AI reply for the current email as Server-Sent Events.
+
+    Sends a ``token`` event per chunk of reply text, then a ``done`` event with
+    the full reply, tone and key points (or an ``error`` event on failure).
+    """
+    llm_telemetry.set_current_user(current_user.id)
+    return StreamingResponse(
+        stream_reply_events(reply_data.content, reply_data.context),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/llm/stats")
+async def get_llm_stats(current_user: models.User = Depends(auth.get_current_user)):
+    """Model router tier stats and per-model gateway state (concurrency limit, circuit)."""
+    return {
+        "routers": model_router.get_all_stats(),
+        "gateways": llm_gateway.get_all_stats(),
+        "prefetch": prefetcher.stats()
+    }
+
+@app.get("/api/llm/usage")
+async def get_llm_usage(
+    days: int = 30,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """The current user's LLM calls, tokens and estimated cost per day and model."""
+    # Include usage that hasn't been written to the ledger yet
+    await run_in_threadpool(llm_telemetry.flush_usage, db)
+    rows = await run_in_threadpool(llm_telemetry.get_user_usage, db, current_user.id, days)
+    return {
+        "total_cost_usd": round(sum(row.cost_usd for row in rows), 6),
+        "days": [
+            {
+                "day": row.day.isoformat(),
+                "model": row.model,
+                "calls": row.calls,
+                "prompt_tokens": row.prompt_tokens,
+                "completion_tokens": row.completion_tokens,
+                "cost_usd": round(row.cost_usd, 6)
+            }
+            for row in rows
+        ]
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: LLM latency, queue wait, tokens, cost, retries and cache hits."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks when the application starts."""
     asyncio.create_task(reminder_background_task())
     logger.info("Started reminder background task")
+    asyncio.create_task(llm_telemetry.usage_flush_task(SessionLocal))
+    logger.info("Started LLM usage ledger task")
+    asyncio.create_task(email_classifier.retrain_task(SessionLocal))
+    logger.info("Started email pre-classifier training task")
+    asyncio.create_task(extraction_cache.eviction_task(SessionLocal))
+    logger.info("Started extraction cache eviction task")
+    job_workers.register("extract", run_extract_job)
+    job_workers.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the job workers; jobs they were running go back to the queue."""
+    await job_workers.stop()
+
+async def run_while_connected(request: Request, coro, endpoint: str):
+    """Await ``coro``, cancelling it if the client disconnects first.
+
+    Cancelling it cancels its outstanding LLM calls, freeing their gateway
+    slots, and rolls back database work it hasn't committed. Raises a 499
+    HTTPException once the client is gone.
+    """
+    work = asyncio.ensure_future(coro)
+
+    async def wait_for_disconnect():
+        while not await request.is_disconnected():
+            await asyncio.sleep(CLIENT_DISCONNECT_POLL_SECONDS)
+
+    watcher = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        done, _ = await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        work.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    # If checking for a disconnect failed, keep waiting on the work
+    if work not in done and watcher.exception() is None:
+        work.cancel()
+        llm_telemetry.record_cancellation(endpoint)
+        logger.info(f"Client disconnected from {endpoint}; cancelled its LLM work")
+        raise HTTPException(status_code=499, detail="Client closed request")
+    return await work
+
+async def run_llm_stage(name: str, coro, default, timeout: float = None):
+    """Await one LLM stage, returning ``default`` if it fails or times out.
+
+    Cancellation is not swallowed, so a cancelled request still cancels the stage.
+    """
+    if timeout is None:
+        timeout = LLM_STAGE_TIMEOUT_SECONDS
+    try:
+        async with asyncio.timeout(timeout):
+            return await coro
+    except TimeoutError:
+        logger.error(f"{name} timed out after {timeout}s")
+    except Exception as e:
+        logger.error(f"{name} failed: {str(e)}")
+    return default
+
+async def run_on_own_session(stage):
+    """Await ``stage(db)`` with a session of its own.
+
+    Concurrent stages must not share a session: it isn't safe to use from
+    several tasks at once.
+    """
+    db = SessionLocal()
+    try:
+        return await stage(db)
+    finally:
+        db.close()
+
+async def process_email(email_data: schemas.CurrentEmailProcess, user_id: int, db: Session) -> dict:
+    """Store an email, run its LLM stages and create its tasks.
+
+    Returns the created task IDs with the suggested reply and summary.
+    """
+    # Create email in database
+    email_create = schemas.EmailCreate(
+        gmail_id=email_data.gmail_id,
+        thread_id=email_data.thread_id,
+        subject=email_data.subject,
+        sender=email_data.sender,
+        content=email_data.content,
+        received_at=datetime.now(timezone.utc)
+    )
+    email = await run_in_threadpool(crud.create_email, db, email_create, user_id)
+
+    analysis_mode = email_data.analysis_mode or EMAIL_ANALYSIS_MODE
+    if analysis_mode == schemas.AnalysisMode.combined:
+        # One structured call returns tasks, summary and reply together
+        analysis = await run_llm_stage(
+            "Email analysis",
+            analyze_email(email_data.content, db=db),
+            default=EMPTY_ANALYSIS
+        )
+        tasks = analysis["tasks"]
+        suggested_reply = analysis["suggested_reply"]
+        summary = analysis["summary"]
+    else:
+        # Run extraction, summary and the optional reply concurrently. Each stage
+        # falls back to an empty result on failure or timeout, and all of them are
+        # cancelled together if processing itself is cancelled. The stages use
+        # sessions of their own; tasks are stored on ``db`` once they have joined.
+        async with asyncio.TaskGroup() as task_group:
+            extraction_stage = task_group.create_task(run_llm_stage(
+                "Task extraction",
+                run_on_own_session(lambda stage_db: extract_thread_tasks(
+                    email_data.content, email_data.gmail_id, email_data.thread_id,
+                    user_id, stage_db,
+                    subject=email_data.subject, sender=email_data.sender,
+                    headers=email_data.headers
+                )),
+                default={"tasks": [], "suggested_reply": None}
+            ))
+            summary_stage = task_group.create_task(run_llm_stage(
+                "Summary",
+                run_on_own_session(lambda stage_db: summarize_email(email_data.content, stage_db)),
+                default=None
+            ))
+            reply_stage = None
+            if email_data.include_reply:
+                reply_stage = task_group.create_task(run_llm_stage(
+                    "Reply generation",
+                    generate_reply(email_data.content),
+                    default=None
+                ))
+
+        ai_result = extraction_stage.result()
+        tasks = ai_result.get("tasks", [])
+        suggested_reply = ai_result.get("suggested_reply")
+        if not ai_result.get("pre_classified") and not ai_result.get("error"):
+            await run_in_threadpool(crud.record_extraction_outcome, db, email.id, len(tasks))
+        if reply_stage and reply_stage.result():
+            suggested_reply = reply_stage.result()["suggested_reply"]
+        summary = summary_stage.result()
 
-def parse_due_date(due_date_str: str) -> Optional[datetime]:
-    """Parse a date string into a datetime object.
+    # Create tasks
+    with reference_time():
+        task_data = [
+            schemas.TaskCreate(
+                title=task["title"],
+                description=task.get("description"),
+                priority=task.get("priority", "medium"),
+                due_date=task.get("due_date"),
+                email_id=email.id,
+                user_id=user_id
+            )
+            for task in tasks
+        ]
+    task_ids = await run_in_threadpool(crud.create_tasks_bulk, db, task_data, user_id)
+
+    return {
+        "task_ids": task_ids,
+        "suggested_reply": suggested_reply,
+        "summary": summary
+    }
+
+async def summarize_email(content: str, db: Optional[Session] = None) -> str:
+    """Summarize an email in 2-3 sentences, reusing a cached summary if available."""
+    cache_key = None
+    if db is not None:
+        cache_key = extraction_cache.make_cache_key(
+            content, SUMMARY_MODEL, SUMMARY_PROMPT_VERSION, kind="summary"
+        )
+        cached_result = extraction_cache.get_cached_result(db, cache_key, kind="summary")
+        if cached_result is not None:
+            logger.info("Summary cache hit")
+            return cached_result["summary"]
+
+    summary_prompt = f"Summarize this email in 2-3 sentences:\n\n{content}"
+    summary = await llm_client.chat_completion(
+        model=SUMMARY_MODEL,
+        operation="summary",
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant that summarizes emails concisely."},
+            {"role": "user", "content": summary_prompt}
+        ]
+    )
+
+    if cache_key:
+        extraction_cache.store_result(
+            db, cache_key, {"summary": summary},
+            model=SUMMARY_MODEL, prompt_version=SUMMARY_PROMPT_VERSION, kind="summary"
+        )
+    return summary
+
+async def generate_reply(content: str, context: Optional[str] = None) -> dict:
+    """Generate a reply for an email along with its tone and key points."""
+    # Construct the prompt for reply generation
+    context = context if context else ""
+    prompt = f"""
+    Generate a professional email reply. Here's the context:
+    
+    Original Email:
+    {content}
+    
+    Additional Context (if any):
+    {context}
     
-    Handles:
-    - ISO format dates (YYYY-MM-DD)
-    - Relative dates (today, tomorrow, next Friday)
-    - Natural language dates (next week, in 2 days)
+    Generate a reply that is:
+    1. Professional and courteous
+    2. Addresses key points from the original email
+    3. Clear and concise
+    4. Maintains appropriate tone
     
-    Returns None if the date cannot be parsed.
+    Also identify:
+    1. The tone of your reply
+    2. Key points being addressed
     """
+
+    # Get response from OpenAI
+    full_response = await llm_client.chat_completion(
+        model=REPLY_MODEL,
+        operation="reply",
+        messages=[
+            {"role": "system", "content": "You are a professional email assistant."},
+            {"role": "user", "content": prompt}
+        ]
+    )
+
+    # Parse the response to extract reply, tone, and key points
+    
+    # Split the response into sections (assuming AI formats it properly)
+    sections = full_response.split("\n\n")
+    suggested_reply = sections[0].strip()
+    
+    # Extract tone and key points from the remaining sections
+    tone = "professional"  # default
+    key_points = []
+    
+    for section in sections[1:]:
+        if "tone:" in section.lower():
+            tone = section.split(":", 1)[1].strip()
+        elif "key points:" in section.lower():
+            points = section.split(":", 1)[1].strip()
+            key_points = [point.strip("- ") for point in points.split("\n") if point.strip()]
+
+    return {
+        "suggested_reply": suggested_reply,
+        "tone": tone,
+        "key_points_addressed": key_points
+    }
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_reply_events(content: str, context: Optional[str] = None):
+    """Generate a reply with a streaming LLM call and yield it as SSE events."""
+    context = context if context else ""
+    prompt = f"""
+    Generate a professional email reply. Here's the context:
+    
+    Original Email:
+    {content}
+    
+    Additional Context (if any):
+    {context}
+    
+    Generate a reply that is:
+    1. Professional and courteous
+    2. Addresses key points from the original email
+    3. Clear and concise
+    4. Maintains appropriate tone
+    
+    Write only the reply text first. Then write {REPLY_METADATA_DELIMITER} on its own line,
+    followed by JSON of the form {{"tone": "...", "key_points": ["..."]}}
+    """
+
+    reply_text = ""
+    metadata_text = ""
+    buffer = ""
+    in_metadata = False
     try:
-        if not due_date_str:
-            return None
-            
-        due_date_str = due_date_str.lower().strip()
-        
-        # Handle special keywords
-        if due_date_str == "today":
-            return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        elif due_date_str == "tomorrow":
-            return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-        elif due_date_str == "asap":
-            return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-            
-        # Try parsing ISO format first
+        async for delta in llm_client.stream_chat_completion(
+            model=REPLY_MODEL,
+            operation="reply_stream",
+            messages=[
+                {"role": "system", "content": "You are a professional email assistant."},
+                {"role": "user", "content": prompt}
+            ]
+        ):
+            if in_metadata:
+                metadata_text += delta
+                continue
+
+            buffer += delta
+            if REPLY_METADATA_DELIMITER in buffer:
+                text, metadata_text = buffer.split(REPLY_METADATA_DELIMITER, 1)
+                buffer = ""
+                in_metadata = True
+            else:
+                # Hold back a trailing partial delimiter until the next delta
+                held = next(
+                    (size for size in range(len(REPLY_METADATA_DELIMITER) - 1, 0, -1)
+                     if buffer.endswith(REPLY_METADATA_DELIMITER[:size])),
+                    0
+                )
+                text, buffer = buffer[:len(buffer) - held], buffer[len(buffer) - held:]
+
+            if text:
+                reply_text += text
+                yield format_sse("token", {"text": text})
+
+        if buffer:
+            reply_text += buffer
+            yield format_sse("token", {"text": buffer})
+
+        # Parse tone and key points from the trailing metadata
+        tone = "professional"  # default
+        key_points = []
         try:
-            return datetime.strptime(due_date_str, "%Y-%m-%d")
-        except ValueError:
-            pass
-            
-        # Handle "next" relative dates
-        days_mapping = {
-            "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
-            "friday": 4, "saturday": 5, "sunday": 6
-        }
-        
-        if due_date_str.startswith("next "):
-            day_name = due_date_str.split("next ")[1].strip().lower()
-            if day_name in days_mapping:
-                today = datetime.now(timezone.utc)
-                current_day = today.weekday()
-                target_day = days_mapping[day_name]
-                
-                # Calculate days until next occurrence
-                days_until = target_day - current_day
-                if days_until <= 0:  # If target day has passed this week
-                    days_until += 7
-                    
-                return (today + timedelta(days=days_until)).replace(hour=0, minute=0, second=0, microsecond=0)
-                
-        # Handle "in X days/weeks"
-        if due_date_str.startswith("in "):
-            parts = due_date_str.split()
-            if len(parts) >= 3 and parts[1].isdigit():
-                number = int(parts[1])
-                unit = parts[2].lower()
-                
-                if unit.startswith("day"):
-                    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=number)
-                elif unit.startswith("week"):
-                    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(weeks=number)
-                    
-        return None
-        
+            metadata = json.loads(metadata_text.strip()) if metadata_text.strip() else {}
+            tone = metadata.get("tone") or tone
+            key_points = [str(point) for point in metadata.get("key_points", [])]
+        except (json.JSONDecodeError, AttributeError) as e:
+            logger.warning(f"Could not parse reply metadata: {e}")
+            llm_telemetry.record_parse_failure("reply_stream")
+
+        yield format_sse("done", {
+            "suggested_reply": reply_text.strip(),
+            "tone": tone,
+            "key_points_addressed": key_points
+        })
+
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client went away mid-stream; the LLM stream is closed with us
+        llm_telemetry.record_cancellation("stream_email_reply")
+        raise
     except Exception as e:
-        logger.error(f"Error parsing date '{due_date_str}': {e}")
-        return None
+        logger.error(f"Error streaming email reply: {str(e)}")
+        yield format_sse("error", {"detail": f"Error generating email reply: {str(e)}"})
 
-def extract_tasks_from_email(content: str) -> dict:
-    try:
-        logger.info("Starting task extraction")
-        logger.info(f"Email content length: {len(content)} characters")
-        
-        # Clean HTML content first
-        if "<html" in content.lower() or "<body" in content.lower():
-            from bs4 import BeautifulSoup
-            import re
-            
-            # Parse HTML
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Get text content
-            content = soup.get_text()
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in content.splitlines())
-            content = ' '.join(chunk for chunk in lines if chunk)
-            
-            logger.info(f"Cleaned HTML content length: {len(content)} characters")
-        
-        # Truncate content if too long (GPT-4 has ~8k token limit, roughly 32k chars)
-        MAX_CONTENT_LENGTH = 24000  # Leave room for prompts and other context
-        if len(content) > MAX_CONTENT_LENGTH:
-            logger.info(f"Content too long ({len(content)} chars). Truncating to {MAX_CONTENT_LENGTH} chars")
-            # Try to truncate at a sentence or paragraph boundary
-            truncation_point = content[:MAX_CONTENT_LENGTH].rfind('.')
-            if truncation_point == -1:
-                truncation_point = content[:MAX_CONTENT_LENGTH].rfind('\n')
-            if truncation_point == -1:
-                truncation_point = MAX_CONTENT_LENGTH
-            content = content[:truncation_point] + "\n[Email truncated due to length...]"
-        
-        # Create a more structured prompt
-        system_prompt = """You are an AI assistant that extracts actionable tasks from emails, specializing in educational and professional development contexts.
+# Shared system prompt for task extraction and combined analysis
+EXTRACTION_SYSTEM_PROMPT = """You are an AI assistant that extracts actionable tasks from emails, specializing in educational and professional development contexts.
 Focus on identifying:
 1. Application deadlines and important dates
 2. Required documentation or materials to prepare
@@ -1045,6 +1609,209 @@ For each task:
 - Note if there are financial implications
 - Highlight priority based on deadlines"""
 
+def clean_email_content(content: str) -> str:
+    """Strip HTML, quoted replies, signatures and footers from email content."""
+    cleaned = clean_email(content)
+    logger.info(f"Cleaned email content: {len(content)} -> {len(cleaned)} characters")
+    return cleaned
+
+def prepare_email_content(content: str) -> str:
+    """Strip HTML from email content and truncate it to fit the prompt."""
+    content = clean_email_content(content)
+
+    # Truncate content if too long (GPT-4 has ~8k token limit, roughly 32k chars)
+    MAX_CONTENT_LENGTH = 24000  # Leave room for prompts and other context
+    if len(content) > MAX_CONTENT_LENGTH:
+        logger.info(f"Content too long ({len(content)} chars). Truncating to {MAX_CONTENT_LENGTH} chars")
+        # Try to truncate at a sentence or paragraph boundary
+        truncation_point = content[:MAX_CONTENT_LENGTH].rfind('.')
+        if truncation_point == -1:
+            truncation_point = content[:MAX_CONTENT_LENGTH].rfind('\n')
+        if truncation_point == -1:
+            truncation_point = MAX_CONTENT_LENGTH
+        content = content[:truncation_point] + "\n[Email truncated due to length...]"
+
+    return content
+
+def validate_tasks(tasks: list) -> list:
+    """Check required task fields and normalize priorities and due dates.
+
+    Raises ValueError if a task is malformed.
+    """
+    # Ensure each task has required fields and format dates
+    for task in tasks:
+        if not isinstance(task, dict):
+            raise ValueError("Task is not a dictionary")
+
+        required_fields = ["title", "due_date", "priority"]
+        missing_fields = [field for field in required_fields if field not in task]
+        if missing_fields:
+            raise ValueError(f"Task missing required fields: {missing_fields}")
+
+        # Validate priority
+        if task["priority"] not in ["high", "medium", "low"]:
+            task["priority"] = "medium"  # Default to medium if invalid
+
+    # Format or validate dates, all resolved against the same "now"
+    dated = [
+        task for task in tasks
+        if task["due_date"] and task["due_date"].lower() not in ["today", "tomorrow", "asap"]
+    ]
+    for task, parsed_date in zip(dated, parse_due_dates([task["due_date"] for task in dated])):
+        task["due_date"] = parsed_date.strftime("%Y-%m-%d") if parsed_date else None  # None if unparseable
+
+    return tasks
+
+async def extract_tasks_from_email(
+    content: str,
+    db: Optional[Session] = None,
+    subject: Optional[str] = None,
+    sender: Optional[str] = None,
+    headers: Optional[dict] = None
+) -> dict:
+    """Extract tasks and a suggested reply from email content.
+
+    Emails the local pre-classifier is confident hold no tasks (newsletters,
+    receipts, notifications) return an empty result without an LLM call. If
+    the LLM call fails, the empty result has an ``error`` message.
+    Emails above EXTRACTION_CHUNK_TOKENS are split into overlapping chunks that
+    are extracted in parallel, then merged and deduplicated.
+    """
+    try:
+        logger.info("Starting task extraction")
+        logger.info(f"Email content length: {len(content)} characters")
+
+        if email_classifier.is_non_actionable(content, subject, sender, headers):
+            return {"tasks": [], "suggested_reply": None, "pre_classified": True}
+
+        content = clean_email_content(content)
+        content_tokens = count_tokens(content, EXTRACTION_MODEL)
+        if content_tokens <= EXTRACTION_CHUNK_TOKENS:
+            return await extract_tasks_from_text(content, db)
+
+        chunks = split_into_chunks(
+            content, EXTRACTION_CHUNK_TOKENS, EXTRACTION_CHUNK_OVERLAP_TOKENS, EXTRACTION_MODEL
+        )
+        if len(chunks) > EXTRACTION_MAX_CHUNKS:
+            logger.info(f"Email has {len(chunks)} chunks. Only extracting from the first {EXTRACTION_MAX_CHUNKS}")
+            chunks = chunks[:EXTRACTION_MAX_CHUNKS]
+        logger.info(f"Content is {content_tokens} tokens. Extracting from {len(chunks)} chunks")
+
+        # Map: each chunk is extracted (and cached) on its own, so an edited
+        # thread only re-runs the chunks that changed. The chunks run
+        # concurrently, so each caches through a session of its own.
+        if db is None:
+            extractions = [extract_tasks_from_text(chunk) for chunk in chunks]
+        else:
+            extractions = [
+                run_on_own_session(lambda chunk_db, chunk=chunk: extract_tasks_from_text(chunk, chunk_db))
+                for chunk in chunks
+            ]
+        results = await asyncio.gather(*extractions)
+
+        # Reduce: merge duplicate tasks and keep the first suggested reply
+        merged = {
+            "tasks": merge_tasks([result.get("tasks", []) for result in results]),
+            "suggested_reply": next(
+                (result["suggested_reply"] for result in results if result.get("suggested_reply")),
+                None
+            )
+        }
+        errors = [result["error"] for result in results if result.get("error")]
+        if errors:
+            merged["error"] = errors[0]
+        return merged
+
+    except Exception as e:
+        logger.error(f"Error in task extraction: {e}")
+        return {"tasks": [], "suggested_reply": None, "error": str(e)}
+
+async def extract_thread_tasks(
+    content: str,
+    gmail_id: str,
+    thread_id: str,
+    user_id: int,
+    db: Session,
+    subject: Optional[str] = None,
+    sender: Optional[str] = None,
+    headers: Optional[dict] = None,
+    record: bool = True
+) -> dict:
+    """Extract tasks from a message, reusing what is known about its thread.
+
+    A message that was already processed returns its stored result. For later
+    messages in a thread only the sentences not seen before (i.e. not quoted
+    history) are sent to the model, along with the tasks already extracted
+    from the thread. With ``record=False`` the thread state is left unchanged,
+    which lets a prefetch warm the same cache entries opening the email uses.
+    """
+    state = thread_state.get_thread_state(db, user_id, thread_id)
+    if state and gmail_id in (state.messages or {}):
+        logger.info(f"Message {gmail_id} already processed in thread {thread_id}")
+        return state.messages[gmail_id]
+
+    if not state:
+        result = await extract_tasks_from_email(content, db, subject, sender, headers)
+        content = clean_email_content(content)
+    else:
+        content = clean_email_content(content)
+        new_content = thread_state.get_new_content(state, content)
+        logger.info(f"Thread {thread_id}: {len(new_content)} of {len(content)} characters are new")
+        if not new_content:
+            result = {"tasks": [], "suggested_reply": None}
+        elif count_tokens(new_content, EXTRACTION_MODEL) > EXTRACTION_CHUNK_TOKENS:
+            result = await extract_tasks_from_email(new_content, db)
+        else:
+            result = await extract_tasks_from_text(
+                new_content, db, known_tasks=thread_state.format_known_tasks(state)
+            )
+
+    # A failed extraction isn't recorded, so the message is extracted again
+    # next time instead of being served as having no tasks
+    if not record or result.get("error"):
+        return result
+    try:
+        thread_state.record_message(db, user_id, thread_id, gmail_id, content, result)
+    except Exception as e:
+        logger.error(f"Failed to update thread state: {e}")
+    return result
+
+async def extract_tasks_from_text(
+    content: str,
+    db: Optional[Session] = None,
+    known_tasks: Optional[str] = None
+) -> dict:
+    """Extract tasks and a suggested reply from cleaned text.
+
+    The cheapest model tier is tried first and larger ones only when its
+    response fails validation or looks low-confidence.
+
+    ``known_tasks`` lists tasks already extracted from earlier messages in the
+    thread so the model doesn't repeat them. When a database session is given,
+    results are cached by a hash of the content, known tasks, prompt version
+    and model tiers.
+    """
+    try:
+        # Return the stored result if this content was already analysed
+        cache_key = None
+        if db is not None:
+            cache_key = extraction_cache.make_cache_key(
+                f"{content}\n{known_tasks}" if known_tasks else content,
+                ",".join(EXTRACTION_MODEL_TIERS), EXTRACTION_PROMPT_VERSION
+            )
+            cached_result = extraction_cache.get_cached_result(db, cache_key)
+            if cached_result is not None:
+                logger.info("Extraction cache hit")
+                return cached_result
+
+        known_tasks_section = ""
+        if known_tasks:
+            known_tasks_section = f"""Tasks already extracted from earlier messages in this thread (do not repeat them, only return new or changed tasks):
+{known_tasks}
+
+"""
+
+        # Create a more structured prompt
         user_prompt = f"""Please analyze this email and extract:
 1. All actionable tasks and deadlines
 2. A suggested reply (if appropriate)
@@ -1055,7 +1822,7 @@ For each identified task, consider:
 - Is there any financial aspect?
 - What preparation is needed?
 
-Email content:
+{known_tasks_section}Email content:
 {content}
 
 Return your analysis in this exact JSON format:
@@ -1073,86 +1840,162 @@ Return your analysis in this exact JSON format:
 }}"""
 
         logger.info("Making OpenAI API call")
-        # Make API call with proper error handling and retry logic
-        max_retries = 3
-        retry_count = 0
-        retry_delay = 1  # Initial delay in seconds
-        
-        while retry_count < max_retries:
-            try:
-                # Check if API key is valid
-                if not openai.api_key:
-                    raise ValueError("OpenAI API key is not configured")
-
-                client = openai.OpenAI()
-                response = client.chat.completions.create(
-                    model="gpt-4",  # Using GPT-4 for better task extraction
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.2  # Lower temperature for more consistent output
-                )
-                
-                # Extract and validate response
-                result = response.choices[0].message.content.strip()
-                logger.info(f"Raw OpenAI Response: {result}")
-                
-                try:
-                    parsed_result = json.loads(result)
-                    logger.info(f"Parsed JSON result: {json.dumps(parsed_result, indent=2)}")
-                    
-                    # Validate response structure
-                    if not isinstance(parsed_result, dict):
-                        raise ValueError("Response is not a dictionary")
-                    
-                    if "tasks" not in parsed_result or not isinstance(parsed_result["tasks"], list):
-                        raise ValueError("Response missing tasks array")
-                    
-                    # Ensure each task has required fields and format dates
-                    for task in parsed_result["tasks"]:
-                        if not isinstance(task, dict):
-                            raise ValueError("Task is not a dictionary")
-                        
-                        required_fields = ["title", "due_date", "priority"]
-                        missing_fields = [field for field in required_fields if field not in task]
-                        if missing_fields:
-                            raise ValueError(f"Task missing required fields: {missing_fields}")
-                        
-                        # Validate priority
-                        if task["priority"] not in ["high", "medium", "low"]:
-                            task["priority"] = "medium"  # Default to medium if invalid
-                        
-                        # Format or validate date
-                        if task["due_date"] and task["due_date"].lower() not in ["today", "tomorrow", "asap"]:
-                            try:
-                                parsed_date = parse_due_date(task["due_date"])
-                                task["due_date"] = parsed_date.strftime("%Y-%m-%d") if parsed_date else None
-                            except ValueError:
-                                task["due_date"] = None  # Set to None if date parsing fails
-                    
-                    return parsed_result
-                
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse OpenAI response as JSON: {e}")
-                    return {"tasks": [], "suggested_reply": None}
-                
-                except ValueError as e:
-                    logger.error(f"Invalid response format: {e}")
-                    return {"tasks": [], "suggested_reply": None}
-                
-            except Exception as e:
-                retry_count += 1
-                if retry_count == max_retries:
-                    logger.error(f"OpenAI API error after all retries: {e}")
-                    return {"tasks": [], "suggested_reply": None}
-                logger.warning(f"OpenAI API error, retrying ({retry_count}/{max_retries}): {e}")
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-                continue
-        
-        return {"tasks": [], "suggested_reply": None}
-        
+        try:
+            parsed_result, model = await extraction_router.complete(
+                messages=[
+                    {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt}
+                ],
+                validate=lambda response: parse_extraction_response(response, content),
+                temperature=0.2  # Lower temperature for more consistent output
+            )
+        except json.JSONDecodeError as e:
+            # Errors keep the empty result out of the cache, thread state and
+            # pre-classifier training
+            logger.error(f"Failed to parse OpenAI response as JSON: {e}")
+            return {"tasks": [], "suggested_reply": None, "error": f"Invalid JSON in response: {e}"}
+        except ValueError as e:
+            logger.error(f"Invalid response format: {e}")
+            return {"tasks": [], "suggested_reply": None, "error": f"Invalid response format: {e}"}
+        except Exception as e:
+            logger.error(f"OpenAI API error during task extraction: {e}")
+            return {"tasks": [], "suggested_reply": None, "error": str(e)}
+
+        logger.info(f"Extracted {len(parsed_result['tasks'])} tasks with {model}")
+        if cache_key:
+            extraction_cache.store_result(
+                db, cache_key, parsed_result,
+                model=model, prompt_version=EXTRACTION_PROMPT_VERSION
+            )
+        return parsed_result
+
     except Exception as e:
         logger.error(f"Error in task extraction: {e}")
-        return {"tasks": [], "suggested_reply": None}
+        return {"tasks": [], "suggested_reply": None, "error": str(e)}
+
+def parse_extraction_response(response: str, content: str) -> dict:
+    """Parse and validate an extraction response.
+
+    Raises ValueError if the response is malformed, and LowConfidenceError if
+    it returns no tasks although the email reads like it has a deadline.
+    """
+    logger.debug(f"Raw OpenAI Response: {response}")
+    parsed_result = json.loads(response)
+
+    # Validate response structure
+    if not isinstance(parsed_result, dict):
+        raise ValueError("Response is not a dictionary")
+
+    if "tasks" not in parsed_result or not isinstance(parsed_result["tasks"], list):
+        raise ValueError("Response missing tasks array")
+
+    validate_tasks(parsed_result["tasks"])
+
+    if any(not str(task["title"]).strip() for task in parsed_result["tasks"]):
+        raise ValueError("Task has an empty title")
+    if not parsed_result["tasks"] and ACTION_CUES.search(content):
+        raise LowConfidenceError("No tasks found in an email with deadline cues", parsed_result)
+    return parsed_result
+
+# JSON schema enforced on combined analysis responses
+ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "email_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "tasks": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "title": {"type": "string"},
+                            "due_date": {"type": ["string", "null"]},
+                            "priority": {"type": "string", "enum": ["high", "medium", "low"]},
+                            "preparation": {"type": ["string", "null"]},
+                            "financial_aspects": {"type": ["string", "null"]}
+                        },
+                        "required": ["title", "due_date", "priority", "preparation", "financial_aspects"],
+                        "additionalProperties": False
+                    }
+                },
+                "summary": {"type": "string"},
+                "suggested_reply": {"type": ["string", "null"]},
+                "tone": {"type": "string"},
+                "key_points": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["tasks", "summary", "suggested_reply", "tone", "key_points"],
+            "additionalProperties": False
+        }
+    }
+}
+
+EMPTY_ANALYSIS = {
+    "tasks": [],
+    "summary": None,
+    "suggested_reply": None,
+    "tone": "professional",
+    "key_points": []
+}
+
+async def analyze_email(content: str, context: Optional[str] = None, db: Optional[Session] = None) -> dict:
+    """Extract tasks, a summary and a suggested reply with one structured LLM call.
+
+    Returns a dict with tasks, summary, suggested_reply, tone and key_points.
+    Raises on API errors or malformed output so callers can degrade gracefully.
+    """
+    content = prepare_email_content(content)
+    context = context if context else ""
+
+    cache_key = None
+    if db is not None:
+        cache_key = extraction_cache.make_cache_key(
+            f"{content}\n{context}", ANALYSIS_MODEL, ANALYSIS_PROMPT_VERSION, kind="analysis"
+        )
+        cached_result = extraction_cache.get_cached_result(db, cache_key, kind="analysis")
+        if cached_result is not None:
+            logger.info("Analysis cache hit")
+            return cached_result
+
+    user_prompt = f"""Analyze this email and return:
+1. All actionable tasks and deadlines (dates as YYYY-MM-DD, "today", "tomorrow", "asap" or null)
+2. A 2-3 sentence summary
+3. A professional, courteous and concise reply, or null if no reply is needed
+4. The tone of that reply
+5. The key points the reply addresses
+
+Email content:
+{content}
+
+Additional context for the reply (if any):
+{context}"""
+
+    result = await llm_client.chat_completion(
+        model=ANALYSIS_MODEL,
+        operation="analysis",
+        messages=[
+            {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=0.2,
+        response_format=ANALYSIS_RESPONSE_FORMAT
+    )
+
+    try:
+        analysis = json.loads(result)
+        if not isinstance(analysis, dict) or not isinstance(analysis.get("tasks"), list):
+            raise ValueError("Analysis response missing tasks array")
+        validate_tasks(analysis["tasks"])
+    except ValueError:
+        llm_telemetry.record_parse_failure("analysis")
+        raise
+    analysis = {**EMPTY_ANALYSIS, **analysis}
+
+    if cache_key:
+        extraction_cache.store_result(
+            db, cache_key, analysis,
+            model=ANALYSIS_MODEL, prompt_version=ANALYSIS_PROMPT_VERSION, kind="analysis"
+        )
+    return analysis
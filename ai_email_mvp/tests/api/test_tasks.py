@@ -101,7 +101,7 @@ def test_complete_task(client, test_user, test_task):
 def test_get_task_analytics(client, test_user):
     response = client.get(
         "/api/tasks/analytics",
-        params={"user_id": test_user["email"]}
+        params={"email": test_user["email"]}
     )
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
@@ -111,7 +111,7 @@ def test_get_task_analytics(client, test_user):
 def test_get_upcoming_tasks(client, test_user):
     response = client.get(
         "/api/tasks/upcoming",
-        params={"user_id": test_user["email"]}
+        params={"email": test_user["email"]}
     )
     assert response.status_code == status.HTTP_200_OK
     assert isinstance(response.json(), list)
@@ -119,7 +119,7 @@ def test_get_upcoming_tasks(client, test_user):
 def test_get_overdue_tasks(client, test_user):
     response = client.get(
         "/api/tasks/overdue",
-        params={"user_id": test_user["email"]}
+        params={"email": test_user["email"]}
     )
     assert response.status_code == status.HTTP_200_OK
     assert isinstance(response.json(), list)
@@ -151,4 +151,34 @@ def test_set_task_reminder(client, test_user, test_task):
 def test_get_task_reminders(client, test_user):
     response = client.get("/api/tasks/reminders")
     assert response.status_code == status.HTTP_200_OK
-    assert isinstance(response.json(), list) 
\ No newline at end of file
+    assert isinstance(response.json(), list) 
+def test_task_analytics_route_counts_the_users_tasks(client, test_db, test_user):
+    from app.models import Task, Team, TeamMember, User
+
+    user = test_db.query(User).filter(User.email == test_user["email"]).one()
+    team = Team(name="Team", created_by=user.id)
+    test_db.add(team)
+    test_db.flush()
+    test_db.add(TeamMember(team_id=team.id, user_id=user.id))
+    now = datetime.utcnow()
+    test_db.add_all([
+        Task(title="Done", priority="high", status="completed", created_by=user.id, assigned_to=user.id, team_id=team.id,
+             created_at=now - timedelta(days=3), deadline=now + timedelta(days=1),
+             completion_date=now - timedelta(days=1)),
+        Task(title="Late", priority="low", status="pending", created_by=user.id, assigned_to=user.id, team_id=team.id,
+             created_at=now - timedelta(days=2), deadline=now - timedelta(days=1)),
+    ])
+    test_db.commit()
+
+    response = client.get("/api/tasks/analytics", params={"email": test_user["email"], "team_id": team.id})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["task_metrics"]["total_tasks"] == 2
+    assert data["task_metrics"]["completed_tasks"] == 1
+    assert data["task_metrics"]["overdue_tasks"] == 1
+    assert data["task_metrics"]["on_time_completions"] == 1
+    assert data["distributions"]["priority"] == {"high": 1, "low": 1}
+    assert data["team_performance"][0]["user_id"] == user.id
+
+    response = client.get("/api/tasks/analytics", params={"email": "nobody@example.com"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
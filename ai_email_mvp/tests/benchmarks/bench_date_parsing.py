@@ -0,0 +1,111 @@
+"""Benchmark the due-date parser against the previous strptime-based parser.
+
+Run from the project root:
+
+    python -m tests.benchmarks.bench_date_parsing [--tasks 100000] [--runs 5]
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.utils import dates
+
+# Due dates as the extraction model writes them: mostly ISO dates and a few
+# relative phrases, repeated across tasks
+PHRASES = [
+    "2024-12-29", "2025-01-10", "2025-01-15", "2025-02-01", "today", "tomorrow",
+    "asap", "next friday", "next monday", "in 2 days", "in 1 week",
+]
+# Phrases only the new parser understands; the previous one returns None
+NEW_PHRASES = ["Dec 29", "end of week", "EOD Friday", "2024-12-29T17:00:00+02:00", "in a week"]
+
+
+def parse_with_strptime(due_date_str: str) -> Optional[datetime]:
+    """The parser main.py used before app/utils/dates.py."""
+    try:
+        if not due_date_str:
+            return None
+        due_date_str = due_date_str.lower().strip()
+        midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        if due_date_str in ("today", "asap"):
+            return midnight
+        elif due_date_str == "tomorrow":
+            return midnight + timedelta(days=1)
+        try:
+            return datetime.strptime(due_date_str, "%Y-%m-%d")
+        except ValueError:
+            pass
+        days_mapping = {
+            "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+            "friday": 4, "saturday": 5, "sunday": 6
+        }
+        if due_date_str.startswith("next "):
+            day_name = due_date_str.split("next ")[1].strip().lower()
+            if day_name in days_mapping:
+                today = datetime.now(timezone.utc)
+                days_until = days_mapping[day_name] - today.weekday()
+                if days_until <= 0:
+                    days_until += 7
+                return (today + timedelta(days=days_until)).replace(hour=0, minute=0, second=0, microsecond=0)
+        if due_date_str.startswith("in "):
+            parts = due_date_str.split()
+            if len(parts) >= 3 and parts[1].isdigit():
+                number = int(parts[1])
+                if parts[2].startswith("day"):
+                    return midnight + timedelta(days=number)
+                elif parts[2].startswith("week"):
+                    return midnight + timedelta(weeks=number)
+        return None
+    except Exception:
+        return None
+
+
+def parse_cold(values):
+    """Parse a batch starting from an empty phrase cache."""
+    dates._resolve.cache_clear()
+    return dates.parse_due_dates(values)
+
+
+def measure(parse, values, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        parsed = parse(values)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), sum(value is not None for value in parsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    values = [rng.choice(PHRASES + NEW_PHRASES) for _ in range(args.tasks)]
+    parsers = (
+        ("strptime", lambda batch: [parse_with_strptime(value) for value in batch]),
+        ("dates (cold)", parse_cold),
+        ("dates (cached)", dates.parse_due_dates),
+    )
+    print(f"Input: {len(values):,} due dates, {len(set(values))} distinct")
+    print(f"{'parser':<16}{'median ms':>12}{'us/date':>10}{'parsed':>10}")
+    for name, parse in parsers:
+        elapsed, parsed = measure(parse, values, args.runs)
+        print(f"{name:<16}{elapsed * 1000:>12.1f}{elapsed * 1e6 / len(values):>10.2f}{parsed:>10,}")
+
+    # Uncached cost per format, which is what a first-seen phrase pays
+    print(f"\n{'phrase':<30}{'uncached us':>12}")
+    today = datetime.now(timezone.utc).date()
+    for phrase in PHRASES + NEW_PHRASES:
+        start = time.perf_counter()
+        for _ in range(1000):
+            dates._resolve.__wrapped__(phrase, today)
+        print(f"{phrase:<30}{(time.perf_counter() - start) * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark the email cleaner against the previous BeautifulSoup cleaning.
+
+Run from the project root:
+
+    python -m tests.benchmarks.bench_email_cleaner [--size-kb 1024] [--runs 5]
+"""
+import argparse
+import statistics
+import time
+
+from bs4 import BeautifulSoup
+
+from app.utils.email_cleaner import clean_email
+from app.utils.tokens import count_tokens
+
+PRODUCT_BLOCK = """
+<table class="product" width="600" cellpadding="0" cellspacing="0" style="border:0;font-family:Arial">
+  <tr>
+    <td style="padding:10px"><img src="https://cdn.example.com/p/{i}.jpg" width="120" alt="Product {i}"></td>
+    <td style="padding:10px">
+      <h3 style="margin:0;color:#333">Limited offer on item {i}</h3>
+      <p style="margin:4px 0">Save&nbsp;{pct}% on our bestselling item {i} &mdash; only while stocks last.</p>
+      <a href="https://click.example.com/track?id={i}&amp;u=abc" style="color:#06c">Shop now</a>
+    </td>
+  </tr>
+</table>
+"""
+
+FOOTER = """
+<div class="footer" style="font-size:11px;color:#999">
+  <p>You are receiving this email because you signed up at example.com.
+  <a href="https://example.com/unsubscribe">Unsubscribe</a> or
+  <a href="https://example.com/prefs">manage your email preferences</a>.</p>
+  <p>This email and any attachments are confidential and intended solely for the addressee.</p>
+  <p>Read our <a href="https://example.com/privacy">privacy policy</a>.</p>
+</div>
+"""
+
+QUOTE = """
+<div class="gmail_quote"><div dir="ltr" class="gmail_attr">On Mon, Jun 3, 2024 at 9:00 AM Shop &lt;news@example.com&gt; wrote:<br></div>
+<blockquote class="gmail_quote" style="margin:0 0 0 .8ex">{quoted}</blockquote></div>
+"""
+
+
+def build_marketing_email(size_kb: int) -> str:
+    """Build a marketing-style HTML email of roughly ``size_kb`` kilobytes."""
+    head = "<html><head><style>" + ".c{color:#333;margin:0;padding:0}" * 200 + "</style></head><body>"
+    intro = "<p>Hi Sam,</p><p>Please confirm your order by Friday and reply with your delivery address.</p>"
+    blocks = []
+    size = len(head) + len(intro) + len(FOOTER)
+    i = 0
+    while size < size_kb * 1024 * 0.8:
+        block = PRODUCT_BLOCK.format(i=i, pct=5 + i % 40)
+        blocks.append(block)
+        size += len(block)
+        i += 1
+    body = "".join(blocks)
+    quoted = QUOTE.format(quoted="".join(blocks[: max(len(blocks) // 4, 1)]))
+    return head + intro + body + FOOTER + quoted + "</body></html>"
+
+
+def clean_with_beautifulsoup(content: str) -> str:
+    """The cleaning main.py did before the dedicated cleaner."""
+    soup = BeautifulSoup(content, "html.parser")
+    for script in soup(["script", "style"]):
+        script.decompose()
+    lines = (line.strip() for line in soup.get_text().splitlines())
+    return " ".join(chunk for chunk in lines if chunk)
+
+
+def measure(clean, content: str, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = clean(content)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-kb", type=int, default=1024)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    content = build_marketing_email(args.size_kb)
+    print(f"Input: {len(content):,} characters, {count_tokens(content):,} tokens")
+    print(f"{'cleaner':<16}{'median ms':>12}{'chars':>12}{'tokens':>10}")
+    for name, clean in (("beautifulsoup", clean_with_beautifulsoup), ("email_cleaner", clean_email)):
+        elapsed, result = measure(clean, content, args.runs)
+        print(f"{name:<16}{elapsed * 1000:>12.1f}{len(result):>12,}{count_tokens(result):>10,}")
+
+
+if __name__ == "__main__":
+    main()
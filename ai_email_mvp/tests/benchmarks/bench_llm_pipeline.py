@@ -0,0 +1,162 @@
+"""Benchmark the email pipelines end to end without a live OpenAI key.
+
+Runs extraction (extract_tasks_from_email), full processing (process_email,
+as used by /api/emails/current/process) and reply generation (generate_reply)
+over the sample emails in tests/benchmarks/corpus, and reports p50/p99
+latency and throughput for each.
+
+LLM responses come from the record/replay provider in
+app/services/llm_provider.py:
+
+    # Record real responses once (needs OPENAI_API_KEY)
+    python -m tests.benchmarks.bench_llm_pipeline --mode record
+    # Replay them offline, with their recorded latency or a fixed one
+    python -m tests.benchmarks.bench_llm_pipeline [--latency-ms 800] [--concurrency 8] [--runs 3]
+    # No recordings at all: canned responses from the corpus
+    python -m tests.benchmarks.bench_llm_pipeline --mode synthetic --latency-ms 800
+
+Every run starts from an empty database, so the result cache starts cold.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus", "emails.json")
+CASSETTE_DIR = os.path.join(os.path.dirname(__file__), "cassettes")
+PIPELINES = ("extract", "process", "reply")
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def corpus_fallback(corpus):
+    """Build canned responses for unrecorded requests from the corpus's expected results."""
+    from app.utils.email_cleaner import clean_email
+
+    markers = [(clean_email(email["content"])[:40], email) for email in corpus]
+
+    def respond(params: dict) -> str:
+        prompt = params["messages"][-1]["content"]
+        email = next((email for marker, email in markers if marker and marker in prompt), None)
+        tasks = email["tasks"] if email else []
+        summary = email["summary"] if email else "No summary available."
+        reply = "Thank you for your email. I will take care of this and get back to you shortly."
+        if prompt.startswith("Summarize this email"):
+            return summary
+        if "response_format" in params:
+            return json.dumps({"tasks": tasks, "summary": summary, "suggested_reply": reply,
+                               "tone": "professional", "key_points": [task["title"] for task in tasks]})
+        if prompt.startswith("Please analyze this email"):
+            return json.dumps({"tasks": tasks, "suggested_reply": reply})
+        return f"{reply}\n\nTone: professional\n\nKey points:\n- Acknowledged the request"
+
+    return respond
+
+
+async def run_pipeline(main, name: str, corpus, concurrency: int):
+    """Run one pipeline over the corpus on a fresh database; return per-email latencies and wall time."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app import models, schemas
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        models.Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with Session() as db:
+            user = models.User(email="bench@example.com")
+            db.add(user)
+            db.commit()
+            user_id = user.id
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def run_one(email: dict):
+            async with semaphore:
+                with Session() as db:
+                    started = time.perf_counter()
+                    if name == "extract":
+                        await main.extract_tasks_from_email(
+                            email["content"], db,
+                            subject=email["subject"], sender=email["sender"], headers=email.get("headers")
+                        )
+                    elif name == "process":
+                        await main.process_email(schemas.CurrentEmailProcess(
+                            gmail_id=email["gmail_id"], thread_id=email["thread_id"],
+                            subject=email["subject"], sender=email["sender"],
+                            content=email["content"], headers=email.get("headers")
+                        ), user_id, db)
+                    else:
+                        await main.generate_reply(email["content"])
+                    latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_one(email) for email in corpus))
+        wall = time.perf_counter() - started
+        engine.dispose()
+    return latencies, wall
+
+
+async def run(args, corpus):
+    # The provider and main read their settings at import time
+    os.environ["LLM_PROVIDER_MODE"] = "record" if args.mode == "record" else "replay"
+    from app.services import llm_provider
+    import main
+
+    cassette = llm_provider.Cassette(args.cassettes)
+    if args.mode == "record":
+        provider = llm_provider.RecordingProvider(cassette)
+    else:
+        provider = llm_provider.ReplayProvider(
+            cassette, latency_ms=args.latency_ms,
+            fallback=corpus_fallback(corpus) if args.mode == "synthetic" else None
+        )
+    llm_provider.set_provider(provider)
+
+    print(f"{len(corpus)} emails, mode {args.mode}, concurrency {args.concurrency}, {args.runs} run(s)")
+    print(f"{'pipeline':<10}{'p50 ms':>10}{'p99 ms':>10}{'emails/s':>10}")
+    for name in args.pipelines:
+        latencies = []
+        wall = 0.0
+        for _ in range(args.runs):
+            run_latencies, run_wall = await run_pipeline(main, name, corpus, args.concurrency)
+            latencies.extend(run_latencies)
+            wall += run_wall
+        print(f"{name:<10}{percentile(latencies, 50) * 1000:>10.1f}"
+              f"{percentile(latencies, 99) * 1000:>10.1f}{len(latencies) / wall:>10.1f}")
+
+    if args.mode == "replay" and provider.misses:
+        print(f"{provider.misses} LLM requests had no recording in {args.cassettes}; "
+              "run with --mode record first, or use --mode synthetic", file=sys.stderr)
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("replay", "record", "synthetic"), default="replay")
+    parser.add_argument("--cassettes", default=CASSETTE_DIR)
+    parser.add_argument("--latency-ms", type=float, default=None,
+                        help="Fixed simulated LLM latency (default: the recorded latency)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=list(PIPELINES))
+    args = parser.parse_args()
+    if args.mode == "record":
+        args.runs = 1  # Every later run would record the same requests again
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+    asyncio.run(run(args, corpus))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,37 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Point the app's default engines at a throwaway database before the app is
+# imported, so test runs don't write to app.db
+_database_dir = tempfile.mkdtemp(prefix="ai_email_mvp_tests_")
+atexit.register(shutil.rmtree, _database_dir, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{_database_dir}/app.db"
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, async_database_url, get_async_db, get_db
 from app.models import User
 from app.routers.task import get_calendar_client, get_gmail_notifier
 
-# Create in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite://"
+@pytest.fixture
+def database_url(tmp_path):
+    # A file database, so the sync session and the routers' async session
+    # share the same data
+    return f"sqlite:///{tmp_path / 'test.db'}"
 
 @pytest.fixture
-def test_db():
+def test_db(database_url):
     engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
+        database_url,
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
     )
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     
@@ -31,14 +45,23 @@ def test_db():
         Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture
-def client(test_db):
+def client(test_db, database_url):
     def override_get_db():
         try:
             yield test_db
         finally:
             test_db.close()
-    
+
+    # NullPool: TestClient runs each request on its own event loop
+    async_engine = create_async_engine(async_database_url(database_url), poolclass=NullPool)
+    TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     
     # Create test user in database
     test_user = User(
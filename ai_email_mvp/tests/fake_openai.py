@@ -0,0 +1,92 @@
+"""A local OpenAI-compatible server for exercising the LLM client over real HTTP."""
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer:
+    """Serve /v1/chat/completions, injecting latency and error responses on demand.
+
+    Use as a context manager and point an AsyncOpenAI client at ``base_url``.
+    """
+
+    def __init__(self, latency: float = 0.0, content: str = "ok"):
+        self.latency = latency
+        self.content = content
+        self.requests = 0
+        self.max_concurrent = 0
+        self._active = 0
+        self._failures = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def fail_next(self, count: int, status: int = 429, retry_after: str = None) -> None:
+        """Answer the next ``count`` requests with ``status``, optionally with Retry-After."""
+        headers = {"Retry-After": retry_after} if retry_after is not None else {}
+        with self._lock:
+            self._failures.extend([(status, headers)] * count)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake._lock:
+                    fake.requests += 1
+                    fake._active += 1
+                    fake.max_concurrent = max(fake.max_concurrent, fake._active)
+                    failure = fake._failures.popleft() if fake._failures else None
+                try:
+                    time.sleep(fake.latency)
+                    if failure:
+                        status, headers = failure
+                        self._send(status, {"error": {"message": f"Injected {status}", "type": "fake"}}, headers)
+                    else:
+                        self._send(200, {
+                            "id": "chatcmpl-fake",
+                            "object": "chat.completion",
+                            "created": int(time.time()),
+                            "model": "fake",
+                            "choices": [{
+                                "index": 0,
+                                "message": {"role": "assistant", "content": fake.content},
+                                "finish_reason": "stop"
+                            }],
+                            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+                        })
+                finally:
+                    with fake._lock:
+                        fake._active -= 1
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils import dates
+
+# A Friday afternoon
+NOW = datetime(2024, 12, 27, 15, 30, tzinfo=timezone.utc)
+
+
+def day(year, month, day_):
+    return datetime(year, month, day_, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("today", day(2024, 12, 27)),
+    ("ASAP", day(2024, 12, 27)),
+    ("by tomorrow", day(2024, 12, 28)),
+    ("2025-01-10", day(2025, 1, 10)),
+    ("2024-12-29T17:00:00+02:00", datetime(2024, 12, 29, 15, tzinfo=timezone.utc)),
+    ("2024-12-29T17:00Z", datetime(2024, 12, 29, 17, tzinfo=timezone.utc)),
+    ("Dec 29", day(2024, 12, 29)),
+    ("29th December 2025", day(2025, 12, 29)),
+    ("Dec 2", day(2025, 12, 2)),  # Already past this year
+    ("1/3", day(2025, 1, 3)),
+    ("Friday", day(2024, 12, 27)),
+    ("next Friday", day(2025, 1, 3)),
+    ("EOD Monday", day(2024, 12, 30)),
+    ("end of week", day(2024, 12, 27)),
+    ("end of next week", day(2025, 1, 3)),
+    ("next week", day(2024, 12, 30)),
+    ("end of month", day(2024, 12, 31)),
+    ("in 2 days", day(2024, 12, 29)),
+    ("in a week", day(2025, 1, 3)),
+    ("in 2 months", day(2025, 2, 27)),
+    ("Feb 30", None),
+    ("2024-13-01", None),
+    ("sometime soon", None),
+    ("", None),
+])
+def test_parse_due_date(text, expected):
+    assert dates.parse_due_date(text, now=NOW) == expected
+
+
+def test_batch_and_reference_time_share_one_now():
+    assert dates.parse_due_dates(["today", None, "end of week"], now=NOW) == [
+        day(2024, 12, 27), None, day(2024, 12, 27)
+    ]
+    with dates.reference_time(NOW):
+        assert dates.parse_due_date("tomorrow") == day(2024, 12, 28)
+    assert dates.reference_now.get() is None
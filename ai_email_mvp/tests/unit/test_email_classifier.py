@@ -0,0 +1,60 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import schemas
+from app.crud import create_email, record_extraction_outcome
+from app.database import Base
+from app.models.email import Email
+from app.models.user import User
+from app.services import email_classifier
+from app.services.email_classifier import NaiveBayesClassifier, bulk_mail_signals, tokenize
+
+
+def test_bulk_mail_signals():
+    assert bulk_mail_signals(
+        "Our summer sale starts now",
+        sender="Shop <no-reply@shop.example.com>",
+        headers={"List-Unsubscribe": "<mailto:u@shop.example.com>", "Precedence": "bulk"}
+    ) == ["unsubscribe", "mailing_list", "no_reply_sender"]
+    assert bulk_mail_signals("Can you review the draft by Friday?", sender="alice@example.com") == []
+
+
+def test_heuristics_alone_only_skip_with_several_signals():
+    email_classifier._model = None
+    newsletter = "Big news this week! Click here to unsubscribe."
+    assert email_classifier.is_non_actionable(newsletter, sender="newsletter@example.com")
+    assert not email_classifier.is_non_actionable(newsletter, sender="alice@example.com")
+
+
+def test_naive_bayes_learns_from_outcomes():
+    model = NaiveBayesClassifier()
+    model.train(
+        [(tokenize("please submit the report by friday deadline"), True)] * 25
+        + [(tokenize("weekly digest sale discount offer"), False)] * 25
+    )
+    assert model.is_trained
+    assert model.log_odds(tokenize("submit the report")) > 0
+    assert model.log_odds(tokenize("discount offer this week")) < 0
+
+
+
+def test_retrain_learns_from_recorded_outcomes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/classifier.db")
+    Base.metadata.create_all(engine, tables=[User.__table__, Email.__table__])
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as db:
+        for i in range(25):
+            for kind, content, task_count in (
+                ("task", "Please submit the report by Friday, deadline", 1),
+                ("digest", "Weekly digest: sale discount offer", 0),
+            ):
+                email = create_email(db, schemas.EmailCreate(gmail_id=f"{kind}-{i}", content=content), 1)
+                record_extraction_outcome(db, email.id, task_count)
+
+    email_classifier._model = None
+    email_classifier.retrain(session_factory)
+    assert email_classifier._model.is_trained
+    assert email_classifier.actionable_probability("Please submit the report") > 0.5
+    assert email_classifier.actionable_probability("Weekly digest discount offer") < 0.5
+    email_classifier._model = None
+    engine.dispose()
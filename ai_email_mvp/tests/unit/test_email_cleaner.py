@@ -0,0 +1,44 @@
+from app.utils.email_cleaner import clean_email, html_to_text, strip_quotes_and_signatures
+
+
+def test_html_to_text_drops_hidden_elements_and_keeps_blocks():
+    content = (
+        "<html><head><title>Hi</title><style>p{color:red}</style></head><body>"
+        "<script>alert(1)</script><p>Submit the form&nbsp;by <b>Friday</b>.</p>"
+        "<div>Budget: &pound;50</div><br><!-- tracking --></body></html>"
+    )
+    assert html_to_text(content) == "Submit the form by Friday.\n\nBudget: £50"
+
+
+def test_html_to_text_removes_nested_gmail_quotes():
+    content = (
+        "<div dir=\"ltr\">Sounds good, I'll send it tomorrow.</div>"
+        "<div class=\"gmail_quote\"><div>On Mon, Alice wrote:</div>"
+        "<blockquote class=\"gmail_quote\"><div><div>Can you send the report?</div></div></blockquote>"
+        "</div><div>Thanks</div>"
+    )
+    assert html_to_text(content) == "Sounds good, I'll send it tomorrow.\n\nThanks"
+
+
+def test_strip_quotes_and_signatures():
+    text = (
+        "Please book the room for Tuesday.\n"
+        "Sent from my iPhone\n\n"
+        "This email and any attachments are confidential.\n\n"
+        "---------- Forwarded message ---------\n"
+        "From: Bob <bob@example.com>\n"
+        "Subject: Room\n\n"
+        "The room needs to be booked a week ahead.\n"
+        "-- \n"
+        "Alice, Office Manager\n"
+        "On Mon, Bob wrote:\n"
+        "> Old text"
+    )
+    assert strip_quotes_and_signatures(text) == (
+        "Please book the room for Tuesday.\n\nThe room needs to be booked a week ahead."
+    )
+
+
+def test_clean_email_falls_back_when_everything_is_quoted():
+    text = "On Mon, Bob wrote:\n> Please review the contract."
+    assert clean_email(text) == text
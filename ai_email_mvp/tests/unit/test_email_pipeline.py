@@ -0,0 +1,124 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import schemas
+from app.database import Base
+from app.models.email import Email
+from app.models.task import Task
+from app.models.user import User
+from app.services import thread_state
+
+
+@pytest.fixture(scope="module")
+def main(tmp_path_factory):
+    # main needs an API key at import time and logs to app.log in the working directory
+    os.environ.setdefault("OPENAI_API_KEY", "test-key")
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("main"))
+    try:
+        import main
+    finally:
+        os.chdir(cwd)
+    return main
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    messages = []
+    monkeypatch.setattr(thread_state, "get_thread_state", lambda db, user_id, thread_id: None)
+    monkeypatch.setattr(
+        thread_state, "record_message",
+        lambda db, user_id, thread_id, gmail_id, content, result: messages.append((gmail_id, result))
+    )
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_failed_extraction_is_not_recorded_in_the_thread(main, recorded, monkeypatch):
+    async def extract(content, db, *args):
+        return {"tasks": [], "suggested_reply": None, "error": "LLM unavailable"}
+
+    monkeypatch.setattr(main, "extract_tasks_from_email", extract)
+    result = await main.extract_thread_tasks("Please send the report by Friday.", "m1", "t1", 1, None)
+    assert result["error"] == "LLM unavailable"
+    assert recorded == []
+
+
+@pytest.mark.asyncio
+async def test_successful_extraction_is_recorded_in_the_thread(main, recorded, monkeypatch):
+    tasks = {"tasks": [{"title": "Send the report"}], "suggested_reply": None}
+
+    async def extract(content, db, *args):
+        return tasks
+
+    monkeypatch.setattr(main, "extract_tasks_from_email", extract)
+    assert await main.extract_thread_tasks("Please send the report by Friday.", "m1", "t1", 1, None) == tasks
+    assert recorded == [("m1", tasks)]
+
+
+@pytest.mark.asyncio
+async def test_process_email_stages_use_their_own_sessions(main, monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/pipeline.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(main, "SessionLocal", session_factory)
+    stage_sessions = {}
+
+    async def extract(content, gmail_id, thread_id, user_id, db, **kwargs):
+        stage_sessions["extract"] = db
+        await asyncio.sleep(0)
+        return {"tasks": [{"title": "Send the report", "priority": "high", "due_date": None}], "suggested_reply": "OK"}
+
+    async def summarize(content, db):
+        stage_sessions["summary"] = db
+        await asyncio.sleep(0)
+        return "A report is due."
+
+    monkeypatch.setattr(main, "extract_thread_tasks", extract)
+    monkeypatch.setattr(main, "summarize_email", summarize)
+    with session_factory() as db:
+        db.add(User(id=1, email="user@example.com"))
+        db.commit()
+        outcome = await main.process_email(schemas.CurrentEmailProcess(
+            gmail_id="m1", thread_id="t1", subject="Report", sender="alice@example.com",
+            content="Please send the report by Friday."
+        ), 1, db)
+
+        assert len({id(session) for session in [db, *stage_sessions.values()]}) == 3
+        assert outcome["summary"] == "A report is due."
+        [task] = db.query(Task).filter(Task.id.in_(outcome["task_ids"])).all()
+        assert task.title == "Send the report"
+        assert db.query(Email.extracted_task_count).scalar() == 1
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_email_chunks_are_extracted_on_their_own_sessions(main, monkeypatch):
+    opened = []
+
+    def session_factory():
+        session = sessionmaker()()
+        opened.append(session)
+        return session
+
+    chunk_sessions = {}
+
+    async def extract(content, db):
+        chunk_sessions[content] = db
+        await asyncio.sleep(0)
+        return {"tasks": [{"title": f"Task from {content}"}], "suggested_reply": None}
+
+    monkeypatch.setattr(main, "SessionLocal", session_factory)
+    monkeypatch.setattr(main, "EXTRACTION_CHUNK_TOKENS", 1)
+    monkeypatch.setattr(main, "split_into_chunks", lambda content, *args: ["first", "second"])
+    monkeypatch.setattr(main, "extract_tasks_from_text", extract)
+    monkeypatch.setattr(main.email_classifier, "is_non_actionable", lambda *args: False)
+
+    result = await main.extract_tasks_from_email("Please send the report by Friday.", object())
+
+    assert [task["title"] for task in result["tasks"]] == ["Task from first", "Task from second"]
+    assert list(chunk_sessions.values()) == opened and len(opened) == 2
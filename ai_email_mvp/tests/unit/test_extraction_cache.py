@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.llm_cache import ExtractionCache
+from app.services import extraction_cache
+
+
+@pytest.fixture
+def cache_db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    ExtractionCache.__table__.create(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_cache_key_depends_on_content_model_and_prompt_version():
+    key = extraction_cache.make_cache_key("hello", "gpt-4", "1")
+    assert key == extraction_cache.make_cache_key("hello", "gpt-4", "1")
+    assert key != extraction_cache.make_cache_key("hello!", "gpt-4", "1")
+    assert key != extraction_cache.make_cache_key("hello", "gpt-3.5-turbo", "1")
+    assert key != extraction_cache.make_cache_key("hello", "gpt-4", "2")
+    assert key != extraction_cache.make_cache_key("hello", "gpt-4", "1", kind="summary")
+
+
+def test_store_and_get_result(cache_db):
+    key = extraction_cache.make_cache_key("hello", "gpt-4", "1")
+    assert extraction_cache.get_cached_result(cache_db, key) is None
+
+    result = {"tasks": [{"title": "Reply", "due_date": None, "priority": "low"}], "suggested_reply": None}
+    extraction_cache.store_result(cache_db, key, result, model="gpt-4", prompt_version="1")
+
+    assert extraction_cache.get_cached_result(cache_db, key) == result
+
+
+def test_hits_only_refresh_entries_not_accessed_recently(cache_db):
+    key = extraction_cache.make_cache_key("hello", "gpt-4", "1")
+    extraction_cache.store_result(cache_db, key, {"tasks": []}, model="gpt-4", prompt_version="1")
+    entry = cache_db.query(ExtractionCache).first()
+    stored_at = entry.last_accessed_at
+
+    extraction_cache.get_cached_result(cache_db, key)
+    assert (entry.hit_count, entry.last_accessed_at) == (0, stored_at)
+
+    entry.last_accessed_at = datetime.now(timezone.utc) - timedelta(
+        minutes=extraction_cache.EXTRACTION_CACHE_TOUCH_MINUTES
+    )
+    cache_db.commit()
+    extraction_cache.get_cached_result(cache_db, key)
+    assert entry.hit_count == 1
+    assert entry.last_accessed_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) - timedelta(minutes=1)
+
+
+def test_expired_entries_are_not_served(cache_db):
+    key = extraction_cache.make_cache_key("hello", "gpt-4", "1")
+    extraction_cache.store_result(cache_db, key, {"tasks": []}, model="gpt-4", prompt_version="1")
+    entry = cache_db.query(ExtractionCache).first()
+    entry.expires_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+    cache_db.commit()
+
+    assert extraction_cache.get_cached_result(cache_db, key) is None
+    assert cache_db.query(ExtractionCache).count() == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache_db):
+    keys = [extraction_cache.make_cache_key(f"email {i}", "gpt-4", "1") for i in range(3)]
+    for key in keys:
+        extraction_cache.store_result(cache_db, key, {"tasks": []}, model="gpt-4", prompt_version="1")
+    # Writes don't evict; that is left to the eviction task
+    assert cache_db.query(ExtractionCache).count() == 3
+
+    # Age the entries, then touch the oldest so the second one becomes least recently used
+    now = datetime.now(timezone.utc)
+    for hours, entry in zip((3, 2, 1), cache_db.query(ExtractionCache).order_by(ExtractionCache.id)):
+        entry.last_accessed_at = now - timedelta(hours=hours)
+    cache_db.commit()
+    extraction_cache.get_cached_result(cache_db, keys[0])
+    extraction_cache.evict_entries(cache_db, max_entries=2)
+
+    assert extraction_cache.get_cached_result(cache_db, keys[0]) is not None
+    assert extraction_cache.get_cached_result(cache_db, keys[1]) is None
+    assert extraction_cache.get_cached_result(cache_db, keys[2]) is not None
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import schemas
+from app.crud import create_email, create_tasks_bulk, get_tasks_by_ids
+from app.database import Base
+from app.models.email import Email
+from app.models.task import Task
+from app.models.team import Team
+from app.models.user import User
+from app.utils.query_counter import count_queries
+from app.utils.single_flight import SingleFlight
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/crud.db")
+    Base.metadata.create_all(
+        engine, tables=[User.__table__, Team.__table__, Email.__table__, Task.__table__]
+    )
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add(User(id=1, email="user@example.com"))
+        session.commit()
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    with session_factory() as session:
+        yield session
+
+
+def store_email(db, gmail_id="m1", content="Please send the report"):
+    return create_email(db, schemas.EmailCreate(gmail_id=gmail_id, content=content), 1)
+
+
+def test_create_email_updates_the_stored_copy(db):
+    email = store_email(db)
+    again = store_email(db, content="Please send the report by Friday")
+    assert again.id == email.id
+    assert again.content == "Please send the report by Friday"
+    assert db.query(Email).count() == 1
+
+
+def test_create_tasks_bulk_maps_extracted_fields(db):
+    email = store_email(db)
+    due = datetime(2026, 11, 2, tzinfo=timezone.utc)
+    [task_id] = create_tasks_bulk(db, [
+        schemas.TaskCreate(title="Send report", priority="high", due_date=due, email_id=email.id, user_id=1)
+    ], 1)
+    db.expire_all()
+    stored = db.get(Task, task_id)
+    assert (stored.created_by, stored.email_id, stored.priority, stored.status) == (1, email.id, "high", "pending")
+    assert stored.deadline.replace(tzinfo=timezone.utc) == due
+    assert schemas.Task.model_validate(stored).user_id == 1
+
+
+def test_create_tasks_bulk_skips_tasks_already_stored_for_the_email(db):
+    email = store_email(db)
+    first = create_tasks_bulk(db, [
+        schemas.TaskCreate(title="Send report", email_id=email.id),
+        schemas.TaskCreate(title="Book room", email_id=email.id),
+    ], 1)
+    again = create_tasks_bulk(db, [
+        schemas.TaskCreate(title=" send REPORT ", email_id=email.id),
+        schemas.TaskCreate(title="Call Sam", email_id=email.id),
+    ], 1)
+    assert again[0] == first[0]
+    assert db.query(Task).count() == 3
+
+
+def test_create_tasks_bulk_returns_ids_without_reloading_the_tasks(db):
+    email = store_email(db)
+    tasks = [schemas.TaskCreate(title=f"Task {i}", email_id=email.id) for i in range(5)]
+    with count_queries() as queries:
+        task_ids = create_tasks_bulk(db, tasks, 1)
+    # The lookup of stored tasks and the inserts (SQLite inserts one row at a
+    # time); no SELECT per task to reload its ID after commit
+    assert queries.count == 1 + len(tasks)
+    assert len(set(task_ids)) == 5
+
+
+@pytest.mark.asyncio
+async def test_duplicate_requests_read_back_the_one_flights_tasks(session_factory):
+    # Mirrors process_current_email: one run creates the tasks on its own
+    # session and every waiting request reads them back on its own
+    flight = SingleFlight("test")
+    runs = 0
+
+    async def process():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        with session_factory() as flight_db:
+            email = store_email(flight_db)
+            task_ids = create_tasks_bulk(flight_db, [
+                schemas.TaskCreate(title=title, email_id=email.id) for title in ("B", "A", "C")
+            ], 1)
+            return {"task_ids": task_ids}
+
+    async def request():
+        outcome = await flight.do((1, "m1"), process)
+        with session_factory() as db:
+            return [task.title for task in get_tasks_by_ids(db, outcome["task_ids"])]
+
+    assert await asyncio.gather(*[request() for _ in range(3)]) == [["B", "A", "C"]] * 3
+    assert runs == 1
+
+
+def test_get_tasks_by_ids_keeps_the_given_order_and_skips_missing_ids(db):
+    ids = create_tasks_bulk(db, [schemas.TaskCreate(title=title) for title in ("A", "B")], 1)
+    assert [task.title for task in get_tasks_by_ids(db, [ids[1], 999, ids[0]])] == ["B", "A"]
+    assert get_tasks_by_ids(db, []) == []
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import Column, Integer, Table, create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.job import Job
+from app.services import job_queue
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/jobs.db", connect_args={"check_same_thread": False})
+    if "users" not in Job.metadata.tables:
+        Table("users", Job.metadata, Column("id", Integer, primary_key=True))
+    Job.metadata.tables["users"].create(bind=engine)
+    Job.__table__.create(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def test_enqueue_is_idempotent_per_key(session_factory):
+    with session_factory() as db:
+        job, created = job_queue.enqueue(db, "extract", 1, {"gmail_id": "a"}, idempotency_key="k")
+        again, created_again = job_queue.enqueue(db, "extract", 1, {"gmail_id": "a"}, idempotency_key="k")
+        assert created and not created_again
+        assert again.id == job.id
+        assert db.query(Job).count() == 1
+
+
+def test_each_job_is_claimed_once(session_factory):
+    with session_factory() as db:
+        job_queue.enqueue(db, "extract", 1, {})
+    with session_factory() as first, session_factory() as second:
+        job = job_queue.claim_next(first)
+        assert job.status == "running" and job.attempts == 1
+        assert job_queue.claim_next(second) is None
+
+
+def test_failed_attempts_back_off_then_fail(session_factory, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RETRY_DELAY_SECONDS", 0)
+    with session_factory() as db:
+        job_queue.enqueue(db, "extract", 1, {}, max_attempts=2)
+        for expected_status in ("queued", "failed"):
+            job = job_queue.claim_next(db)
+            assert job_queue.fail(db, job, "boom")
+            db.refresh(job)
+            assert job.status == expected_status
+        assert job_queue.claim_next(db) is None
+
+        job_queue.retry(db, job)
+        assert job.status == "queued" and job.attempts == 0
+        assert job_queue.claim_next(db).id == job.id
+
+
+def test_job_with_an_expired_lease_is_claimed_again(session_factory):
+    with session_factory() as db:
+        job_queue.enqueue(db, "extract", 1, {})
+        job = job_queue.claim_next(db)
+        job.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.commit()
+
+        reclaimed = job_queue.claim_next(db)
+        assert reclaimed.id == job.id and reclaimed.attempts == 2
+        # The first worker lost its lease, so its late result is dropped
+        assert not job_queue.complete(db, job_queue.Job(id=job.id, attempts=1), {"late": True})
+        assert job_queue.complete(db, reclaimed, {"task_ids": []})
+
+
+def test_job_whose_lease_expires_on_its_last_attempt_fails(session_factory):
+    with session_factory() as db:
+        job_queue.enqueue(db, "extract", 1, {}, max_attempts=1)
+        job = job_queue.claim_next(db)
+        job.lease_expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.commit()
+
+        assert job_queue.claim_next(db) is None
+        db.refresh(job)
+        assert job.status == "failed" and job.attempts == 1
+        assert job.error == "Job lease expired on its last attempt"
+        assert job.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_runs_handlers_and_requeues_on_shutdown(session_factory):
+    started = asyncio.Event()
+
+    async def extract(db, payload, user_id):
+        return {"gmail_id": payload["gmail_id"], "user_id": user_id}
+
+    async def slow(db, payload, user_id):
+        started.set()
+        await asyncio.sleep(60)
+
+    pool = job_queue.JobWorkerPool(session_factory, workers=1, poll_interval=0.01)
+    pool.register("extract", extract)
+    pool.register("slow", slow)
+    with session_factory() as db:
+        job, _ = job_queue.enqueue(db, "extract", 7, {"gmail_id": "a"})
+        assert await pool.run_next()
+        db.refresh(job)
+        assert job.status == "succeeded"
+        assert job.result == {"gmail_id": "a", "user_id": 7}
+
+        slow_job, _ = job_queue.enqueue(db, "slow", 7, {})
+        pool.start()
+        await asyncio.wait_for(started.wait(), 1)
+        await pool.stop()
+        db.refresh(slow_job)
+        assert slow_job.status == "queued" and slow_job.attempts == 0
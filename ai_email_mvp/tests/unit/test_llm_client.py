@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import llm_client, llm_gateway
+
+
+class FakeCompletions:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, (int, float)):
+            await asyncio.sleep(outcome)
+            outcome = "slow"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f" {outcome} "))]
+        )
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    def install(outcomes):
+        completions = FakeCompletions(outcomes)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        monkeypatch.setattr(llm_client, "_client", client)
+        monkeypatch.setattr(llm_client, "LLM_INITIAL_RETRY_DELAY", 0)
+        return completions
+    return install
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_returns_stripped_content(fake_client):
+    completions = fake_client(["hello"])
+    result = await llm_client.chat_completion([{"role": "user", "content": "hi"}], model="gpt-4")
+    assert result == "hello"
+    assert completions.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_retries_then_succeeds(fake_client):
+    completions = fake_client([RuntimeError("boom"), "ok"])
+    result = await llm_client.chat_completion([], model="gpt-4", max_retries=2)
+    assert result == "ok"
+    assert completions.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_times_out(fake_client):
+    fake_client([1.0])
+    with pytest.raises(TimeoutError):
+        await llm_client.chat_completion([], model="gpt-4", timeout=0.01, max_retries=1)
+
+
+@pytest.mark.asyncio
+async def test_calls_run_concurrently(fake_client):
+    fake_client([0.05] * 10)
+    start = asyncio.get_running_loop().time()
+    await asyncio.gather(*[llm_client.chat_completion([], model="gpt-4") for _ in range(10)])
+    assert asyncio.get_running_loop().time() - start < 0.4
+
+
+class FakeStream:
+    def __init__(self, deltas):
+        self.deltas = list(deltas)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.deltas:
+            raise StopAsyncIteration
+        delta = self.deltas.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_completion_yields_deltas(monkeypatch):
+    async def create(**kwargs):
+        assert kwargs["stream"] is True
+        return FakeStream(["Hel", None, "lo"])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_client, "_client", client)
+
+    deltas = [delta async for delta in llm_client.stream_chat_completion([], model="gpt-3.5-turbo")]
+    assert deltas == ["Hel", "lo"]
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_completion_holds_its_gateway_slot_until_closed(monkeypatch):
+    async def create(**kwargs):
+        return FakeStream(["Hel", "lo", "!"])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_client, "_client", client)
+    llm_gateway.reset()
+    limiter = llm_gateway.get_gateway("gpt-3.5-turbo").limiter
+
+    deltas = llm_client.stream_chat_completion([], model="gpt-3.5-turbo")
+    assert await deltas.__anext__() == "Hel"
+    assert limiter.in_flight == 1
+    await deltas.aclose()
+    assert limiter.in_flight == 0
+
+    assert [delta async for delta in llm_client.stream_chat_completion([], model="gpt-3.5-turbo")] == ["Hel", "lo", "!"]
+    assert limiter.in_flight == 0
+    llm_gateway.reset()
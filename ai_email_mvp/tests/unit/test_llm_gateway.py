@@ -0,0 +1,187 @@
+import asyncio
+import time
+
+import openai
+import pytest
+
+from app.services import llm_client, llm_gateway
+from app.services.llm_gateway import AIMDLimiter, CircuitBreaker, CircuitOpenError, OverloadedError
+from tests.fake_openai import FakeOpenAIServer
+
+
+@pytest.fixture
+def server(monkeypatch):
+    llm_gateway.reset()
+    with FakeOpenAIServer() as fake:
+        client = openai.AsyncOpenAI(api_key="test", base_url=fake.base_url, max_retries=0)
+        monkeypatch.setattr(llm_client, "_client", client)
+        monkeypatch.setattr(llm_client, "LLM_INITIAL_RETRY_DELAY", 0.01)
+        yield fake
+    llm_gateway.reset()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_honours_retry_after_and_lowers_the_limit(server):
+    server.fail_next(1, status=429, retry_after="0.3")
+
+    started = time.monotonic()
+    result = await llm_client.chat_completion([], model="gpt-4")
+
+    assert result == "ok"
+    assert server.requests == 2
+    assert time.monotonic() - started >= 0.3
+    assert llm_gateway.get_gateway("gpt-4").limiter.limit < llm_gateway.LLM_CONCURRENCY_INITIAL
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(server):
+    server.fail_next(1, status=400)
+
+    with pytest.raises(openai.BadRequestError):
+        await llm_client.chat_completion([], model="gpt-4")
+    assert server.requests == 1
+    assert llm_gateway.get_gateway("gpt-4").breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_fails_fast(server):
+    server.fail_next(llm_gateway.LLM_BREAKER_FAILURE_THRESHOLD, status=503)
+
+    with pytest.raises(openai.InternalServerError):
+        await llm_client.chat_completion([], model="gpt-4", max_retries=llm_gateway.LLM_BREAKER_FAILURE_THRESHOLD)
+    requests = server.requests
+
+    with pytest.raises(CircuitOpenError):
+        await llm_client.chat_completion([], model="gpt-4")
+    assert server.requests == requests
+    # Other models have their own circuit
+    assert await llm_client.chat_completion([], model="gpt-3.5-turbo") == "ok"
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_limited_and_excess_load_is_shed(server):
+    server.latency = 0.1
+    gateway = llm_gateway.get_gateway("gpt-4")
+    gateway.limiter = AIMDLimiter(initial=2, max_limit=2, max_queue=3)
+
+    results = await asyncio.gather(
+        *[llm_client.chat_completion([], model="gpt-4") for _ in range(8)],
+        return_exceptions=True
+    )
+
+    assert server.max_concurrent <= 2
+    assert results.count("ok") == 5
+    assert sum(isinstance(result, OverloadedError) for result in results) == 3
+    assert gateway.stats()["shed"] == 3
+
+
+def test_breaker_lets_one_probe_through_after_the_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = {llm_gateway.backoff_delay(3, 1.0) for _ in range(20)}
+    assert len(delays) > 1
+    assert all(0 <= delay <= 4 for delay in delays)
+    assert llm_gateway.backoff_delay(1, 0, retry_after=2.5) == 2.5
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_stay_fast_while_a_backfill_saturates_the_gateway(server):
+    server.latency = 0.1
+    gateway = llm_gateway.get_gateway("gpt-4")
+    gateway.limiter = AIMDLimiter(initial=4, max_limit=4, reserved_share=0.5)
+
+    async def backfill():
+        llm_gateway.set_lane("backfill")
+        return await asyncio.gather(*[llm_client.chat_completion([], model="gpt-4") for _ in range(20)])
+
+    async def interactive():
+        started = time.monotonic()
+        await llm_client.chat_completion([], model="gpt-4")
+        return time.monotonic() - started
+
+    backfill_run = asyncio.create_task(backfill())
+    await asyncio.sleep(0.05)
+    assert gateway.limiter.lane_in_flight["backfill"] == 2
+    durations = await asyncio.gather(*[interactive() for _ in range(2)])
+    assert max(durations) < 0.3  # The backfill queue alone takes a second to drain
+    assert gateway.stats()["lanes"]["backfill"]["queued"] > 0
+    assert await backfill_run == ["ok"] * 20
+
+
+@pytest.mark.asyncio
+async def test_backfill_never_takes_the_last_slot():
+    limiter = AIMDLimiter(initial=1, max_limit=2, reserved_share=0.3)
+    assert limiter.backfill_limit() == 0
+    queued_backfill = asyncio.create_task(limiter.acquire("backfill"))
+    await asyncio.sleep(0)
+    assert limiter.lane_in_flight["backfill"] == 0
+
+    # The interactive caller gets the slot at once
+    await asyncio.wait_for(limiter.acquire("interactive"), 0.1)
+    limiter.release("interactive")
+    assert not queued_backfill.done()
+
+    # Once the limit grows there is room for backfill again
+    limiter.limit = 2
+    assert limiter.backfill_limit() == 1
+    limiter._wake()
+    await queued_backfill
+    assert limiter.lane_in_flight == {"interactive": 0, "backfill": 1}
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_backfill_calls_before_interactive_ones():
+    limiter = AIMDLimiter(initial=1, max_limit=1, max_queue=1, reserved_share=0)
+    await limiter.acquire("interactive")
+    queued_backfill = asyncio.create_task(limiter.acquire("backfill"))
+    await asyncio.sleep(0)
+
+    queued_interactive = asyncio.create_task(limiter.acquire("interactive"))
+    with pytest.raises(OverloadedError):
+        await queued_backfill
+    limiter.release("interactive")
+    await queued_interactive
+    assert limiter.lane_in_flight == {"interactive": 1, "backfill": 0}
+    assert limiter.shed == 1
+
+
+@pytest.mark.asyncio
+async def test_only_overload_errors_lower_the_limit():
+    gateway = llm_gateway.LLMGateway("test")
+    outcomes = [ConnectionResetError("connection reset"), "ok"]
+
+    async def request():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert await gateway.call(request, timeout=1, max_retries=2, initial_delay=0) == "ok"
+    assert gateway.limiter.limit > llm_gateway.LLM_CONCURRENCY_INITIAL
+    assert llm_gateway.is_overload(TimeoutError())
+    assert not llm_gateway.is_overload(ConnectionResetError())
+
+
+@pytest.mark.asyncio
+async def test_streamed_replies_hold_their_slot_until_closed():
+    gateway = llm_gateway.LLMGateway("test")
+
+    async def request():
+        return "stream"
+
+    stream, release = await gateway.open_stream(request, timeout=1, max_retries=1, initial_delay=0)
+    assert (stream, gateway.limiter.in_flight) == ("stream", 1)
+    release()
+    release()
+    assert gateway.limiter.in_flight == 0
@@ -0,0 +1,71 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import llm_client, llm_provider
+from app.services.llm_provider import Cassette, RecordingProvider, ReplayMissError, ReplayProvider
+
+MESSAGES = [{"role": "user", "content": "Summarize this email"}]
+
+
+@pytest.fixture
+def use_provider(monkeypatch):
+    def install(provider):
+        monkeypatch.setattr(llm_provider, "_provider", provider)
+        return provider
+    return install
+
+
+@pytest.fixture
+def live_client(monkeypatch):
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="A short summary."))],
+            usage=SimpleNamespace(prompt_tokens=12, completion_tokens=4)
+        )
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_client, "_client", client)
+    return calls
+
+
+def test_request_key_ignores_streaming_options():
+    params = {"model": "gpt-4", "messages": MESSAGES}
+    assert llm_provider.request_key(params) == llm_provider.request_key(
+        dict(params, stream=True, stream_options={"include_usage": True})
+    )
+    assert llm_provider.request_key(params) != llm_provider.request_key(dict(params, temperature=0.2))
+
+
+@pytest.mark.asyncio
+async def test_recorded_response_replays_without_a_client(tmp_path, use_provider, live_client, monkeypatch):
+    cassette = Cassette(str(tmp_path))
+    use_provider(RecordingProvider(cassette))
+    assert await llm_client.chat_completion(MESSAGES, model="gpt-4") == "A short summary."
+
+    monkeypatch.setattr(llm_client, "_client", None)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    replay = use_provider(ReplayProvider(cassette, latency_ms=50))
+    started = time.perf_counter()
+    assert await llm_client.chat_completion(MESSAGES, model="gpt-4") == "A short summary."
+    assert time.perf_counter() - started >= 0.05
+    assert len(live_client) == 1
+    assert replay.hits == 1
+
+    deltas = [delta async for delta in llm_client.stream_chat_completion(MESSAGES, model="gpt-4")]
+    assert "".join(deltas) == "A short summary."
+
+
+@pytest.mark.asyncio
+async def test_unrecorded_request_fails_without_retrying(tmp_path, use_provider):
+    replay = use_provider(ReplayProvider(Cassette(str(tmp_path)), latency_ms=0))
+    with pytest.raises(ReplayMissError):
+        await llm_client.chat_completion(MESSAGES, model="gpt-4", max_retries=3)
+    assert replay.misses == 1
+
+    replay.fallback = lambda params: "canned"
+    assert await llm_client.chat_completion(MESSAGES, model="gpt-4") == "canned"
@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, Integer, Table, create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.llm_usage import LLMUsage
+from app.services import llm_telemetry
+
+STATS = {"queue_wait_seconds": 0.01, "latency_seconds": 0.5, "retries": 1}
+
+
+@pytest.fixture
+def usage_db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    if "users" not in LLMUsage.metadata.tables:
+        Table("users", LLMUsage.metadata, Column("id", Integer, primary_key=True))
+    LLMUsage.metadata.tables["users"].create(bind=engine)
+    LLMUsage.__table__.create(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    monkeypatch.setattr(llm_telemetry, "_pending_usage", {})
+    llm_telemetry.set_current_user(None)
+
+
+def test_estimate_cost_matches_dated_models_by_longest_prefix():
+    assert llm_telemetry.estimate_cost("gpt-4o-mini-2024-07-18", 1000, 1000) == pytest.approx(0.00075)
+    assert llm_telemetry.estimate_cost("gpt-4o-2024-08-06", 1000, 0) == pytest.approx(0.0025)
+    assert llm_telemetry.estimate_cost("unknown-model", 1000, 1000) == 0.0
+
+
+def test_record_call_buffers_usage_for_the_current_user():
+    usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20)
+    llm_telemetry.record_call("gpt-4", "extraction", "ok", STATS, usage)  # No user: metrics only
+    llm_telemetry.set_current_user(7)
+    llm_telemetry.record_call("gpt-4", "extraction", "ok", STATS, usage)
+    llm_telemetry.record_call("gpt-4", "summary", "ok", STATS, usage)
+    llm_telemetry.record_call("gpt-4", "summary", "error", STATS)
+
+    pending = llm_telemetry._pending_usage[(7, date.today(), "gpt-4")]
+    assert pending["calls"] == 2
+    assert pending["prompt_tokens"] == 200
+    assert pending["completion_tokens"] == 40
+    assert len(llm_telemetry._pending_usage) == 1
+
+
+def test_flush_usage_adds_to_the_ledger_and_drops_old_rows(usage_db):
+    usage_db.add(LLMUsage(user_id=7, day=date.today() - timedelta(days=1000), model="gpt-4",
+                          calls=1, prompt_tokens=1, completion_tokens=1, cost_usd=1.0))
+    usage_db.commit()
+
+    llm_telemetry.set_current_user(7)
+    usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=0)
+    for _ in range(2):
+        llm_telemetry.record_call("gpt-4o-mini", "extraction", "ok", STATS, usage)
+        assert llm_telemetry.flush_usage(usage_db) == 1
+
+    rows = llm_telemetry.get_user_usage(usage_db, 7)
+    assert len(rows) == 1
+    assert rows[0].calls == 2
+    assert rows[0].cost_usd == pytest.approx(0.0003)
+    assert usage_db.query(LLMUsage).count() == 1
+    assert llm_telemetry._pending_usage == {}
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from app.services import llm_client, model_router
+from app.services.model_router import LowConfidenceError, ModelRouter
+
+
+def _parse(response):
+    result = json.loads(response)
+    if not result["tasks"]:
+        raise LowConfidenceError("no tasks", result)
+    return result
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    replies = {}
+    calls = []
+
+    async def fake_chat_completion(messages, model, temperature=None, **kwargs):
+        calls.append(model)
+        reply = replies[model]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(llm_client, "chat_completion", fake_chat_completion)
+    return replies, calls
+
+
+@pytest.mark.asyncio
+async def test_router_uses_the_cheap_tier_when_it_validates(responses):
+    replies, calls = responses
+    replies["small"] = '{"tasks": [{"title": "Send report"}]}'
+    router = ModelRouter("test-cheap", ["small", "large"])
+
+    result, model = await router.complete([], validate=_parse)
+
+    assert model == "small"
+    assert calls == ["small"]
+    assert result["tasks"][0]["title"] == "Send report"
+    assert router.stats()["small"]["escalation_rate"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_router_escalates_on_invalid_or_low_confidence_output(responses):
+    replies, calls = responses
+    replies["small"] = "not json"
+    replies["medium"] = '{"tasks": []}'
+    replies["large"] = '{"tasks": [{"title": "Send report"}]}'
+    router = ModelRouter("test-escalate", ["small", "medium", "large"])
+
+    result, model = await router.complete([], validate=_parse)
+
+    assert model == "large"
+    assert calls == ["small", "medium", "large"]
+    stats = router.stats()
+    assert stats["small"]["escalations"] == 1
+    assert stats["medium"]["escalation_rate"] == 1.0
+    assert stats["large"]["failures"] == 0
+    assert "test-escalate" in model_router.get_all_stats()
+
+
+@pytest.mark.asyncio
+async def test_router_keeps_low_confidence_output_of_the_last_tier(responses):
+    replies, _ = responses
+    replies["small"] = "not json"
+    replies["large"] = '{"tasks": []}'
+    router = ModelRouter("test-last", ["small", "large"])
+
+    result, model = await router.complete([], validate=_parse)
+
+    assert (result, model) == ({"tasks": []}, "large")
+    assert router.stats()["small"]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_router_does_not_escalate_failed_calls(responses):
+    replies, calls = responses
+    replies["small"] = RuntimeError("rate limited")
+    replies["large"] = '{"tasks": [{"title": "Send report"}]}'
+    router = ModelRouter("test-outage", ["small", "large"])
+
+    with pytest.raises(RuntimeError):
+        await router.complete([], validate=_parse)
+
+    assert calls == ["small"]
+    assert router.stats()["small"]["failures"] == 1
+    assert router.stats()["small"]["escalations"] == 0
+
+
+@pytest.mark.asyncio
+async def test_router_raises_when_the_last_tier_fails(responses):
+    replies, _ = responses
+    replies["only"] = "not json"
+
+    with pytest.raises(ValueError):
+        await ModelRouter("test-fail", ["only"]).complete([], validate=_parse)
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import prefetch
+
+
+def email(gmail_id, content="Send the report by Friday"):
+    return SimpleNamespace(gmail_id=gmail_id, content=content)
+
+
+def outcome(name):
+    return prefetch.PREFETCH_OUTCOMES.labels(name)._value.get()
+
+
+@pytest.mark.asyncio
+async def test_submit_dedups_and_enforces_the_budget():
+    scheduler = prefetch.PrefetchScheduler(budget=2, window_seconds=60, concurrency=1)
+    ran = []
+
+    async def run(user_id, item):
+        ran.append((user_id, item.gmail_id))
+
+    results = scheduler.submit(1, [email("a"), email("a"), email("b"), email("c")], run)
+    assert results == {"a": "queued", "b": "queued", "c": "over_budget"}
+    assert scheduler.submit(1, [email("b")], run) == {"b": "duplicate"}
+    # Budgets are per user
+    assert scheduler.submit(2, [email("c")], run) == {"c": "queued"}
+
+    await asyncio.sleep(0.01)
+    assert sorted(ran) == [(1, "a"), (1, "b"), (2, "c")]
+
+
+@pytest.mark.asyncio
+async def test_opening_a_prefetched_email_is_scored_by_content():
+    scheduler = prefetch.PrefetchScheduler()
+
+    async def run(user_id, item):
+        pass
+
+    scheduler.submit(1, [email("a"), email("b")], run)
+    await asyncio.sleep(0)
+    hits, changed = outcome("hit"), outcome("content_changed")
+
+    scheduler.record_open(1, "a", "Send the report by Friday")
+    scheduler.record_open(1, "b", "Send the report by Friday, and the slides")
+    scheduler.record_open(1, "never-prefetched", "anything")
+
+    assert outcome("hit") == hits + 1
+    assert outcome("content_changed") == changed + 1
+    assert scheduler.stats()["awaiting_open"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_prefetch_is_forgotten():
+    scheduler = prefetch.PrefetchScheduler()
+
+    async def run(user_id, item):
+        raise RuntimeError("boom")
+
+    scheduler.submit(1, [email("a")], run)
+    await asyncio.sleep(0.01)
+    assert scheduler.stats() == {"in_flight": 0, "awaiting_open": 0}
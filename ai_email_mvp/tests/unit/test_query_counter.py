@@ -0,0 +1,81 @@
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.crud import get_or_create_users_by_email, get_team_with_members, get_user_teams
+from app.database import Base
+from app.models.team import Team, TeamMember
+from app.models.user import User
+from app.utils.query_counter import QueryCountMiddleware, count_queries
+
+def test_middleware_reports_each_requests_queries():
+    engine = create_engine("sqlite://")
+    app = FastAPI()
+    app.add_middleware(QueryCountMiddleware)
+
+    @app.get("/queries/{n}")
+    def run_queries(n: int):
+        with engine.connect() as conn:
+            for _ in range(n):
+                conn.execute(text("SELECT 1"))
+        return {}
+
+    client = TestClient(app)
+    assert client.get("/queries/3").headers["x-query-count"] == "3"
+    assert client.get("/queries/0").headers["x-query-count"] == "0"
+
+
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, Team.__table__, TeamMember.__table__],
+        )
+        await conn.execute(insert(User), [{"id": i, "email": f"user{i}@example.com"} for i in range(1, 31)])
+        await conn.execute(insert(Team), [{"id": t, "name": f"Team {t}", "created_by": 1} for t in range(1, 21)])
+        await conn.execute(insert(TeamMember), [
+            {"team_id": t, "user_id": i} for t in range(1, 21) for i in range(1, 31)
+        ])
+    async with AsyncSession(engine) as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_user_teams_load_members_in_constant_queries(db):
+    with count_queries() as queries:
+        teams = await get_user_teams(db, 1, with_members=True)
+        emails = [[member.user.email for member in team.members] for team in teams]
+    assert len(emails) == 20
+    assert all(len(team_emails) == 30 for team_emails in emails)
+    assert queries.count == 2
+
+
+@pytest.mark.asyncio
+async def test_team_with_members_in_constant_queries(db):
+    with count_queries() as queries:
+        team = await get_team_with_members(db, 1)
+        emails = {member.user.email for member in team.members}
+    assert emails == {f"user{i}@example.com" for i in range(1, 31)}
+    assert queries.count == 2
+    assert await get_team_with_members(db, 99) is None
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_users_by_email_looks_up_in_one_query(db):
+    existing = [f"user{i}@example.com" for i in range(1, 31)]
+    with count_queries() as queries:
+        users = await get_or_create_users_by_email(db, existing)
+    assert [users[email].id for email in existing] == list(range(1, 31))
+    assert queries.count == 1
+
+    users = await get_or_create_users_by_email(db, ["user1@example.com", "new@example.com", "new@example.com"])
+    assert users["user1@example.com"].id == 1
+    assert users["new@example.com"].id is not None
@@ -0,0 +1,87 @@
+import importlib.util
+import os
+from datetime import datetime, timezone
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, inspect, select
+
+from app.crud.task import filter_tasks_query
+from app.database import Base
+from app.models.task import Task
+from app.models.team import Team, TeamMember
+from app.models.user import User
+
+MIGRATION_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "alembic", "versions", "d8e2f4a6b913_add_task_query_indexes.py"
+)
+
+
+def run_migration(engine, step: str) -> None:
+    spec = importlib.util.spec_from_file_location("add_task_query_indexes", MIGRATION_PATH)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.begin() as conn, Operations.context(MigrationContext.configure(conn)):
+        getattr(migration, step)()
+
+
+def query_plan(engine, statement) -> str:
+    with engine.connect() as conn:
+        compiled = statement.compile(conn, compile_kwargs={"render_postcompile": True})
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        engine, tables=[User.__table__, Team.__table__, TeamMember.__table__, Task.__table__]
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_task_filters_search_an_index_per_branch(engine):
+    plan = query_plan(engine, filter_tasks_query(1, status="pending"))
+    assert "ix_tasks_created_by_status_deadline" in plan
+    assert "ix_tasks_assigned_to_status_deadline" in plan
+    assert "ix_tasks_team_id_status_deadline" in plan
+    assert "ix_team_members_user_id_team_id" in plan
+    assert "SCAN tasks" not in plan
+
+
+def test_migration_adds_the_indexes_whose_columns_exist():
+    engine = create_engine("sqlite://")
+    # The tasks table as the initial migration created it
+    metadata = MetaData()
+    tasks = Table(
+        "tasks", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer),
+        Column("team_id", Integer),
+        Column("status", String),
+        Column("due_date", DateTime),
+        Column("reminder_time", DateTime),
+    )
+    Table("team_members", metadata, Column("id", Integer, primary_key=True),
+          Column("team_id", Integer), Column("user_id", Integer))
+    metadata.create_all(engine)
+
+    run_migration(engine, "upgrade")
+    indexes = {index["name"] for index in inspect(engine).get_indexes("tasks")}
+    assert indexes == {"ix_tasks_pending_reminders"}
+
+    # The reminder loop's query (crud.get_due_reminders)
+    due_reminders = select(tasks).where(
+        tasks.c.reminder_time.isnot(None),
+        tasks.c.reminder_time <= datetime.now(timezone.utc),
+        tasks.c.status.notin_(["completed", "deleted"])
+    )
+    assert "USING INDEX ix_tasks_pending_reminders" in query_plan(engine, due_reminders)
+
+    run_migration(engine, "downgrade")
+    assert inspect(engine).get_indexes("tasks") == []
+    assert inspect(engine).get_indexes("team_members") == []
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"tasks": calls}
+
+    results = await asyncio.gather(*[flight.do((1, "gmail-1"), work) for _ in range(5)])
+
+    assert calls == 1
+    assert results == [{"tasks": 1}] * 5
+    assert flight.coalesced == 4
+    assert not flight.in_flight((1, "gmail-1"))
+
+    # Once finished, the next call runs again, and other keys never coalesce
+    await asyncio.gather(flight.do((1, "gmail-1"), work), flight.do((2, "gmail-1"), work))
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_cancelling_one_waiter_keeps_the_call():
+    flight = SingleFlight("test")
+    started = asyncio.Event()
+
+    async def failing():
+        started.set()
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    first = asyncio.create_task(flight.do("key", failing))
+    await started.wait()
+    second = asyncio.create_task(flight.do("key", failing))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    with pytest.raises(RuntimeError):
+        await second
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_once_every_waiter_is_cancelled():
+    flight = SingleFlight("test")
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiters = [asyncio.create_task(flight.do("key", slow)) for _ in range(2)]
+    await started.wait()
+    waiters[0].cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    waiters[1].cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert flight.abandoned == 1
+    assert not flight.in_flight("key")
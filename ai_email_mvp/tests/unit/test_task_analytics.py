@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.crud.task import analytics_filters, get_task_metrics, get_team_performance
+from app.database import Base
+from app.models.task import Task
+from app.models.team import Team, TeamMember
+from app.models.user import User
+from app.utils.query_counter import count_queries
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+DAY = timedelta(days=1)
+
+
+def task(title, priority, status, created_by, created_days_ago, deadline_in_days,
+         assigned_to=None, team_id=None, completed_days_ago=None):
+    return {
+        "title": title, "priority": priority, "status": status, "created_by": created_by,
+        "assigned_to": assigned_to, "team_id": team_id,
+        "created_at": NOW - created_days_ago * DAY,
+        "deadline": NOW + deadline_in_days * DAY,
+        "completion_date": NOW - completed_days_ago * DAY if completed_days_ago is not None else None,
+    }
+
+
+@pytest_asyncio.fixture
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            Base.metadata.create_all,
+            tables=[User.__table__, Team.__table__, TeamMember.__table__, Task.__table__],
+        )
+        await conn.execute(insert(User), [{"id": i, "email": f"user{i}@example.com"} for i in (1, 2, 3)])
+        await conn.execute(insert(Team), [{"id": 1, "name": "Team", "created_by": 2}])
+        await conn.execute(insert(TeamMember), [{"team_id": 1, "user_id": 1}, {"team_id": 1, "user_id": 2}])
+        await conn.execute(insert(Task), [
+            task("a", "high", "completed", 1, 5, 0, assigned_to=1, completed_days_ago=3),  # 2 days, on time
+            task("b", "high", "completed", 2, 5, -2, assigned_to=2, team_id=1, completed_days_ago=1),  # 4 days, late
+            task("c", "low", "pending", 2, 4, -1, assigned_to=2, team_id=1),  # Overdue
+            task("d", "low", "in_progress", 1, 3, 1),
+            task("e", "high", "pending", 3, 3, -1),  # Not visible to user 1
+            task("f", "high", "pending", 1, 40, -1),  # Before the period
+        ])
+    async with AsyncSession(engine) as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_task_metrics_in_one_query(db):
+    filters = analytics_filters(1, None, NOW - timedelta(days=30), NOW)
+    with count_queries() as queries:
+        metrics = await get_task_metrics(db, filters, NOW)
+    assert queries.count == 1
+    assert metrics["total_tasks"] == 4
+    assert metrics["completed_tasks"] == 2
+    assert metrics["overdue_tasks"] == 1
+    assert metrics["on_time_completions"] == 1
+    assert metrics["avg_completion_seconds"] == pytest.approx(3 * 86400)
+    assert metrics["priority_distribution"] == {"high": 2, "low": 2}
+    assert metrics["status_distribution"] == {"completed": 2, "pending": 1, "in_progress": 1}
+
+
+@pytest.mark.asyncio
+async def test_team_performance_groups_by_assignee(db):
+    filters = analytics_filters(1, 1, NOW - timedelta(days=30), NOW)
+    with count_queries() as queries:
+        performance = await get_team_performance(db, filters)
+    assert queries.count == 1
+    assert [tuple(row) for row in performance] == [(2, 2, 1, pytest.approx(4 * 86400))]
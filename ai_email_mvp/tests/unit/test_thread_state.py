@@ -0,0 +1,50 @@
+from app.models.thread_state import ThreadState
+from app.services import thread_state
+
+
+def _state_for(*messages):
+    seen_hashes = []
+    for message in messages:
+        for sentence in thread_state.split_sentences(message):
+            seen_hashes.append(thread_state._sentence_hash(sentence))
+    return ThreadState(user_id=1, thread_id="t1", messages={}, known_tasks=[], seen_hashes=seen_hashes)
+
+
+def test_split_sentences_drops_quote_markers():
+    content = "Hi team.\n> Please send the report by Friday.\n>> Thanks!"
+    assert thread_state.split_sentences(content) == [
+        "Hi team.",
+        "Please send the report by Friday.",
+        "Thanks!",
+    ]
+
+
+def test_get_new_content_skips_quoted_history():
+    first = "Please send the report by Friday. The budget review is on Monday."
+    state = _state_for(first)
+
+    reply = (
+        "Sure. I will also book the room for Tuesday.\n\n"
+        "On Mon, Alice wrote:\n"
+        "> Please send the report by Friday.\n"
+        ">   The budget   review is on Monday."
+    )
+    assert thread_state.get_new_content(state, reply) == (
+        "Sure.\nI will also book the room for Tuesday.\nOn Mon, Alice wrote:"
+    )
+
+
+def test_get_new_content_is_empty_for_a_repeated_message():
+    message = "Please send the report by Friday."
+    assert thread_state.get_new_content(_state_for(message), message) == ""
+
+
+def test_format_known_tasks_is_compact():
+    state = _state_for()
+    state.known_tasks = [
+        {"title": "Send report", "due_date": "2024-05-03", "priority": "high"},
+        {"title": "Book room", "due_date": None},
+    ]
+    assert thread_state.format_known_tasks(state) == (
+        "- Send report (2024-05-03, high)\n- Book room (no date, medium)"
+    )
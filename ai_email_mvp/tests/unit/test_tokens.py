@@ -0,0 +1,63 @@
+from app.utils.tokens import count_tokens, split_into_chunks, merge_tasks
+
+
+def make_thread(paragraphs):
+    return "\n\n".join(
+        f"Message {i}. Please review the attached document {i} and send feedback soon."
+        for i in range(paragraphs)
+    )
+
+
+def test_count_tokens_grows_with_text():
+    assert count_tokens("") == 0
+    assert 0 < count_tokens("hello world") < count_tokens("hello world " * 50)
+
+
+def test_short_text_is_a_single_chunk():
+    assert split_into_chunks("Just one line.", max_tokens=100) == ["Just one line."]
+
+
+def test_chunks_respect_token_budget():
+    text = make_thread(200)
+    chunks = split_into_chunks(text, max_tokens=120, overlap_tokens=20)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 120 for chunk in chunks)
+    for i in range(200):
+        assert any(f"Message {i}." in chunk for chunk in chunks)
+
+
+def test_chunks_overlap():
+    chunks = split_into_chunks(make_thread(50), max_tokens=120, overlap_tokens=40)
+    for previous, current in zip(chunks, chunks[1:]):
+        first_paragraph = current.split("\n\n")[0]
+        assert first_paragraph in previous
+
+
+def test_oversized_paragraph_is_split():
+    text = "word " * 2000
+    chunks = split_into_chunks(text, max_tokens=100)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 100 for chunk in chunks)
+
+
+def test_edit_leaves_most_chunks_unchanged():
+    original = make_thread(300)
+    edited = original.replace("Message 150.", "Message 150 (edited).")
+    before = split_into_chunks(original, max_tokens=150)
+    after = split_into_chunks(edited, max_tokens=150)
+    unchanged = set(before) & set(after)
+    assert len(unchanged) >= len(before) - 3
+
+
+def test_merge_tasks_deduplicates_by_title():
+    merged = merge_tasks([
+        [{"title": "Submit the form", "due_date": None, "priority": "low"}],
+        [
+            {"title": "submit the form!", "due_date": "2025-01-10", "priority": "high"},
+            {"title": "Book a room", "due_date": None, "priority": "medium"},
+        ],
+    ])
+    assert merged == [
+        {"title": "Submit the form", "due_date": "2025-01-10", "priority": "high"},
+        {"title": "Book a room", "due_date": None, "priority": "medium"},
+    ]